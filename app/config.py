@@ -1,7 +1,8 @@
 import logging
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import BaseSettings, SettingsConfigDict, NoDecode
 from typing import List, Optional, Dict, Any # Adicionado Dict
-from pydantic import Field, model_validator
+from typing_extensions import Annotated
+from pydantic import Field, field_validator
 
 # Configurar logging básico para ver as mensagens no console
 logging.basicConfig(level=logging.INFO) # Pode mudar para logging.DEBUG para mais detalhes se necessário
@@ -11,21 +12,104 @@ class Settings(BaseSettings):
     gitlab_api_url: str = "https://gitlab.com"
     gitlab_access_token: str
     gitlab_project_id: str
-    
-    # Campos para ler as strings brutas do .env
-    # Usamos alias para mapear para os nomes das variáveis de ambiente
-    GITLAB_OBJECTIVE_LABELS_STR: Optional[str] = Field(None, alias="GITLAB_OBJECTIVE_LABELS")
-    GITLAB_KR_LABELS_STR: Optional[str] = Field(None, alias="GITLAB_KR_LABELS")
 
-    # Campos finais que serão List[str]
-    gitlab_objective_labels: List[str] = Field(default_factory=list, exclude=True) # exclude=True para não esperar no .env
-    gitlab_kr_labels: List[str] = Field(default_factory=list, exclude=True)      # exclude=True
+    # Cliente HTTP assíncrono (httpx) usado pelo GitlabService
+    gitlab_ssl_verify: bool = False
+    gitlab_timeout_seconds: float = 30.0
+    gitlab_max_connections: int = 20
+    gitlab_max_keepalive_connections: int = 10
+    gitlab_keepalive_expiry_seconds: float = 30.0
+    # Timeouts explícitos: conexão TCP/TLS e espera por uma conexão livre do pool (gitlab_timeout_seconds vale
+    # para leitura e escrita)
+    gitlab_connect_timeout_seconds: float = 5.0
+    gitlab_pool_timeout_seconds: float = 5.0
+
+    # Retentativas só para leituras (GET) após erro de rede, timeout ou resposta 502/503/504, com backoff
+    # exponencial e jitter completo (aleatório entre 0 e base * 2^n, limitado a gitlab_retry_backoff_max_seconds).
+    # Nenhuma retentativa começa depois de gitlab_retry_deadline_seconds do início da chamada. 0 desativa.
+    gitlab_retry_attempts: int = 2
+    gitlab_retry_backoff_seconds: float = 0.2
+    gitlab_retry_backoff_max_seconds: float = 2.0
+    gitlab_retry_deadline_seconds: float = 10.0
+
+    # Circuit breaker: após gitlab_circuit_failure_threshold falhas seguidas do GitLab (rede, timeout, 5xx) as
+    # chamadas falham na hora, sem esperar timeout, por gitlab_circuit_recovery_seconds; depois uma chamada de
+    # teste decide se o circuito fecha. 0 desativa. O estado aparece em /metrics e em /health/ready.
+    gitlab_circuit_failure_threshold: int = 5
+    gitlab_circuit_recovery_seconds: float = 30.0
+
+    # Máximo de chamadas simultâneas ao GitLab em operações em lote (KRs, atividades)
+    gitlab_bulk_concurrency: int = 8
+
+    # Janela (segundos) em que inclusões de atividades no mesmo KR são agrupadas numa única escrita
+    activity_coalesce_window_seconds: float = 0.05
+
+    # Limite de requisições ao GitLab (token bucket compartilhado por todas as corrotinas do worker). A taxa
+    # inicial é ajustada pelos headers RateLimit-Remaining/RateLimit-Reset das respostas, mantendo uma folga de
+    # gitlab_rate_limit_headroom. Chamadas em lote (importações, sincronização) não usam a reserva final
+    # (gitlab_rate_limit_bulk_reserve do burst), que fica para as leituras interativas. Taxa 0 desativa.
+    gitlab_rate_limit_per_second: float = 20.0
+    gitlab_rate_limit_burst: int = 20
+    gitlab_rate_limit_headroom: float = 0.1
+    gitlab_rate_limit_bulk_reserve: float = 0.25
+    # Respostas 429 pausam todas as chamadas até o Retry-After e a requisição é repetida até este número de vezes
+    gitlab_rate_limit_max_retries: int = 3
+
+    # Paginação por cursor (keyset do GitLab, com fallback para offset se a instância não suportar)
+    gitlab_keyset_pagination: bool = True
+    default_page_size: int = 20
+
+    # Cache de issues em memória (LRU + TTL). Tamanho ou TTL igual a 0 desativa o cache.
+    issue_cache_max_size: int = 2048
+    issue_cache_ttl_seconds: float = 300.0
+
+    # Atividades já interpretadas da tabela de cada KR, por (kr_iid, hash da descrição). 0 desativa.
+    activity_cache_max_size: int = 512
+
+    # Resumo por time/produto: KR aberto é considerado em risco abaixo deste % da meta prevista
+    kr_at_risk_threshold_percent: float = 50.0
+
+    # Snapshot local (SQLite) do espelho OKR, carregado na inicialização para evitar a varredura completa
+    # do projeto. Vazio desativa. Ex.: OKR_SNAPSHOT_PATH=/data/okr_snapshot.sqlite3
+    okr_snapshot_path: str = ""
+    # Intervalo (segundos) da sincronização incremental em segundo plano (updated_after = watermark). 0 desativa.
+    okr_sync_interval_seconds: float = 30.0
+    # Intervalo mínimo (segundos) entre gravações periódicas do snapshot pela sincronização
+    okr_snapshot_save_interval_seconds: float = 300.0
+    # Margem (segundos) aplicada antes do watermark nas consultas updated_after, contra diferença de relógio
+    okr_sync_overlap_seconds: float = 5.0
+
+    # Segredo configurado no webhook do GitLab (header X-Gitlab-Token). Vazio desativa POST /webhooks/gitlab.
+    gitlab_webhook_secret: str = ""
+
+    # Readiness (/health/ready): fica pronto após o aquecimento (projeto, labels, conexão). Falha se o tempo de
+    # ida e volta ao GitLab passar de health_max_gitlab_rtt_ms (0 desativa o limite); o RTT é medido de novo
+    # em segundo plano a cada health_rtt_check_interval_seconds (0 mede só no aquecimento) e a sonda não chama
+    # o GitLab. Se o aquecimento falhar, é repetido a cada health_prewarm_retry_seconds.
+    health_max_gitlab_rtt_ms: float = 2000.0
+    health_rtt_check_interval_seconds: float = 15.0
+    health_prewarm_retry_seconds: float = 5.0
+    # Header Server-Timing em cada resposta: tempo e número de chamadas ao GitLab (total e por método) e CPU local.
+    # Expõe detalhes internos de tempo ao cliente; desative se a API for pública.
+    server_timing_enabled: bool = True
+
+    # Listas de labels lidas do .env como strings separadas por vírgula (ex.: "Objetivo,Meta Principal").
+    # NoDecode evita que o pydantic-settings tente interpretar o valor como JSON.
+    gitlab_objective_labels: Annotated[List[str], NoDecode] = Field(default_factory=list)
+    gitlab_kr_labels: Annotated[List[str], NoDecode] = Field(default_factory=list)
 
     # JWT Settings
     SECRET_KEY: str = "a_very_secret_key_that_should_be_changed_in_production" # Replace with a generated key in real scenarios
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    @field_validator('gitlab_objective_labels', 'gitlab_kr_labels', mode='before')
+    @classmethod
+    def _split_labels(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return [label.strip() for label in value.split(',') if label.strip()]
+        return value
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding='utf-8',
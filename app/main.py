@@ -1,8 +1,36 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware # Importe o CORSMiddleware
-from app.routers import objectives, krs, activities, auth # Added kr_description_router
+from app.routers import objectives, krs, activities, auth, export, summary, search, sync, webhooks, health, metrics # Added kr_description_router
+from app.services import gitlab_service, health_service, snapshot_service, sync_service
+from app.middleware import MetricsMiddleware, ServerTimingMiddleware
+from app.config import settings
 
-app = FastAPI(title="Objectives and Key Results API")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Autenticação, projeto, labels e conexão do pool são aquecidos aqui, em segundo plano, e não na
+    # importação dos módulos (importar app.main não faz chamadas de rede). /health/ready só fica verde depois.
+    health_service.start()
+    # Carrega o snapshot local do espelho OKR (se configurado) e busca só o delta desde o último sync
+    if await snapshot_service.restore():
+        try:
+            await sync_service.sync_once()
+        except Exception:
+            logger.warning("Loaded the OKR snapshot but could not catch up with GitLab", exc_info=True)
+    # Sincronização incremental em segundo plano (updated_after = watermark)
+    sync_service.start()
+    yield
+    await health_service.stop()
+    await sync_service.stop()
+    # Grava o espelho atual para que o próximo worker já inicie aquecido
+    await snapshot_service.save()
+    # Fecha o pool de conexões (keep-alive) com o GitLab ao encerrar o worker
+    await gitlab_service.aclose()
+
+app = FastAPI(title="Objectives and Key Results API", lifespan=lifespan)
 
 # Configure o middleware CORS
 # Em produção, substitua "*" pelos domínios permitidos do seu frontend
@@ -22,6 +50,13 @@ app.add_middleware(
     allow_headers=["*"], # Permite todos os cabeçalhos
 )
 
+# Chamadas ao GitLab feitas pela requisição (quantidade e tempo, por método) no header Server-Timing
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Latência e status por rota (template, não a URL) para o /metrics; adicionado por último, envolve os demais
+app.add_middleware(MetricsMiddleware)
+
 # Include Auth Router
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 
@@ -34,6 +69,27 @@ app.include_router(krs.router, prefix="/krs", tags=["Key Results (KRs)"]) # Main
 # Include Activities Router
 app.include_router(activities.router, prefix="/activities", tags=["Activities"])
 
+# Include Export Router (streaming NDJSON)
+app.include_router(export.router, prefix="/export", tags=["Export"])
+
+# Include Summary Router (team/product dashboard)
+app.include_router(summary.router, prefix="/summary", tags=["Summary"])
+
+# Include Search Router (inverted index over objectives, KRs and activities)
+app.include_router(search.router, prefix="/search", tags=["Search"])
+
+# Include Sync Router (watermark and lag of the background delta sync)
+app.include_router(sync.router, prefix="/sync", tags=["Sync"])
+
+# Include Webhooks Router (GitLab Issue Hook events, authenticated by X-Gitlab-Token)
+app.include_router(webhooks.router, prefix="/webhooks", tags=["Webhooks"])
+
+# Include Health Router (liveness/readiness probes, no authentication)
+app.include_router(health.router, prefix="/health", tags=["Health"])
+
+# Include Metrics Router (Prometheus scrape endpoint, no authentication)
+app.include_router(metrics.router, tags=["Metrics"])
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Objectives and Key Results API"}
@@ -0,0 +1,78 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services import metrics, request_timing
+
+UNMATCHED_ROUTE = "unmatched"
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template with the router prefix (``/krs/{kr_iid}``), or "unmatched"."""
+    # Recent FastAPI keeps included routers nested and records the prefixed route under
+    # scope["fastapi"]; older versions copy each route with the prefix already in its path.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    route = context if context is not None else scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    """Records the latency and status of every API request, labelled by route template.
+
+    Pure ASGI (no BaseHTTPMiddleware) so streamed responses are not buffered. The route template
+    is read from the scope after routing; requests that matched no route share
+    one label, so ids and scanner paths can never grow the series count.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route_path = route_template(scope)
+            method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+            metrics.http_request_duration_seconds.observe(time.perf_counter() - started, method, route_path)
+            metrics.http_requests_total.inc(method, route_path, str(status_code))
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with the GitLab calls the request made and the local CPU time.
+
+    e.g. ``gitlab;dur=412.0;desc="9 calls", gitlab.get_issue;dur=380.2;desc="8 calls", cpu;dur=6.1, total;dur=431.7``
+    The header is built when the response starts, so calls made while a streamed body is being
+    sent (e.g. /export) are not included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_timing.start_request()
+        timing = request_timing.current_request()
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start" and timing is not None:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            request_timing.end_request(token)
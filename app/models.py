@@ -1,5 +1,9 @@
-from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional
+from pydantic import BaseModel, HttpUrl, Field, ConfigDict
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+# GitLab issue states accepted by the list filters
+IssueState = Literal["opened", "closed", "all"]
 
 # --- Objective Models ---
 class ObjectiveCreateRequest(BaseModel):
@@ -27,6 +31,9 @@ class KRCreateRequest(BaseModel):
     product_label: str
     responsaveis: List[str]
 
+class KRBatchCreateRequest(BaseModel):
+    krs: List[KRCreateRequest] = Field(..., min_length=1, max_length=100)
+
 class KRResponse(BaseModel):
     id: int # GitLab issue IID
     title: str
@@ -34,6 +41,71 @@ class KRResponse(BaseModel):
     web_url: HttpUrl
     objective_iid: int # IID of the linked objective
 
+class KRBatchResult(BaseModel):
+    objective_iid: int
+    kr_number: int
+    success: bool
+    kr: Optional[KRResponse] = None # Created KR when success is True
+    error: Optional[str] = None
+
+class KRBatchResponse(BaseModel):
+    results: List[KRBatchResult] # Same order as the request's krs
+
+class ObjectiveProgressResponse(BaseModel):
+    objective_iid: int
+    title: str
+    kr_count: int
+    meta_prevista: float # Average over the objective's KRs (percentage)
+    meta_realizada: float # Average over the objective's KRs (percentage)
+    progress_percent: float # Sum of meta realizada / sum of meta prevista, as a percentage
+
+class LabelSummary(BaseModel):
+    label: str # Team or product label
+    objective_count: int
+    kr_count: int
+    progress_percent: float # Sum of meta realizada / sum of meta prevista over the label's KRs
+    at_risk_kr_count: int
+    at_risk_kr_iids: List[int]
+
+class SearchResult(BaseModel):
+    iid: int
+    kind: str # "objective" or "kr"
+    title: str
+    web_url: HttpUrl
+    score: float
+    matched_fields: List[str] # Any of "title", "description", "activities"
+
+class SyncStatus(BaseModel):
+    running: bool # Background delta sync task alive
+    interval_seconds: float
+    watermark: Optional[datetime] = None # Issues updated before this are reflected locally
+    lag_seconds: Optional[float] = None # Age of the watermark: how stale local reads can be
+    last_success_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    last_changed_count: int = 0 # Issues applied by the last poll
+    total_changed_count: int = 0
+    mirrored_issue_count: int = 0
+    mirror_complete: bool = False
+
+class WebhookResult(BaseModel):
+    status: Literal["applied", "unchanged", "ignored"]
+    issue_iid: Optional[int] = None
+    detail: Optional[str] = None
+
+class LivenessResponse(BaseModel):
+    status: str = "alive"
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    project_loaded: bool = False
+    labels_loaded: bool = False
+    missing_labels: List[str] = Field(default_factory=list) # Configured OKR labels not found in the project
+    connection_pooled: bool = False
+    gitlab_rtt_ms: Optional[float] = None # Last measured GitLab round trip
+    max_gitlab_rtt_ms: Optional[float] = None # Readiness fails above this (None: no limit)
+    gitlab_circuit: str = "closed" # GitLab circuit breaker: closed, half_open or open
+    detail: Optional[str] = None # Why the instance is not ready
+
 class KRDescriptionUpdateRequest(BaseModel):
     description: str
 
@@ -52,9 +124,24 @@ class Activity(BaseModel):
     progress_planned_percent: int = Field(..., ge=0, le=100)
     progress_achieved_percent: int = Field(default=0, ge=0, le=100)
 
+class KRActivity(Activity):
+    kr_iid: int # KR whose activities table holds this row
+
 class ActivityCreateRequest(BaseModel):
     activities: List[Activity]
 
+class ActivityBulkCreateRequest(BaseModel):
+    activities_by_kr: Dict[int, List[Activity]] # kr_iid -> activities to append to that KR
+
+class ActivityBulkResult(BaseModel):
+    kr_iid: int
+    success: bool
+    description: Optional[str] = None # Updated KR description when success is True
+    error: Optional[str] = None
+
+class ActivityBulkResponse(BaseModel):
+    results: List[ActivityBulkResult]
+
 # --- General Utility Models ---
 class DescriptionResponse(BaseModel):
     description: str
@@ -64,6 +151,22 @@ class User(BaseModel):
     username: str # Or user_id: str, or sub: str, depending on what's in the token
     # Add other fields as needed later, e.g., email, full_name, disabled, roles etc.
 
+# --- GitLab Issue Model (internal representation returned by GitlabService) ---
+class GitlabIssue(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    iid: int
+    title: str
+    description: Optional[str] = None
+    web_url: str
+    labels: List[str] = Field(default_factory=list)
+    state: Optional[str] = None
+    updated_at: Optional[str] = None
+
+class GitlabIssuePage(BaseModel):
+    issues: List[GitlabIssue]
+    next_cursor: Optional[str] = None # Opaque cursor for the next page; None on the last page
+
 # --- GitlabConfig Model (Originally planned here, can also be in config.py if only used there) ---
 # For now, keeping it here as it defines a data structure.
 # If it were BaseSettings, it would definitely be in config.py.
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Path
-from typing import List # Ensure List is imported (though not used in response_model here directly for POST)
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Response
+from typing import List, Optional # Ensure List is imported (though not used in response_model here directly for POST)
+from datetime import date
 from app.services.activity_service import activity_service, ActivityService
-from app.models import Activity, ActivityCreateRequest, DescriptionResponse, User # Added User
+from app.services.kr_query_service import kr_query_service, KRQueryService
+from app.models import Activity, KRActivity, ActivityCreateRequest, ActivityBulkCreateRequest, ActivityBulkResponse, DescriptionResponse, User # Added User
 from app.security import get_current_active_user # Added for authentication
+from app.routers.pagination import set_total_header
 
 async def get_current_activity_service() -> ActivityService:
     return activity_service
 
+async def get_current_kr_query_service() -> KRQueryService:
+    return kr_query_service
+
 router = APIRouter(
     # prefix="/activities", # Defined in main.py
     # tags=["Activities"], # Defined in main.py
@@ -21,30 +27,69 @@ async def add_activities_to_key_result_description(
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        updated_description = service.add_activities_to_kr_description(kr_iid, activity_data.activities)
+        updated_description = await service.add_activities_to_kr_description(kr_iid, activity_data.activities)
         return DescriptionResponse(description=updated_description)
     except ValueError as ve:
         raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add activities to KR {kr_iid}: {str(e)}")
 
-# The GET endpoint for activities is removed as the service layer
-# (ActivityService.get_activities_for_kr) that parses activities from
-# the Markdown table was commented out due to complexity.
-# If parsing from table is re-implemented in service, this can be re-added.
+@router.post("/bulk", response_model=ActivityBulkResponse, status_code=200)
+async def add_activities_to_many_key_results(
+    bulk_data: ActivityBulkCreateRequest,
+    response: Response,
+    service: ActivityService = Depends(get_current_activity_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # 200 when every KR was updated, 207 (Multi-Status) when some failed; see each result.
+    try:
+        results = await service.add_activities_bulk(bulk_data.activities_by_kr)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to add activities in bulk: {str(e)}")
+    if any(not result.success for result in results):
+        response.status_code = 207
+    return ActivityBulkResponse(results=results)
 
-# @router.get("/kr/{kr_iid}", response_model=List[Activity])
-# async def get_activities_for_key_result(
-#     kr_iid: int = Path(..., title="The IID of the Key Result to retrieve activities from"),
-#     service: ActivityService = Depends(get_current_activity_service)
-# ):
-#     # Get all activities for a specific Key Result (KR).
-#     # Activities are parsed from the KR's description.
-#     try:
-#         activities = service.get_activities_for_kr(kr_iid) # This service method is currently not functional
-#         return activities
-#     except ValueError as ve:
-#         raise HTTPException(status_code=404, detail=str(ve))
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=f"Failed to retrieve activities for KR {kr_iid}: {str(e)}")
+@router.get("/kr/{kr_iid}", response_model=List[Activity])
+async def get_activities_for_key_result(
+    response: Response,
+    kr_iid: int = Path(..., title="The IID of the Key Result to retrieve activities from"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    service: ActivityService = Depends(get_current_activity_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Activities are parsed from the table in the KR's description; X-Total carries the full count.
+    try:
+        activities, total = await service.get_activities_for_kr(kr_iid, offset=offset, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=404, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve activities for KR {kr_iid}: {str(e)}")
+    set_total_header(response, total)
+    return activities
 
+@router.get("/filter", response_model=List[KRActivity])
+async def filter_activities(
+    response: Response,
+    deadline_after: Optional[date] = Query(None, description="Prazo Previsto after this date"),
+    deadline_before: Optional[date] = Query(None, description="Prazo Previsto before this date"),
+    progress_achieved_max: Optional[int] = Query(None, ge=0, le=100, description="% Realizado at most this value"),
+    overdue: bool = Query(False, description="Prazo Previsto already passed and % Realizado below 100"),
+    kr_iid: Optional[int] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    service: KRQueryService = Depends(get_current_kr_query_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Answered from in-memory indexes over the activities tables; X-Total carries the full count.
+    try:
+        activities, total = await service.filter_activities(
+            deadline_after=deadline_after, deadline_before=deadline_before,
+            progress_achieved_max=progress_achieved_max, overdue=overdue,
+            kr_iid=kr_iid, offset=offset, limit=limit,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to filter activities: {str(e)}")
+    set_total_header(response, total)
+    return activities
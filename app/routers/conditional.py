@@ -0,0 +1,11 @@
+from fastapi import Response
+
+# Responses are per-user (bearer token) and must be revalidated on every use.
+CACHE_CONTROL = "private, no-cache"
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.services.export_service import export_service, ExportService
+from app.models import User
+from app.security import get_current_active_user
+
+async def get_current_export_service() -> ExportService:
+    return export_service
+
+router = APIRouter(
+    # prefix="/export", # Defined in main.py
+    # tags=["Export"], # Defined in main.py
+)
+
+@router.get("/okrs.ndjson", response_class=StreamingResponse)
+async def export_okrs_ndjson(
+    service: ExportService = Depends(get_current_export_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Streams every objective and KR as newline-delimited JSON ({"type": "objective"|"kr", ...}).
+    # Errors after the first line can no longer change the status code; the stream is cut instead.
+    return StreamingResponse(service.iter_okrs_ndjson(), media_type="application/x-ndjson")
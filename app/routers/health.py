@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Response, status
+from app.services.health_service import health_service, HealthService
+from app.models import LivenessResponse, ReadinessResponse
+
+async def get_current_health_service() -> HealthService:
+    return health_service
+
+router = APIRouter(
+    # prefix="/health", # Defined in main.py
+    # tags=["Health"], # Defined in main.py
+)
+
+# Probes are called by the orchestrator, so they do not require a JWT.
+
+@router.get("/live", response_model=LivenessResponse)
+async def live(service: HealthService = Depends(get_current_health_service)):
+    # The process is up and serving; never calls GitLab.
+    return service.liveness()
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready(response: Response, service: HealthService = Depends(get_current_health_service)):
+    # 503 until the prewarm finished, and whenever GitLab is unreachable or slower than the limit.
+    # Answered from the state the background checks keep, so a probe never waits on GitLab.
+    readiness = service.readiness()
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from datetime import datetime
+from typing import List, Optional
 from app.services.kr_service import kr_service, KRService # KRService for type hint
-from app.models import KRCreateRequest, KRResponse, KRUpdateRequest, User # KRUpdateRequest is new here, Added User
+from app.services.kr_query_service import kr_query_service, KRQueryService
+from app.models import KRCreateRequest, KRBatchCreateRequest, KRBatchResponse, KRResponse, KRUpdateRequest, IssueState, User # KRUpdateRequest is new here, Added User
 from app.security import get_current_active_user # Added for authentication
+from app.routers.pagination import set_pagination_headers
+from app.routers.conditional import set_etag, not_modified
 
 async def get_current_kr_service() -> KRService:
     return kr_service
 
+async def get_current_kr_query_service() -> KRQueryService:
+    return kr_query_service
+
 router = APIRouter(
     # prefix="/krs", # Defined in main.py
     # tags=["Key Results (KRs)"], # Defined in main.py
@@ -20,26 +27,68 @@ async def create_new_kr(
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        created_kr = service.create_kr(kr_data)
+        created_kr = await service.create_kr(kr_data)
         return created_kr
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create KR: {str(e)}")
 
+@router.post("/batch", response_model=KRBatchResponse, status_code=201)
+async def create_krs_in_batch(
+    batch_data: KRBatchCreateRequest,
+    response: Response,
+    service: KRService = Depends(get_current_kr_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # 201 when every KR was created, 207 (Multi-Status) when some failed; see each result.
+    try:
+        results = await service.create_krs_batch(batch_data.krs)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create KR batch: {str(e)}")
+    if any(not result.success for result in results):
+        response.status_code = 207
+    return KRBatchResponse(results=results)
+
+# Declared before /{kr_iid} so "filter" is not parsed as an IID.
+@router.get("/filter", response_model=List[KRResponse])
+async def filter_krs(
+    responsavel: Optional[str] = Query(None, description="Responsável name; accents and case are ignored"),
+    meta_prevista_min: Optional[int] = Query(None, ge=0, le=100),
+    meta_prevista_max: Optional[int] = Query(None, ge=0, le=100),
+    meta_realizada_min: Optional[int] = Query(None, ge=0, le=100),
+    meta_realizada_max: Optional[int] = Query(None, ge=0, le=100),
+    service: KRQueryService = Depends(get_current_kr_query_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Answered from in-memory indexes over the KR metadata; bounds are inclusive.
+    try:
+        return await service.filter_krs(
+            responsavel=responsavel,
+            meta_prevista_min=meta_prevista_min, meta_prevista_max=meta_prevista_max,
+            meta_realizada_min=meta_realizada_min, meta_realizada_max=meta_realizada_max,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to filter KRs: {str(e)}")
+
 @router.get("/{kr_iid}", response_model=KRResponse)
 async def get_specific_kr(
     kr_iid: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     service: KRService = Depends(get_current_kr_service),
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        kr = service.get_kr(kr_iid)
-        if not kr:
-            raise HTTPException(status_code=404, detail="KR not found")
+        etag, kr = await service.get_kr_conditional(kr_iid, if_none_match=if_none_match)
+        if kr is None:
+            return not_modified(etag)
+        set_etag(response, etag)
         return kr
-    except HTTPException:
-        raise
+    except ValueError:
+        raise HTTPException(status_code=404, detail="KR not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve KR: {str(e)}")
 
@@ -51,7 +100,7 @@ async def update_existing_kr(
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        updated_kr = service.update_kr(kr_iid=kr_iid, kr_data=kr_data)
+        updated_kr = await service.update_kr(kr_iid=kr_iid, kr_data=kr_data)
         if not updated_kr: # Should not happen if update_kr raises ValueError for not found
             raise HTTPException(status_code=404, detail="KR not found after update attempt")
         return updated_kr
@@ -64,22 +113,45 @@ async def update_existing_kr(
 @router.get("/objective/{objective_iid}", response_model=List[KRResponse])
 async def list_krs_for_objective(
     objective_iid: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     service: KRService = Depends(get_current_kr_service),
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        krs: List[KRResponse] = service.list_krs_for_objective(objective_iid) # Added type hint
+        etag, krs = await service.list_krs_for_objective_conditional(objective_iid, if_none_match=if_none_match)
+        if krs is None:
+            return not_modified(etag)
+        set_etag(response, etag)
         return krs
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list KRs for objective {objective_iid}: {str(e)}")
 
 @router.get("/", response_model=List[KRResponse])
 async def list_all_krs_with_label( # Function name implies filtering by label, service.list_all_krs() does this
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    team: Optional[str] = Query(None, description="Team label"),
+    product: Optional[str] = Query(None, description="Product label"),
+    state: Optional[IssueState] = Query(None),
+    updated_after: Optional[datetime] = Query(None, description="ISO 8601; only issues updated after this instant"),
+    if_none_match: Optional[str] = Header(None),
     service: KRService = Depends(get_current_kr_service),
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        krs: List[KRResponse] = service.list_all_krs() # Added type hint
+        etag, krs, next_cursor = await service.list_all_krs_conditional(
+            if_none_match=if_none_match, limit=limit, cursor=cursor,
+            team=team, product=product, state=state, updated_after=updated_after
+        )
+        if krs is None:
+            return not_modified(etag)
+        set_etag(response, etag)
+        set_pagination_headers(request, response, next_cursor)
         return krs
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list all KRs: {str(e)}")
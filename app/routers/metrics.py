@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services import metrics
+
+# Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(
+    # tags=["Metrics"], # Defined in main.py
+)
+
+# Scraped by Prometheus, so it does not require a JWT (restrict it at the network level if needed).
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Rendering only reads in-process counters; it never calls GitLab.
+    return PlainTextResponse(metrics.registry.render(), media_type=CONTENT_TYPE)
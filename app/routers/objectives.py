@@ -1,12 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List # Ensure List is imported
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from datetime import datetime
+from typing import List, Optional # Ensure List is imported
 from app.services.objective_service import objective_service, ObjectiveService
-from app.models import ObjectiveCreateRequest, ObjectiveResponse, User # New import for type hint
+from app.services.progress_service import progress_service, ProgressService
+from app.models import ObjectiveCreateRequest, ObjectiveResponse, ObjectiveProgressResponse, IssueState, User # New import for type hint
 from app.security import get_current_active_user # New import
+from app.routers.pagination import set_pagination_headers
+from app.routers.conditional import set_etag, not_modified
 
 async def get_current_objective_service() -> ObjectiveService:
     return objective_service
 
+async def get_current_progress_service() -> ProgressService:
+    return progress_service
+
 router = APIRouter(
     # prefix="/objectives", # Prefix is defined when including router in main.py
     # tags=["Objectives"], # Tags are defined when including router in main.py
@@ -22,34 +29,79 @@ async def create_new_objective(
     # The current_user object can be used here if needed, e.g., for logging or ownership
     # For now, its presence means the endpoint is protected.
     try:
-        created_objective = service.create_objective(objective_data)
+        created_objective = await service.create_objective(objective_data)
         return created_objective
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create objective: {str(e)}")
 
 @router.get("/", response_model=List[ObjectiveResponse])
 async def list_all_objectives(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    team: Optional[str] = Query(None, description="Team label"),
+    product: Optional[str] = Query(None, description="Product label"),
+    state: Optional[IssueState] = Query(None),
+    updated_after: Optional[datetime] = Query(None, description="ISO 8601; only issues updated after this instant"),
+    if_none_match: Optional[str] = Header(None),
     service: ObjectiveService = Depends(get_current_objective_service),
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        objectives: List[ObjectiveResponse] = service.list_objectives() # Added type hint
+        etag, objectives, next_cursor = await service.list_objectives_conditional(
+            if_none_match=if_none_match, limit=limit, cursor=cursor,
+            team=team, product=product, state=state, updated_after=updated_after
+        )
+        if objectives is None:
+            return not_modified(etag)
+        set_etag(response, etag)
+        set_pagination_headers(request, response, next_cursor)
         return objectives
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list objectives: {str(e)}")
 
+# Declared before /{objective_iid} so "progress" is not parsed as an IID.
+@router.get("/progress", response_model=List[ObjectiveProgressResponse])
+async def list_objectives_progress(
+    service: ProgressService = Depends(get_current_progress_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return await service.list_objectives_progress()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute objectives progress: {str(e)}")
+
+@router.get("/{objective_iid}/progress", response_model=ObjectiveProgressResponse)
+async def get_objective_progress(
+    objective_iid: int,
+    service: ProgressService = Depends(get_current_progress_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return await service.get_objective_progress(objective_iid)
+    except ValueError as ve:
+        raise HTTPException(status_code=404, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute objective progress: {str(e)}")
+
 @router.get("/{objective_iid}", response_model=ObjectiveResponse)
 async def get_specific_objective(
     objective_iid: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     service: ObjectiveService = Depends(get_current_objective_service),
     current_user: User = Depends(get_current_active_user) # Added dependency
 ):
     try:
-        objective = service.get_objective(objective_iid)
-        if not objective:
-            raise HTTPException(status_code=404, detail="Objective not found")
+        etag, objective = await service.get_objective_conditional(objective_iid, if_none_match=if_none_match)
+        if objective is None:
+            return not_modified(etag)
+        set_etag(response, etag)
         return objective
-    except HTTPException:
-        raise
+    except ValueError as ve:
+        raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve objective: {str(e)}")
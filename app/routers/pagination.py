@@ -0,0 +1,17 @@
+from typing import Optional
+from fastapi import Request, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_HEADER = "X-Total"
+
+def set_pagination_headers(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    # Same convention GitLab uses: the body stays a plain list and paging metadata goes in headers.
+    if not next_cursor:
+        return
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+def set_total_header(response: Response, total: int) -> None:
+    # Offset-paged lists report the full size the way GitLab does (X-Total).
+    response.headers[TOTAL_HEADER] = str(total)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Literal, Optional
+from app.services.search_service import search_service, SearchService
+from app.models import SearchResult, User
+from app.security import get_current_active_user
+
+async def get_current_search_service() -> SearchService:
+    return search_service
+
+router = APIRouter(
+    # prefix="/search", # Defined in main.py
+    # tags=["Search"], # Defined in main.py
+)
+
+@router.get("/", response_model=List[SearchResult])
+async def search_okrs(
+    q: str = Query(..., min_length=1, description="Keywords; accents and case are ignored, all words must match"),
+    kind: Optional[Literal["objective", "kr"]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    service: SearchService = Depends(get_current_search_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return await service.search(q, kind=kind, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
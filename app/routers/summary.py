@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from app.services.summary_service import summary_service, SummaryService
+from app.models import LabelSummary, User
+from app.security import get_current_active_user
+
+async def get_current_summary_service() -> SummaryService:
+    return summary_service
+
+router = APIRouter(
+    # prefix="/summary", # Defined in main.py
+    # tags=["Summary"], # Defined in main.py
+)
+
+@router.get("/", response_model=List[LabelSummary])
+async def get_label_summary(
+    labels: Optional[List[str]] = Query(None, description="Only these team/product labels"),
+    service: SummaryService = Depends(get_current_summary_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # One row per team/product label, read from the materialized view (no GitLab call once warm).
+    try:
+        return await service.get_summary(labels)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build summary: {str(e)}")
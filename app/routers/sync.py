@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from app.services.sync_service import sync_service, SyncService
+from app.models import SyncStatus, User
+from app.security import get_current_active_user
+
+async def get_current_sync_service() -> SyncService:
+    return sync_service
+
+router = APIRouter(
+    # prefix="/sync", # Defined in main.py
+    # tags=["Sync"], # Defined in main.py
+)
+
+@router.get("/status", response_model=SyncStatus)
+async def get_sync_status(
+    service: SyncService = Depends(get_current_sync_service),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Watermark and lag of the background delta sync (local state only, no GitLab call).
+    return service.status()
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, status
+from typing import Optional
+from app.services.webhook_service import webhook_service, WebhookService
+from app.models import WebhookResult
+
+async def get_current_webhook_service() -> WebhookService:
+    return webhook_service
+
+router = APIRouter(
+    # prefix="/webhooks", # Defined in main.py
+    # tags=["Webhooks"], # Defined in main.py
+)
+
+@router.post("/gitlab", response_model=WebhookResult)
+async def receive_gitlab_webhook(
+    request: Request,
+    x_gitlab_token: Optional[str] = Header(None),
+    x_gitlab_event: Optional[str] = Header(None),
+    service: WebhookService = Depends(get_current_webhook_service),
+):
+    # Called by GitLab, not by API users: authenticated by the shared secret instead of a JWT.
+    if not service.enabled:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="GitLab webhook secret is not configured.")
+    if not service.verify_token(x_gitlab_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid X-Gitlab-Token.")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid JSON.")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON object.")
+    try:
+        # Other events are acknowledged (200) so GitLab does not disable the hook.
+        return await service.handle_event(x_gitlab_event, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -3,7 +3,6 @@ from typing import Optional, Dict
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt # type: ignore # jose is not fully typed, ignore for mypy if needed
 from pydantic import BaseModel
 
 from app.config import settings # To access SECRET_KEY, ALGORITHM, etc.
@@ -30,6 +29,7 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt # type: ignore # Imported on first use: keeps python-jose off the worker's import path
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -40,6 +40,7 @@ async def get_current_user_payload(token: str = Depends(oauth2_scheme)) -> Dict:
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError, jwt # type: ignore # Imported on first use, like in create_access_token
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: Optional[str] = payload.get("sub") # Assuming subject ('sub') stores the username
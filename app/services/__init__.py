@@ -1,12 +1,36 @@
 # This file makes 'services' a Python package
 from .gitlab_service import GitlabService, gitlab_service
+from .link_index import LinkIndex, link_index
+from .progress_index import ProgressIndex, progress_index
+from .okr_mirror import OKRMirror, okr_mirror
 from .objective_service import ObjectiveService, objective_service
 from .kr_service import KRService, kr_service
 from .activity_service import ActivityService, activity_service
+from .export_service import ExportService, export_service
+from .progress_service import ProgressService, progress_service
+from .summary_service import SummaryService, summary_service
+from .search_service import SearchService, search_service
+from .kr_query_service import KRQueryService, kr_query_service
+from .snapshot_service import SnapshotService, snapshot_service
+from .sync_service import SyncService, sync_service
+from .webhook_service import WebhookService, webhook_service
+from .health_service import HealthService, health_service
 
 __all__ = [
     'GitlabService', 'gitlab_service',
+    'LinkIndex', 'link_index',
+    'ProgressIndex', 'progress_index',
+    'OKRMirror', 'okr_mirror',
     'ObjectiveService', 'objective_service',
     'KRService', 'kr_service',
     'ActivityService', 'activity_service',
+    'ExportService', 'export_service',
+    'ProgressService', 'progress_service',
+    'SummaryService', 'summary_service',
+    'SearchService', 'search_service',
+    'KRQueryService', 'kr_query_service',
+    'SnapshotService', 'snapshot_service',
+    'SyncService', 'sync_service',
+    'WebhookService', 'webhook_service',
+    'HealthService', 'health_service',
 ]
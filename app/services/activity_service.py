@@ -1,53 +1,90 @@
 # import re # Not used currently
-from typing import List # Ensure List is imported
+import asyncio
+import hashlib
+import gitlab # For gitlab.exceptions
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple # Ensure List is imported
 from app.services import gitlab_service
-from app.models import Activity
+from app.models import Activity, ActivityBulkResult
+from app.config import settings
+from app.services.write_coalescer import WriteCoalescer
+from app.services import metrics
+from app.services.rate_limiter import bulk_priority
+from app.services.kr_document import append_activity_rows, format_activity_row, iter_activities
 
 class ActivityService:
     def __init__(self):
         self.gitlab_service = gitlab_service
+        # Appends to the same KR within the window become one read-modify-write and one update_issue.
+        self._append_coalescer: WriteCoalescer[List[Activity], str] = WriteCoalescer(
+            self._apply_activity_appends, window_seconds=settings.activity_coalesce_window_seconds
+        )
+        # kr_iid -> (description digest, parsed activities); LRU-bounded. A new digest replaces the entry.
+        self._parsed_activities: "OrderedDict[int, Tuple[str, Tuple[Activity, ...]]]" = OrderedDict()
+        self.activity_cache_max_size = settings.activity_cache_max_size
+        self.activity_cache_hits = 0
+        self.activity_cache_misses = 0
 
     def _serialize_activity_to_table_row(self, activity: Activity) -> str:
-        project_action = activity.project_action_activity or ""
-        stakeholders = activity.stakeholders or ""
-        deadline_planned = activity.deadline_planned or ""
-        deadline_achieved = activity.deadline_achieved or ""
-        progress_planned = f"{activity.progress_planned_percent}%"
-        progress_achieved = f"{activity.progress_achieved_percent}%"
-
-        return (
-            f"| {project_action} | {stakeholders} | {deadline_planned} | "
-            f"{deadline_achieved} | {progress_planned} | {progress_achieved} |"
-        )
+        return format_activity_row(activity)
+
+    def activity_cache_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._parsed_activities),
+            "max_size": self.activity_cache_max_size,
+            "hits": self.activity_cache_hits,
+            "misses": self.activity_cache_misses,
+        }
+
+    def _activities_from_description(self, kr_iid: int, description: str) -> Tuple[Activity, ...]:
+        digest = hashlib.sha1(description.encode("utf-8")).hexdigest()
+        cached = self._parsed_activities.get(kr_iid)
+        if cached is not None and cached[0] == digest:
+            self._parsed_activities.move_to_end(kr_iid)
+            self.activity_cache_hits += 1
+            return cached[1]
+
+        self.activity_cache_misses += 1
+        activities = tuple(iter_activities(description))
+        if self.activity_cache_max_size > 0:
+            self._parsed_activities[kr_iid] = (digest, activities)
+            self._parsed_activities.move_to_end(kr_iid)
+            while len(self._parsed_activities) > self.activity_cache_max_size:
+                self._parsed_activities.popitem(last=False)
+        return activities
+
+    async def get_activities_for_kr(self, kr_iid: int, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Activity], int]:
+        # Returns the requested slice of the KR's activity table and the total number of activities.
+        try:
+            kr_issue = await self.gitlab_service.get_issue(kr_iid)
+        except gitlab.exceptions.GitlabGetError:
+            raise ValueError(f"KR with IID {kr_iid} not found.")
+
+        activities = self._activities_from_description(kr_iid, kr_issue.description or "")
+        end = None if limit is None else offset + limit
+        return list(activities[offset:end]), len(activities)
+
+    async def add_activities_to_kr_description(self, kr_iid: int, new_activities: List[Activity]) -> str:
+        # Returns the KR description after the coalesced write that included these activities.
+        return await self._append_coalescer.submit(kr_iid, list(new_activities))
 
-    def add_activities_to_kr_description(self, kr_iid: int, new_activities: List[Activity]) -> str:
+    async def _apply_activity_appends(self, kr_iid: int, activity_batches: List[List[Activity]]) -> str:
+        new_activities = [activity for batch in activity_batches for activity in batch]
         try:
-            kr_issue = self.gitlab_service.get_issue(kr_iid)
+            kr_issue = await self.gitlab_service.get_issue(kr_iid, fresh=True) # Base of the rewrite, never cached
             current_description = kr_issue.description or ""
 
             activity_rows_to_add: List[str] = [] # Type hint for clarity
             for act in new_activities:
                 activity_rows_to_add.append(self._serialize_activity_to_table_row(act))
 
-            new_rows_string = "\n".join(activity_rows_to_add)
-
-            # Logic for adding new rows, including table header if description was empty
-            # and new activities are being added.
-            if not current_description.strip(): # Description is empty or only whitespace
-                if new_rows_string: # Only add header if there are new rows to add
-                    table_header = (
-                        "| Projetos/Ações/Atividades | Partes interessadas | Prazo Previsto | Prazo Realizado | % Previsto | % Realizado |\n"
-                        "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
-                    )
-                    updated_description = table_header + "\n" + new_rows_string
-                else: # No current description and no new activities
-                    updated_description = "" # Keep it empty
-            else: # Description has content
-                updated_description = current_description.rstrip() + "\n" + new_rows_string
+            # The table is the last block of a KR description, so new rows go at the end;
+            # an empty description gets the table header first.
+            updated_description = append_activity_rows(current_description, activity_rows_to_add)
 
             # Only update if there was a change (though update_issue might be idempotent)
             if updated_description != (kr_issue.description or ""):
-                 self.gitlab_service.update_issue(
+                await self.gitlab_service.update_issue(
                     issue_iid=kr_iid,
                     description=updated_description
                 )
@@ -59,4 +96,25 @@ class ActivityService:
             # print(f"Error adding activities to KR {kr_iid}: {e}")
             raise # Re-raise for the router to handle
 
+    async def add_activities_bulk(self, activities_by_kr: Dict[int, List[Activity]]) -> List[ActivityBulkResult]:
+        # Each KR is an independent get-modify-put; run them concurrently with a bounded fan-out
+        # and report every KR's outcome instead of failing the whole import on the first error.
+        semaphore = asyncio.Semaphore(settings.gitlab_bulk_concurrency)
+
+        async def add_to_kr(kr_iid: int, activities: List[Activity]) -> ActivityBulkResult:
+            async with semaphore:
+                try:
+                    description = await self.add_activities_to_kr_description(kr_iid, activities)
+                    return ActivityBulkResult(kr_iid=kr_iid, success=True, description=description)
+                except gitlab.exceptions.GitlabGetError as e:
+                    # Only a 404 means the KR is missing; 5xx/429 that outlived the retries are reported as they are.
+                    error = f"KR with IID {kr_iid} not found." if e.response_code == 404 else str(e)
+                    return ActivityBulkResult(kr_iid=kr_iid, success=False, error=error)
+                except Exception as e:
+                    return ActivityBulkResult(kr_iid=kr_iid, success=False, error=str(e))
+
+        with bulk_priority(): # The tasks inherit it, so the import yields to interactive reads
+            return list(await asyncio.gather(*(add_to_kr(kr_iid, activities) for kr_iid, activities in activities_by_kr.items())))
+
 activity_service = ActivityService()
+metrics.register_cache("parsed_activities", activity_service.activity_cache_stats)
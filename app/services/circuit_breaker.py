@@ -0,0 +1,96 @@
+import time
+from typing import Callable, Dict, Optional, Union
+
+import gitlab # For gitlab.exceptions
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+CIRCUIT_STATES = (CLOSED, HALF_OPEN, OPEN)
+
+class CircuitOpenError(gitlab.exceptions.GitlabError):
+    """Raised without calling GitLab while the circuit is open."""
+
+    def __init__(self, retry_in_seconds: float):
+        super().__init__(
+            error_message=f"GitLab is unavailable (circuit open); retry in {retry_in_seconds:.0f}s",
+            response_code=503,
+        )
+        self.retry_in_seconds = retry_in_seconds
+
+class CircuitBreaker:
+    """Fails GitLab calls fast after repeated upstream failures, instead of letting each wait for a timeout.
+
+    Closed: calls go through; ``failure_threshold`` consecutive failures (network errors, timeouts,
+    5xx) open it. Open: calls raise CircuitOpenError until ``recovery_seconds`` have passed.
+    Half-open: one probe call at a time goes through; success closes the circuit, failure opens it
+    again. A probe that never reports back (cancelled request) is replaced after ``recovery_seconds``.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._clock = clock
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+        self.open_count = 0
+        self.rejected_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.recovery_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not reach GitLab."""
+        if not self.enabled or self._state == CLOSED:
+            return
+        now = self._clock()
+        if self._state == OPEN:
+            retry_in = self.recovery_seconds - (now - self._opened_at)
+            if retry_in > 0:
+                self.rejected_count += 1
+                raise CircuitOpenError(retry_in)
+            self._state = HALF_OPEN
+            self._probe_started_at = None
+        if self._probe_started_at is not None and now - self._probe_started_at < self.recovery_seconds:
+            self.rejected_count += 1
+            raise CircuitOpenError(self.recovery_seconds - (now - self._probe_started_at))
+        self._probe_started_at = now
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        self._consecutive_failures += 1
+        if self._state == OPEN:
+            return # Calls already in flight when it opened; the recovery time is not extended
+        if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self.open_count += 1
+            self._state = OPEN
+            self._opened_at = self._clock()
+            self._probe_started_at = None
+
+    def status(self) -> Dict[str, Union[str, int, float, None]]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "retry_in_seconds": (
+                max(self.recovery_seconds - (self._clock() - self._opened_at), 0.0) if state == OPEN else None
+            ),
+            "open_count": self.open_count,
+            "rejected_count": self.rejected_count,
+        }
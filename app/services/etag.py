@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any, Iterable, Optional
+
+from app.models import GitlabIssue
+
+def _issue_version(issue: GitlabIssue) -> str:
+    # GitLab bumps updated_at on every change to the issue; fall back to the content itself
+    # for payloads that do not carry it.
+    if issue.updated_at:
+        return issue.updated_at
+    content = f"{issue.title}\x00{issue.description or ''}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def _quote(digest: str) -> str:
+    return f'"{digest}"'
+
+def issue_etag(kind: str, issue: GitlabIssue, *extra: Any) -> str:
+    """Strong ETag for a single issue representation (kind distinguishes objective/kr views)."""
+    parts = [kind, str(issue.iid), _issue_version(issue), *(str(value) for value in extra)]
+    return _quote(hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest())
+
+def list_etag(kind: str, issues: Iterable[GitlabIssue], *extra: Any) -> str:
+    """Strong ETag for a list: changes when any member, the membership or the order changes."""
+    digest = hashlib.sha1(kind.encode("utf-8"))
+    for issue in issues:
+        digest.update(f"|{issue.iid}:{_issue_version(issue)}".encode("utf-8"))
+    for value in extra:
+        digest.update(f"|{value}".encode("utf-8"))
+    return _quote(digest.hexdigest())
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
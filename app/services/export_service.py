@@ -0,0 +1,29 @@
+import json
+from typing import AsyncIterator, Dict, Any
+from pydantic import BaseModel
+from app.services.gitlab_service import gitlab_service
+from app.services.objective_service import objective_service
+from app.services.kr_service import kr_service
+
+class ExportService:
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.objective_service = objective_service
+        self.kr_service = kr_service
+
+    @staticmethod
+    def _to_ndjson_line(record_type: str, record: BaseModel) -> str:
+        payload: Dict[str, Any] = {"type": record_type, **record.model_dump(mode="json")}
+        return json.dumps(payload, ensure_ascii=False) + "\n"
+
+    async def iter_okrs_ndjson(self) -> AsyncIterator[str]:
+        # One line per issue, emitted as each GitLab page arrives. remember=False keeps a full
+        # export from flushing the hot entries out of the issue cache.
+        async for issue in self.gitlab_service.iter_issues(labels=self.objective_service.objective_labels, remember=False):
+            yield self._to_ndjson_line("objective", self.objective_service._map_issue_to_objective_response(issue))
+
+        async for issue in self.gitlab_service.iter_issues(labels=self.kr_service.kr_labels, remember=False):
+            objective_iid = self.kr_service.link_index.objective_for(issue.iid)
+            yield self._to_ndjson_line("kr", self.kr_service._map_issue_to_kr_response(issue, objective_iid))
+
+export_service = ExportService()
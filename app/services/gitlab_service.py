@@ -1,120 +1,453 @@
-import gitlab
-from gitlab.v4.objects import ProjectIssue, ProjectIssueLink, Project
+import asyncio
+import base64
+import logging
+import gitlab # For gitlab.exceptions (same error types the services already handle)
+import httpx
+import random
+import time
+from datetime import datetime
+from urllib.parse import quote, urlencode, urlsplit, parse_qs
 from app.config import settings
-from typing import List, Optional, Dict, Any # Updated import
+from app.models import GitlabIssue, GitlabIssuePage
+from app.services.issue_cache import IssueCache
+from app.services import metrics, request_timing
+from app.services.rate_limiter import GitlabRateLimiter, current_priority
+from app.services.circuit_breaker import CIRCUIT_STATES, CircuitBreaker
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Type
+
+logger = logging.getLogger(__name__)
+
+IssueListener = Callable[[GitlabIssue], None]
+
+# The only parameters a pagination cursor may carry; filters are rebuilt from each request.
+CURSOR_KEYS = ('cursor', 'page', 'id_after', 'per_page')
+MAX_PER_PAGE = 100
+
+# Upstream failures worth another try (and counted by the circuit breaker); other errors are final.
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+UPSTREAM_FAILURE_STATUS_CODES = frozenset({500, 502, 503, 504})
 
 class GitlabService:
     def __init__(self):
+        # The HTTP client is created lazily so that importing this module makes no network calls.
+        self._client: Optional[httpx.AsyncClient] = None
+        self._project: Optional[Dict[str, Any]] = None
+        self._project_path: str = quote(str(settings.gitlab_project_id), safe="")
+        self._keyset_supported: bool = settings.gitlab_keyset_pagination
+        self.issue_cache = IssueCache(
+            max_size=settings.issue_cache_max_size, ttl_seconds=settings.issue_cache_ttl_seconds
+        )
+        self._issue_listeners: List[IssueListener] = []
+        # One bucket per service, so every coroutine of the worker shares the token's rate limit.
+        self.rate_limiter = GitlabRateLimiter(
+            rate_per_second=settings.gitlab_rate_limit_per_second,
+            burst=settings.gitlab_rate_limit_burst,
+            headroom=settings.gitlab_rate_limit_headroom,
+            bulk_reserve=settings.gitlab_rate_limit_bulk_reserve,
+        )
+        self.rate_limit_max_retries = settings.gitlab_rate_limit_max_retries
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.gitlab_circuit_failure_threshold,
+            recovery_seconds=settings.gitlab_circuit_recovery_seconds,
+        )
+        self.retry_attempts = settings.gitlab_retry_attempts
+        self.retry_backoff_seconds = settings.gitlab_retry_backoff_seconds
+        self.retry_backoff_max_seconds = settings.gitlab_retry_backoff_max_seconds
+        self.retry_deadline_seconds = settings.gitlab_retry_deadline_seconds
+
+    # --- HTTP plumbing ---
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=f"{settings.gitlab_api_url.rstrip('/')}/api/v4",
+                headers={"PRIVATE-TOKEN": settings.gitlab_access_token},
+                verify=settings.gitlab_ssl_verify,
+                timeout=httpx.Timeout(
+                    settings.gitlab_timeout_seconds,
+                    connect=settings.gitlab_connect_timeout_seconds,
+                    pool=settings.gitlab_pool_timeout_seconds,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.gitlab_max_connections,
+                    max_keepalive_connections=settings.gitlab_max_keepalive_connections,
+                    keepalive_expiry=settings.gitlab_keepalive_expiry_seconds,
+                ),
+            )
+        return self._client
+
+    @property
+    def circuit_state(self) -> str:
+        return self.circuit_breaker.state
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
         try:
-            self.gl = gitlab.Gitlab(settings.gitlab_api_url, private_token=settings.gitlab_access_token, ssl_verify=False)
-            self.gl.auth()
-        except gitlab.exceptions.GitlabAuthenticationError as e:
-            raise
-        except Exception as e:
-            raise
-        self._project: Optional[Project] = None
+            body = response.json()
+        except ValueError:
+            return response.text
+        if isinstance(body, dict):
+            return str(body.get("message") or body.get("error") or body)
+        return str(body)
 
-    def get_project(self) -> Project:
-        if self._project is None:
+    def _retry_delay(self, retry: int, deadline: float) -> Optional[float]:
+        """Full-jitter backoff before retry number ``retry`` (1-based), or None if no retry is left."""
+        if retry > self.retry_attempts:
+            return None
+        delay = random.uniform(0, min(self.retry_backoff_max_seconds, self.retry_backoff_seconds * 2 ** (retry - 1)))
+        if time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    async def _request(self, method: str, url: str, error_cls: Type[gitlab.exceptions.GitlabError],
+                       params: Optional[Dict[str, Any]] = None, json: Optional[Dict[str, Any]] = None,
+                       retry: bool = True) -> httpx.Response:
+        priority = current_priority()
+        # Only reads are retried: a failed write may or may not have been applied upstream.
+        retryable = retry and method == "GET"
+        deadline = time.monotonic() + self.retry_deadline_seconds
+        retries = 0
+        rate_limited = 0
+        while True:
+            self.circuit_breaker.before_call() # Raises CircuitOpenError while GitLab is known to be down
+            waited = await self.rate_limiter.acquire(priority)
+            if waited:
+                metrics.gitlab_rate_limit_wait_seconds_total.inc(metrics.PRIORITY_NAMES[priority], amount=waited)
+            started = time.perf_counter()
             try:
-                self._project = self.gl.projects.get(settings.gitlab_project_id)
-            except gitlab.exceptions.GitlabGetError as e:
-                raise
-            except Exception as e:
-                raise
-        # Re-instated explicit check as per setup script for this subtask
+                response = await self._get_client().request(method, url, params=params, json=json)
+            except httpx.HTTPError as e:
+                metrics.gitlab_http_requests_total.inc(method, "error")
+                if not isinstance(e, httpx.TransportError): # Connection errors and timeouts
+                    raise
+                self.circuit_breaker.record_failure()
+                delay = self._retry_delay(retries + 1, deadline) if retryable else None
+                if delay is None:
+                    raise
+                retries += 1
+                logger.warning("GitLab request failed (%s %s: %s); retry %s in %.2fs", method, url, type(e).__name__, retries, delay)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                request_timing.record_upstream(time.perf_counter() - started)
+            metrics.gitlab_http_requests_total.inc(method, str(response.status_code))
+            self.rate_limiter.observe(response.status_code, response.headers)
+
+            if response.status_code in UPSTREAM_FAILURE_STATUS_CODES:
+                self.circuit_breaker.record_failure()
+                delay = self._retry_delay(retries + 1, deadline) if retryable and response.status_code in RETRYABLE_STATUS_CODES else None
+                if delay is not None:
+                    retries += 1
+                    logger.warning("GitLab answered %s (%s %s); retry %s in %.2fs", response.status_code, method, url, retries, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                break
+            self.circuit_breaker.record_success()
+            # A 429 was rejected before doing anything, so it is safe to repeat for any verb; the
+            # limiter now holds every caller until GitLab's Retry-After.
+            if response.status_code != 429 or not retry or rate_limited >= self.rate_limit_max_retries:
+                break
+            rate_limited += 1
+            logger.warning("GitLab rate limit hit (%s %s); retry %s of %s", method, url, rate_limited, self.rate_limit_max_retries)
+        if response.status_code == 401:
+            raise gitlab.exceptions.GitlabAuthenticationError(
+                error_message=self._error_message(response), response_code=401, response_body=response.content
+            )
+        if response.is_error:
+            raise error_cls(
+                error_message=self._error_message(response),
+                response_code=response.status_code,
+                response_body=response.content,
+            )
+        return response
+
+    def _issues_url(self, issue_iid: Optional[int] = None) -> str:
+        url = f"/projects/{self._project_path}/issues"
+        return url if issue_iid is None else f"{url}/{issue_iid}"
+
+    async def _iter_pages(self, url: str, params: Dict[str, Any],
+                          error_cls: Type[gitlab.exceptions.GitlabError]) -> AsyncIterator[List[Dict[str, Any]]]:
+        next_url: Optional[str] = url
+        next_params: Optional[Dict[str, Any]] = params
+        while next_url:
+            response = await self._request("GET", next_url, error_cls, params=next_params)
+            yield response.json()
+            # GitLab returns the next page as a full URL (query string included) in the Link header.
+            next_url = response.links.get("next", {}).get("url")
+            next_params = None
+
+    @staticmethod
+    def _encode_cursor(next_url: Optional[str]) -> Optional[str]:
+        # Only the pagination keys of GitLab's next link are kept: a cursor can neither redirect
+        # the client to another host or path nor carry filters.
+        if not next_url:
+            return None
+        params = parse_qs(urlsplit(next_url).query, keep_blank_values=True)
+        query = urlencode([(key, params[key][0]) for key in CURSOR_KEYS if key in params])
+        return base64.urlsafe_b64encode(query.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict[str, Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            query = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+            parsed = parse_qs(query, keep_blank_values=True, strict_parsing=True)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError("Invalid pagination cursor.") from e
+        # Anything else in a (crafted) cursor is ignored, so it cannot widen the listing past the OKR labels.
+        params: Dict[str, Any] = {key: parsed[key][0] for key in CURSOR_KEYS if key in parsed}
+        if not params.get('cursor') and not params.get('page'):
+            raise ValueError("Invalid pagination cursor.")
+        if 'per_page' in params:
+            try:
+                params['per_page'] = min(max(int(params['per_page']), 1), MAX_PER_PAGE)
+            except ValueError as e:
+                raise ValueError("Invalid pagination cursor.") from e
+        return params
+
+    @staticmethod
+    def _issue_list_params(labels: Optional[List[str]], state: Optional[str],
+                           updated_after: Optional[datetime]) -> Dict[str, Any]:
+        # Filters GitLab applies server-side, so only matching issues are paged and mapped.
+        params: Dict[str, Any] = {}
+        if labels:
+            params['labels'] = ",".join(labels)
+        if state:
+            params['state'] = state
+        if updated_after is not None:
+            params['updated_after'] = updated_after.isoformat()
+        return params
+
+    def add_issue_listener(self, listener: IssueListener) -> None:
+        """Registers a callback run for every issue read from or written to GitLab (derived views)."""
+        self._issue_listeners.append(listener)
+
+    def publish_issue(self, issue: GitlabIssue) -> None:
+        """Runs the issue listeners without touching the cache (snapshot restores, full scans)."""
+        for listener in self._issue_listeners:
+            try:
+                listener(issue)
+            except Exception:
+                # A broken derived view must not fail the request that fetched the issue.
+                logger.exception("Issue listener failed for issue %s", issue.iid)
+
+    def _remember(self, issue: GitlabIssue) -> GitlabIssue:
+        self.issue_cache.put(issue)
+        self.publish_issue(issue)
+        return issue
+
+    # --- Public API ---
+
+    @metrics.instrument_gitlab_call
+    async def auth(self) -> Dict[str, Any]:
+        response = await self._request("GET", "/user", gitlab.exceptions.GitlabAuthenticationError)
+        return response.json()
+
+    @metrics.instrument_gitlab_call
+    async def connect(self) -> Dict[str, Any]:
+        """Verifies the token and loads the project, opening the pooled connection.
+
+        Called from the app lifespan; constructing the service never touches the network.
+        """
+        await self.auth()
+        return await self.get_project()
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the pooled client is open (connections are kept alive between requests)."""
+        return self._client is not None and not self._client.is_closed
+
+    @metrics.instrument_gitlab_call
+    async def ping(self) -> Dict[str, Any]:
+        # Cheapest authenticated call: used to measure the GitLab round-trip time. A single attempt,
+        # so retries and their backoff never show up in the measurement.
+        response = await self._request("GET", "/version", gitlab.exceptions.GitlabGetError, retry=False)
+        return response.json()
+
+    @metrics.instrument_gitlab_call
+    async def list_labels(self) -> List[Dict[str, Any]]:
+        labels: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {'per_page': 100}
+        async for page in self._iter_pages(f"/projects/{self._project_path}/labels", params, gitlab.exceptions.GitlabListError):
+            labels.extend(page)
+        return labels
+
+    @metrics.instrument_gitlab_call
+    async def get_project(self) -> Dict[str, Any]:
+        if self._project is None:
+            response = await self._request("GET", f"/projects/{self._project_path}", gitlab.exceptions.GitlabGetError)
+            self._project = response.json()
         if self._project is None:
             raise Exception(f"GitLab project with ID {settings.gitlab_project_id} not found or failed to fetch.")
         return self._project
 
-    def create_issue(self, title: str, description: str, labels: Optional[List[str]] = None) -> ProjectIssue:
-        project = self.get_project()
+    @metrics.instrument_gitlab_call
+    async def create_issue(self, title: str, description: str, labels: Optional[List[str]] = None) -> GitlabIssue:
         issue_labels: List[str] = labels if labels is not None else []
-        try:
-            issue_data = {
-                'title': title,
-                'description': description,
-                'labels': issue_labels
-            }
-            issue = project.issues.create(issue_data)
-            return issue
-        except gitlab.exceptions.GitlabCreateError as e:
-            raise
-        except Exception as e:
-            raise
+        issue_data = {
+            'title': title,
+            'description': description,
+            'labels': ",".join(issue_labels)
+        }
+        response = await self._request("POST", self._issues_url(), gitlab.exceptions.GitlabCreateError, json=issue_data)
+        return self._remember(GitlabIssue.model_validate(response.json()))
 
-    def get_issue(self, issue_iid: int) -> ProjectIssue:
-        project = self.get_project()
-        try:
-            issue = project.issues.get(issue_iid)
-            return issue
-        except gitlab.exceptions.GitlabGetError as e:
-            raise
-        except Exception as e:
-            raise
+    @metrics.instrument_gitlab_call
+    async def get_issue(self, issue_iid: int, fresh: bool = False) -> GitlabIssue:
+        """Returns the issue, from the cache unless ``fresh``.
+
+        Read-modify-write paths must pass ``fresh=True``: a cached copy can miss edits made by
+        another worker or in the GitLab UI, and writing it back would silently undo them.
+        """
+        if not fresh:
+            cached = self.issue_cache.get(issue_iid)
+            if cached is not None:
+                return cached
+        response = await self._request("GET", self._issues_url(issue_iid), gitlab.exceptions.GitlabGetError)
+        return self._remember(GitlabIssue.model_validate(response.json()))
+
+    @metrics.instrument_gitlab_call
+    async def update_issue(self, issue_iid: int, title: Optional[str] = None, description: Optional[str] = None, labels: Optional[List[str]] = None) -> GitlabIssue:
+        changes: Dict[str, Any] = {}
+        if title is not None:
+            changes['title'] = title
+        if description is not None:
+            changes['description'] = description
+        if labels is not None:
+            changes['labels'] = ",".join(labels)
 
-    def update_issue(self, issue_iid: int, title: Optional[str] = None, description: Optional[str] = None, labels: Optional[List[str]] = None) -> ProjectIssue:
-        project = self.get_project()
+        if not changes:
+            return await self.get_issue(issue_iid)
+
+        # The PUT response already carries the updated issue, so no re-fetch is needed.
         try:
-            issue = project.issues.get(issue_iid)
-
-            made_changes = False
-            if title is not None:
-                issue.title = title
-                made_changes = True
-            if description is not None:
-                issue.description = description
-                made_changes = True
-            if labels is not None:
-                issue.labels = labels
-                made_changes = True
-
-            if not made_changes:
-                return issue
-
-            issue.save()
-
-            updated_issue = project.issues.get(issue_iid)
-            return updated_issue
-        except gitlab.exceptions.GitlabGetError as e:
-            raise
-        except gitlab.exceptions.GitlabUpdateError as e:
-            raise
-        except gitlab.exceptions.GitlabHttpError as e:
-            raise
-        except Exception as e:
+            response = await self._request("PUT", self._issues_url(issue_iid), gitlab.exceptions.GitlabUpdateError, json=changes)
+        except Exception:
+            # Errors and timeouts alike: the write may or may not have been applied upstream; drop the stale copy.
+            self.issue_cache.invalidate(issue_iid)
             raise
+        return self._remember(GitlabIssue.model_validate(response.json()))
 
-    def link_issues(self, source_issue_iid: int, target_issue_iid: int) -> ProjectIssueLink:
-        project = self.get_project()
+    @metrics.instrument_gitlab_call
+    async def link_issues(self, source_issue_iid: int, target_issue_iid: int) -> Dict[str, Any]:
+        project = await self.get_project()
         try:
-            source_issue = project.issues.get(source_issue_iid)
-            link = source_issue.links.create({
-                'target_project_id': project.id,
-                'target_issue_iid': target_issue_iid
-            })
-            return link
-        except gitlab.exceptions.GitlabGetError as e:
-            raise
-        except gitlab.exceptions.GitlabCreateError as e:
-            raise
-        except Exception as e:
-            raise
+            response = await self._request(
+                "POST",
+                f"{self._issues_url(source_issue_iid)}/links",
+                gitlab.exceptions.GitlabCreateError,
+                json={
+                    'target_project_id': project['id'],
+                    'target_issue_iid': target_issue_iid
+                },
+            )
+        finally:
+            # Linking bumps updated_at on both issues, so neither cached copy is current anymore.
+            self.issue_cache.invalidate(source_issue_iid)
+            self.issue_cache.invalidate(target_issue_iid)
+        return response.json()
+
+    @metrics.instrument_gitlab_call
+    async def list_issue_links(self, issue_iid: int) -> List[GitlabIssue]:
+        # GitLab returns the issues on the other side of each link (links are bidirectional).
+        project_id = (await self.get_project())["id"]
+        response = await self._request("GET", f"{self._issues_url(issue_iid)}/links", gitlab.exceptions.GitlabListError)
+        # Links can point to issues of other projects. Their iids are not ours: cached or indexed,
+        # they would overwrite the local issue with the same iid.
+        return [
+            self._remember(GitlabIssue.model_validate(item))
+            for item in response.json() if item.get("project_id") == project_id
+        ]
+
+    @metrics.instrument_gitlab_call
+    async def get_issues(self, issue_iids: List[int]) -> List[GitlabIssue]:
+        # Cached issues are served locally; the rest come back in one batched list call (iids[]).
+        found: Dict[int, GitlabIssue] = {}
+        missing: List[int] = []
+        for iid in dict.fromkeys(issue_iids):
+            cached = self.issue_cache.get(iid)
+            if cached is not None:
+                found[iid] = cached
+            else:
+                missing.append(iid)
+
+        if missing:
+            params: Dict[str, Any] = {'iids[]': missing, 'per_page': 100}
+            async for page in self._iter_pages(self._issues_url(), params, gitlab.exceptions.GitlabListError):
+                for item in page:
+                    issue = self._remember(GitlabIssue.model_validate(item))
+                    found[issue.iid] = issue
+
+        return [found[iid] for iid in issue_iids if iid in found]
+
+    @metrics.instrument_gitlab_call
+    async def list_issues_page(self, labels: Optional[List[str]] = None, limit: Optional[int] = None,
+                               cursor: Optional[str] = None, state: Optional[str] = None,
+                               updated_after: Optional[datetime] = None) -> GitlabIssuePage:
+        # Filters come from the current request every time; the cursor only says where the page starts.
+        page_params = self._decode_cursor(cursor) if cursor else {}
+        params = self._issue_list_params(labels, state, updated_after)
+        if self._keyset_supported and 'page' not in page_params:
+            params.update({'pagination': 'keyset', 'order_by': 'created_at', 'sort': 'desc'})
+        else:
+            page_params.pop('cursor', None)
+        params.update(page_params)
+        if limit is not None or 'per_page' not in params:
+            params['per_page'] = limit or settings.default_page_size
 
-    def list_issues(self, labels: Optional[List[str]] = None) -> List[ProjectIssue]:
-        project = self.get_project()
         try:
-            # Corrected type hint for params
-            params: Dict[str, Any] = {'all': True}
-            if labels:
-                params['labels'] = labels
-
-            issues_raw = project.issues.list(**params)
-            issues: List[ProjectIssue] = issues_raw
-            return issues
+            response = await self._request("GET", self._issues_url(), gitlab.exceptions.GitlabListError, params=params)
         except gitlab.exceptions.GitlabListError as e:
-            raise
-        except Exception as e:
-            raise
+            # Instances without keyset support for issues answer 400/405; fall back to offset pages.
+            if params.get('pagination') != 'keyset' or e.response_code not in (400, 405):
+                raise
+            self._keyset_supported = False
+            for key in ('pagination', 'order_by', 'sort', 'cursor'):
+                params.pop(key, None)
+            response = await self._request("GET", self._issues_url(), gitlab.exceptions.GitlabListError, params=params)
+
+        issues = [self._remember(GitlabIssue.model_validate(item)) for item in response.json()]
+        return GitlabIssuePage(issues=issues, next_cursor=self._encode_cursor(response.links.get("next", {}).get("url")))
+
+    @metrics.instrument_gitlab_call
+    async def iter_issues(self, labels: Optional[List[str]] = None, remember: bool = True, state: Optional[str] = None,
+                          updated_after: Optional[datetime] = None, order_by: Optional[str] = None) -> AsyncIterator[GitlabIssue]:
+        # Yields issues while later pages are still to be fetched: memory stays at one page.
+        params = self._issue_list_params(labels, state, updated_after)
+        params['per_page'] = 100
+        if order_by:
+            params.update({'order_by': order_by, 'sort': 'asc'})
+
+        async for page in self._iter_pages(self._issues_url(), params, gitlab.exceptions.GitlabListError):
+            for item in page:
+                issue = GitlabIssue.model_validate(item)
+                yield self._remember(issue) if remember else issue
+
+    @metrics.instrument_gitlab_call
+    async def list_issues(self, labels: Optional[List[str]] = None, state: Optional[str] = None,
+                          updated_after: Optional[datetime] = None) -> List[GitlabIssue]:
+        return [issue async for issue in self.iter_issues(labels=labels, state=state, updated_after=updated_after)]
 
 gitlab_service = GitlabService()
+metrics.register_cache("issue", gitlab_service.issue_cache.stats)
+metrics.registry.callback(
+    "okr_gitlab_rate_limit_per_second", "Current GitLab request rate allowed by the shared token bucket.", (),
+    lambda: [((), gitlab_service.rate_limiter.rate)],
+)
+metrics.registry.callback(
+    "okr_gitlab_circuit_state", "GitLab circuit breaker state (1 for the current one).", ("state",),
+    lambda: [((state,), int(gitlab_service.circuit_breaker.state == state)) for state in CIRCUIT_STATES],
+)
+metrics.registry.callback(
+    "okr_gitlab_circuit_opened_total", "Times the GitLab circuit breaker opened.", (),
+    lambda: [((), gitlab_service.circuit_breaker.open_count)], kind="counter",
+)
+metrics.registry.callback(
+    "okr_gitlab_circuit_rejected_total", "GitLab calls failed fast by the open circuit breaker.", (),
+    lambda: [((), gitlab_service.circuit_breaker.rejected_count)], kind="counter",
+)
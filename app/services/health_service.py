@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from app.services.gitlab_service import gitlab_service
+from app.models import LivenessResponse, ReadinessResponse
+from app.config import settings
+from app.services.circuit_breaker import OPEN
+
+logger = logging.getLogger(__name__)
+
+class HealthService:
+    """Liveness/readiness for the orchestrator, plus the startup prewarm readiness waits for.
+
+    The prewarm runs in the background from the lifespan, so the port opens at once. It loads the
+    project and the project labels and leaves a pooled connection open. The same task then pings
+    GitLab every ``rtt_check_interval_seconds``. The instance reports ready only after the prewarm,
+    and while the last measured round trip stays under the limit and the circuit is not open.
+    Probes only read that state: they never call GitLab themselves.
+    """
+
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.okr_labels: List[str] = list(dict.fromkeys(settings.gitlab_objective_labels + settings.gitlab_kr_labels))
+        self.max_rtt_ms = settings.health_max_gitlab_rtt_ms
+        self.rtt_check_interval_seconds = settings.health_rtt_check_interval_seconds
+        self.prewarm_retry_seconds = settings.health_prewarm_retry_seconds
+        self._project_loaded = False
+        self._labels_loaded = False
+        self._missing_labels: List[str] = []
+        self._rtt_ms: Optional[float] = None
+        self._rtt_measured_at: Optional[float] = None # time.monotonic()
+        self._error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_warm(self) -> bool:
+        return self._project_loaded and self._labels_loaded
+
+    async def prewarm(self) -> None:
+        await self.gitlab_service.connect() # Token check + project lookup, over the pooled client
+        self._project_loaded = True
+        names = {label.get("name") for label in await self.gitlab_service.list_labels()}
+        # GitLab creates missing labels on the first issue that uses them, so this is reported, not fatal.
+        self._missing_labels = [label for label in self.okr_labels if label not in names]
+        if self._missing_labels:
+            logger.warning("Configured OKR labels not found in the project: %s", self._missing_labels)
+        self._labels_loaded = True
+        await self._measure_rtt()
+        self._error = None
+
+    async def _prewarm_until_done(self) -> None:
+        while True:
+            try:
+                await self.prewarm()
+                return
+            except Exception as e:
+                self._error = f"Prewarm failed: {type(e).__name__}: {e}"
+                logger.warning("GitLab prewarm failed; retrying in %ss", self.prewarm_retry_seconds, exc_info=True)
+            await asyncio.sleep(self.prewarm_retry_seconds)
+
+    async def _run(self) -> None:
+        await self._prewarm_until_done()
+        if self.rtt_check_interval_seconds <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.rtt_check_interval_seconds)
+            await self._refresh_rtt()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _measure_rtt(self) -> float:
+        started = time.perf_counter()
+        await self.gitlab_service.ping()
+        self._rtt_ms = round((time.perf_counter() - started) * 1000, 2)
+        self._rtt_measured_at = time.monotonic()
+        return self._rtt_ms
+
+    async def _refresh_rtt(self) -> None:
+        try:
+            await self._measure_rtt()
+            self._error = None
+        except Exception as e:
+            self._rtt_ms = None
+            self._rtt_measured_at = time.monotonic()
+            self._error = f"GitLab ping failed: {type(e).__name__}: {e}"
+
+    def liveness(self) -> LivenessResponse:
+        return LivenessResponse()
+
+    def readiness(self) -> ReadinessResponse:
+        max_rtt_ms = self.max_rtt_ms if self.max_rtt_ms > 0 else None
+        connection_pooled = self.gitlab_service.is_connected
+        circuit_state = self.gitlab_service.circuit_state
+
+        if not self.is_warm:
+            detail = self._error or "GitLab prewarm has not finished"
+        elif circuit_state == OPEN:
+            detail = "GitLab circuit breaker is open"
+        elif self._rtt_ms is None:
+            detail = self._error or "GitLab round trip not measured"
+        elif max_rtt_ms is not None and self._rtt_ms > max_rtt_ms:
+            detail = f"GitLab round trip {self._rtt_ms} ms is above {max_rtt_ms} ms"
+        elif not connection_pooled:
+            detail = "No pooled GitLab connection"
+        else:
+            detail = None
+
+        return ReadinessResponse(
+            ready=detail is None,
+            project_loaded=self._project_loaded,
+            labels_loaded=self._labels_loaded,
+            missing_labels=self._missing_labels,
+            connection_pooled=connection_pooled,
+            gitlab_rtt_ms=self._rtt_ms,
+            max_gitlab_rtt_ms=max_rtt_ms,
+            gitlab_circuit=circuit_state,
+            detail=detail,
+        )
+
+health_service = HealthService()
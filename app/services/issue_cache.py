@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from app.models import GitlabIssue
+
+class IssueCache:
+    """In-process LRU cache of GitLab issues keyed by IID, with a TTL per entry."""
+
+    def __init__(self, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[int, Tuple[float, GitlabIssue]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, issue_iid: int) -> Optional[GitlabIssue]:
+        with self._lock:
+            entry = self._entries.get(issue_iid)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, issue = entry
+            if expires_at <= self._clock():
+                del self._entries[issue_iid]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(issue_iid)
+            self.hits += 1
+            return issue
+
+    def put(self, issue: GitlabIssue) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[issue.iid] = (self._clock() + self.ttl_seconds, issue)
+            self._entries.move_to_end(issue.iid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, issue_iid: int) -> None:
+        with self._lock:
+            self._entries.pop(issue_iid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,248 @@
+import calendar
+import re
+import unicodedata
+from datetime import date
+from typing import Iterator, List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from app.models import Activity
+
+# --- Format constants (the layout written by KRService._format_kr_description) ---
+DESCRIPTION_HEADING = "### Descrição"
+DESCRIPTION_PLACEHOLDER = "(Descrição não fornecida)"
+META_PREVISTA_LABEL = "**Meta prevista**:"
+META_REALIZADA_LABEL = "**Meta realizada**:"
+RESPONSAVEIS_LABEL = "**Responsável(eis)**:"
+ACTIVITIES_TABLE_HEADER = "| Projetos/Ações/Atividades | Partes interessadas | Prazo Previsto | Prazo Realizado | % Previsto | % Realizado |"
+ACTIVITIES_TABLE_SEPARATOR = "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
+DEFAULT_ACTIVITIES_TABLE = f"{ACTIVITIES_TABLE_HEADER}\n{ACTIVITIES_TABLE_SEPARATOR}"
+
+# Compiled once at import; the header regex only runs when the exact-case header is absent.
+_TABLE_HEADER_RE = re.compile(re.escape(ACTIVITIES_TABLE_HEADER), re.IGNORECASE)
+_PERCENT_RE = re.compile(r"\s*([\d.]+)\s*%")
+_BLANK_RUNS_RE = re.compile(r"\n{3,}")
+
+def _parse_percent(text: str) -> Optional[int]:
+    match = _PERCENT_RE.match(text)
+    if not match:
+        return None
+    try:
+        return int(float(match.group(1)))
+    except ValueError:
+        return None
+
+class KRDocument(BaseModel):
+    """Typed view of a KR issue description.
+
+    ``parse`` reads the metadata block in one pass over the lines before the activities table
+    and slices the table off untouched; ``to_markdown`` writes the same layout back.
+    """
+    description: str = "" # Unquoted KR description ("" when the placeholder is shown)
+    meta_prevista: int = 0
+    meta_realizada: int = 0
+    responsaveis: List[str] = Field(default_factory=list)
+    activities_table: str = DEFAULT_ACTIVITIES_TABLE # Header, separator and rows, verbatim
+
+    @classmethod
+    def parse(cls, text: Optional[str]) -> "KRDocument":
+        text = text or ""
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        # Exact match first: a plain find is far cheaper than the case-insensitive scan on long tables.
+        header_start = text.find(ACTIVITIES_TABLE_HEADER)
+        if header_start < 0:
+            header_match = _TABLE_HEADER_RE.search(text)
+            header_start = header_match.start() if header_match else -1
+        if header_start >= 0:
+            head, activities_table = text[:header_start], text[header_start:].strip()
+        else:
+            head, activities_table = text, DEFAULT_ACTIVITIES_TABLE
+
+        quoted_lines: List[str] = []
+        in_description = False
+        meta_prevista: Optional[int] = None
+        meta_realizada: Optional[int] = None
+        responsaveis_str: Optional[str] = None
+
+        for line in head.split("\n"):
+            if in_description:
+                if line.startswith("> "):
+                    quoted_lines.append(line)
+                    continue
+                if not quoted_lines and not line.strip():
+                    continue # Blank lines between the heading and the quote
+                in_description = False
+            if not quoted_lines and DESCRIPTION_HEADING in line:
+                in_description = True
+                continue
+            if meta_prevista is None and META_PREVISTA_LABEL in line:
+                meta_prevista = _parse_percent(line.split(META_PREVISTA_LABEL, 1)[1])
+            elif meta_realizada is None and META_REALIZADA_LABEL in line:
+                meta_realizada = _parse_percent(line.split(META_REALIZADA_LABEL, 1)[1])
+            elif responsaveis_str is None and RESPONSAVEIS_LABEL in line:
+                responsaveis_str = line.split(RESPONSAVEIS_LABEL, 1)[1].strip() or None
+
+        description = ""
+        if quoted_lines:
+            block_lines = "\n".join(quoted_lines).strip().split("\n")
+            description = "\n".join(line[2:] if line.startswith("> ") else line for line in block_lines)
+            if description == DESCRIPTION_PLACEHOLDER:
+                description = ""
+
+        responsaveis: List[str] = []
+        if responsaveis_str and responsaveis_str != "N/A":
+            responsaveis = [name.strip() for name in responsaveis_str.split(",") if name.strip()]
+
+        return cls(
+            description=description,
+            meta_prevista=meta_prevista or 0,
+            meta_realizada=meta_realizada or 0,
+            responsaveis=responsaveis,
+            activities_table=activities_table,
+        )
+
+    def quoted_description(self) -> str:
+        if self.description.strip():
+            return "\n".join(f"> {line}" for line in self.description.splitlines())
+        return f"> {DESCRIPTION_PLACEHOLDER}"
+
+    def to_markdown(self) -> str:
+        responsaveis_str = ", ".join(self.responsaveis) if self.responsaveis else "N/A"
+        description_parts = [
+            DESCRIPTION_HEADING,
+            "",
+            self.quoted_description(),
+            "",
+            f"{META_PREVISTA_LABEL} {self.meta_prevista}%  ",
+            f"{META_REALIZADA_LABEL} {self.meta_realizada}%  ",
+            f"{RESPONSAVEIS_LABEL} {responsaveis_str}  ",
+            "",
+            self.activities_table.strip(),
+        ]
+        markdown = "\n".join(description_parts)
+        if "\n\n\n" in markdown:
+            markdown = _BLANK_RUNS_RE.sub("\n\n", markdown)
+        return markdown.strip()
+
+    @property
+    def activity_rows(self) -> List[str]:
+        """Table rows after the header and separator lines."""
+        return [line for line in self.activities_table.split("\n")[2:] if line.strip().startswith("|")]
+
+# --- Activity rows ---
+
+def format_activity_row(activity: Activity) -> str:
+    project_action = activity.project_action_activity or ""
+    stakeholders = activity.stakeholders or ""
+    deadline_planned = activity.deadline_planned or ""
+    deadline_achieved = activity.deadline_achieved or ""
+    progress_planned = f"{activity.progress_planned_percent}%"
+    progress_achieved = f"{activity.progress_achieved_percent}%"
+
+    return (
+        f"| {project_action} | {stakeholders} | {deadline_planned} | "
+        f"{deadline_achieved} | {progress_planned} | {progress_achieved} |"
+    )
+
+def parse_activity_row(line: str) -> Optional[Activity]:
+    """Reads one six-column table row back into an Activity; returns None for anything else."""
+    line = line.strip()
+    if not (line.startswith("|") and line.endswith("|")):
+        return None
+    cells = [cell.strip() for cell in line[1:-1].split("|")]
+    if len(cells) != 6:
+        return None
+    planned = _parse_percent(cells[4])
+    achieved = _parse_percent(cells[5])
+    if planned is None or achieved is None:
+        return None # Header and separator rows end up here too
+    try:
+        return Activity(
+            project_action_activity=cells[0],
+            stakeholders=cells[1],
+            deadline_planned=cells[2],
+            deadline_achieved=cells[3] or None,
+            progress_planned_percent=planned,
+            progress_achieved_percent=achieved,
+        )
+    except ValidationError:
+        return None
+
+def iter_activities(text: Optional[str]) -> Iterator[Activity]:
+    """Yields the activities of a KR description line by line, starting at the table header.
+
+    Lines are sliced off one at a time instead of splitting the whole description, so a caller
+    that stops early (offset/limit) does not pay for the rest of the table.
+    """
+    text = text or ""
+    position = text.find(ACTIVITIES_TABLE_HEADER)
+    if position < 0:
+        header_match = _TABLE_HEADER_RE.search(text)
+        if not header_match:
+            return
+        position = header_match.start()
+    length = len(text)
+    while position < length:
+        end = text.find("\n", position)
+        if end < 0:
+            end = length
+        activity = parse_activity_row(text[position:end])
+        if activity is not None:
+            yield activity
+        position = end + 1
+
+# --- Deadlines ---
+# "Prazo Previsto"/"Prazo Realizado" are free text. These are the shapes seen in practice; a
+# period (month, quarter, year) stands for its last day, which is when the deadline passes.
+
+_MONTHS = {name: number for number, name in enumerate(
+    ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"], start=1
+)}
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+_BR_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_YEAR_MONTH_RE = re.compile(r"^(\d{4})-(\d{1,2})$")
+_MONTH_YEAR_RE = re.compile(r"^(\d{1,2}|[a-z]{3})[a-z]*\s*[/\- ]\s*(\d{4})$")
+_QUARTER_RE = re.compile(r"^[qt](\d)\s*[/\- ]?\s*(\d{4})$|^(\d{4})\s*[/\- ]?\s*[qt](\d)$")
+_YEAR_RE = re.compile(r"^(\d{4})$")
+
+def _end_of_month(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+def parse_deadline(text: Optional[str]) -> Optional[date]:
+    """Reads a deadline cell ("2025-06-30", "30/06/2025", "06/2025", "Jun/2025", "Q2/2025", "2025")."""
+    if not text:
+        return None
+    value = "".join(
+        char for char in unicodedata.normalize("NFKD", text.strip().casefold()) if not unicodedata.combining(char)
+    )
+    try:
+        if match := _ISO_DATE_RE.match(value):
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if match := _BR_DATE_RE.match(value):
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        if match := _YEAR_MONTH_RE.match(value):
+            return _end_of_month(int(match.group(1)), int(match.group(2)))
+        if match := _MONTH_YEAR_RE.match(value):
+            month_text = match.group(1)
+            month = int(month_text) if month_text.isdigit() else _MONTHS.get(month_text)
+            return _end_of_month(int(match.group(2)), month) if month else None
+        if match := _QUARTER_RE.match(value):
+            quarter, year = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+            return _end_of_month(int(year), 3 * int(quarter)) if 1 <= int(quarter) <= 4 else None
+        if match := _YEAR_RE.match(value):
+            return date(int(match.group(1)), 12, 31)
+    except ValueError: # Day/month out of range
+        return None
+    return None
+
+def append_activity_rows(description: Optional[str], rows: List[str]) -> str:
+    """Appends rows at the end of the description (the table is always the last block).
+
+    An empty description gets the table header first, so the result is still a valid table.
+    """
+    current_description = description or ""
+    new_rows_string = "\n".join(rows)
+    if not current_description.strip():
+        if not new_rows_string:
+            return ""
+        return DEFAULT_ACTIVITIES_TABLE + "\n" + new_rows_string
+    return current_description.rstrip() + "\n" + new_rows_string
@@ -0,0 +1,168 @@
+import bisect
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.models import Activity, GitlabIssue
+from app.services.kr_document import KRDocument, iter_activities, parse_deadline
+from app.services.search_index import fold
+
+class _KRRecord(NamedTuple):
+    issue: GitlabIssue
+    responsaveis: Tuple[str, ...] # Folded names
+    meta_prevista: int
+    meta_realizada: int
+    activities: Tuple[Activity, ...]
+    deadline_keys: Tuple[Tuple[int, int, int], ...] # (deadline ordinal, kr_iid, row) entries in _deadlines
+
+class KRQueryIndex:
+    """Secondary indexes over the parsed KR format, for filters that never call GitLab.
+
+    - responsável (accent/case folded) -> KRs
+    - meta prevista / meta realizada value -> KRs (percentages, so range scans touch <= 101 buckets)
+    - activity Prazo Previsto, kept sorted as (date ordinal, kr_iid, row) for bisect range scans
+
+    ``index_issue`` swaps a KR's entries in every index, so it follows writes incrementally.
+    """
+
+    def __init__(self, kr_labels: Iterable[str]):
+        self.kr_labels = set(kr_labels)
+        self._records: Dict[int, _KRRecord] = {}
+        self._by_responsavel: Dict[str, Set[int]] = {}
+        self._by_meta_prevista: Dict[int, Set[int]] = {}
+        self._by_meta_realizada: Dict[int, Set[int]] = {}
+        self._deadlines: List[Tuple[int, int, int]] = []
+        self._warm = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def mark_warm(self) -> None:
+        self._warm = True
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # --- Maintenance ---
+
+    @staticmethod
+    def _discard(index: Dict, key, kr_iid: int) -> None:
+        members = index.get(key)
+        if members is not None:
+            members.discard(kr_iid)
+            if not members:
+                del index[key]
+
+    def _unindex(self, kr_iid: int) -> None:
+        record = self._records.pop(kr_iid, None)
+        if record is None:
+            return
+        for name in record.responsaveis:
+            self._discard(self._by_responsavel, name, kr_iid)
+        self._discard(self._by_meta_prevista, record.meta_prevista, kr_iid)
+        self._discard(self._by_meta_realizada, record.meta_realizada, kr_iid)
+        for key in record.deadline_keys:
+            position = bisect.bisect_left(self._deadlines, key)
+            if position < len(self._deadlines) and self._deadlines[position] == key:
+                del self._deadlines[position]
+
+    def index_issue(self, issue: GitlabIssue) -> None:
+        is_kr = self.kr_labels.issubset(issue.labels or [])
+        with self._lock:
+            previous = self._records.get(issue.iid)
+            if (previous is not None and previous.issue.updated_at and issue.updated_at
+                    and issue.updated_at <= previous.issue.updated_at):
+                return # Same or older snapshot than the one already indexed
+            self._unindex(issue.iid)
+            if not is_kr:
+                return
+
+            document = KRDocument.parse(issue.description)
+            activities = tuple(iter_activities(document.activities_table))
+            deadline_keys = []
+            for row, activity in enumerate(activities):
+                deadline = parse_deadline(activity.deadline_planned)
+                if deadline is not None:
+                    deadline_keys.append((deadline.toordinal(), issue.iid, row))
+            record = _KRRecord(
+                issue=issue,
+                responsaveis=tuple(dict.fromkeys(fold(name) for name in document.responsaveis)),
+                meta_prevista=document.meta_prevista,
+                meta_realizada=document.meta_realizada,
+                activities=activities,
+                deadline_keys=tuple(deadline_keys),
+            )
+            self._records[issue.iid] = record
+            for name in record.responsaveis:
+                self._by_responsavel.setdefault(name, set()).add(issue.iid)
+            self._by_meta_prevista.setdefault(record.meta_prevista, set()).add(issue.iid)
+            self._by_meta_realizada.setdefault(record.meta_realizada, set()).add(issue.iid)
+            for key in deadline_keys:
+                bisect.insort(self._deadlines, key)
+
+    def remove_issue(self, issue_iid: int) -> None:
+        with self._lock:
+            self._unindex(issue_iid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._by_responsavel.clear()
+            self._by_meta_prevista.clear()
+            self._by_meta_realizada.clear()
+            self._deadlines.clear()
+            self._warm = False
+
+    # --- Queries ---
+
+    @staticmethod
+    def _value_range(index: Dict[int, Set[int]], minimum: Optional[int], maximum: Optional[int]) -> Set[int]:
+        matches: Set[int] = set()
+        for value, members in index.items():
+            if (minimum is None or value >= minimum) and (maximum is None or value <= maximum):
+                matches |= members
+        return matches
+
+    def find_krs(self, responsavel: Optional[str] = None,
+                 meta_prevista_min: Optional[int] = None, meta_prevista_max: Optional[int] = None,
+                 meta_realizada_min: Optional[int] = None, meta_realizada_max: Optional[int] = None) -> List[GitlabIssue]:
+        with self._lock:
+            candidate_sets: List[Set[int]] = []
+            if responsavel:
+                candidate_sets.append(self._by_responsavel.get(fold(responsavel.strip()), set()))
+            if meta_prevista_min is not None or meta_prevista_max is not None:
+                candidate_sets.append(self._value_range(self._by_meta_prevista, meta_prevista_min, meta_prevista_max))
+            if meta_realizada_min is not None or meta_realizada_max is not None:
+                candidate_sets.append(self._value_range(self._by_meta_realizada, meta_realizada_min, meta_realizada_max))
+
+            if candidate_sets:
+                candidate_sets.sort(key=len)
+                matches = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+            else:
+                matches = set(self._records)
+            return [self._records[kr_iid].issue for kr_iid in sorted(matches)]
+
+    def find_activities(self, deadline_after: Optional[date] = None, deadline_before: Optional[date] = None,
+                        progress_achieved_max: Optional[int] = None,
+                        kr_iid: Optional[int] = None) -> List[Tuple[int, Activity]]:
+        """(kr_iid, activity) pairs; deadline bounds are exclusive and skip rows without a readable deadline."""
+        with self._lock:
+            if deadline_after is None and deadline_before is None:
+                rows = [
+                    (iid, row) for iid in sorted(self._records) if kr_iid is None or iid == kr_iid
+                    for row in range(len(self._records[iid].activities))
+                ]
+            else:
+                start = 0 if deadline_after is None else bisect.bisect_right(self._deadlines, (deadline_after.toordinal(), float("inf"), 0))
+                end = len(self._deadlines) if deadline_before is None else bisect.bisect_left(self._deadlines, (deadline_before.toordinal(), -1, 0))
+                rows = sorted((iid, row) for _, iid, row in self._deadlines[start:end] if kr_iid is None or iid == kr_iid)
+
+            results: List[Tuple[int, Activity]] = []
+            for iid, row in rows:
+                activity = self._records[iid].activities[row]
+                if progress_achieved_max is not None and activity.progress_achieved_percent > progress_achieved_max:
+                    continue
+                results.append((iid, activity))
+            return results
@@ -0,0 +1,61 @@
+from datetime import date
+from typing import List, Optional, Tuple
+from app.services.gitlab_service import gitlab_service
+from app.services.okr_mirror import okr_mirror
+from app.services.kr_service import kr_service
+from app.services.kr_query_index import KRQueryIndex
+from app.models import KRActivity, KRResponse
+
+class KRQueryService:
+    """Structured filters over KR metadata and activities, answered from KRQueryIndex."""
+
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.mirror = okr_mirror
+        self.kr_service = kr_service
+        self.index = KRQueryIndex(kr_labels=self.kr_service.kr_labels)
+        # Every KR the service reads or writes is re-indexed, so filters see writes through the API.
+        self.gitlab_service.add_issue_listener(self.index.index_issue)
+
+    async def ensure_warm(self) -> None:
+        # Built once from the mirror's KRs; after that filters never call GitLab.
+        if self.index.is_warm:
+            return
+        await self.mirror.ensure_complete()
+        for issue in self.mirror.issues():
+            self.index.index_issue(issue)
+        self.index.mark_warm()
+
+    async def filter_krs(self, responsavel: Optional[str] = None,
+                         meta_prevista_min: Optional[int] = None, meta_prevista_max: Optional[int] = None,
+                         meta_realizada_min: Optional[int] = None, meta_realizada_max: Optional[int] = None) -> List[KRResponse]:
+        await self.ensure_warm()
+        issues = self.index.find_krs(
+            responsavel=responsavel,
+            meta_prevista_min=meta_prevista_min, meta_prevista_max=meta_prevista_max,
+            meta_realizada_min=meta_realizada_min, meta_realizada_max=meta_realizada_max,
+        )
+        return [
+            self.kr_service._map_issue_to_kr_response(issue, self.kr_service.link_index.objective_for(issue.iid))
+            for issue in issues
+        ]
+
+    async def filter_activities(self, deadline_after: Optional[date] = None, deadline_before: Optional[date] = None,
+                                progress_achieved_max: Optional[int] = None, overdue: bool = False,
+                                kr_iid: Optional[int] = None, offset: int = 0,
+                                limit: Optional[int] = None) -> Tuple[List[KRActivity], int]:
+        # overdue: Prazo Previsto already passed and % Realizado below 100.
+        if overdue:
+            today = date.today()
+            deadline_before = today if deadline_before is None else min(deadline_before, today)
+            progress_achieved_max = 99 if progress_achieved_max is None else min(progress_achieved_max, 99)
+        await self.ensure_warm()
+        matches = self.index.find_activities(
+            deadline_after=deadline_after, deadline_before=deadline_before,
+            progress_achieved_max=progress_achieved_max, kr_iid=kr_iid,
+        )
+        end = None if limit is None else offset + limit
+        page = [KRActivity(kr_iid=iid, **activity.model_dump()) for iid, activity in matches[offset:end]]
+        return page, len(matches)
+
+kr_query_service = KRQueryService()
@@ -1,19 +1,32 @@
+import asyncio
+import logging
 import re
 import gitlab # For gitlab client and exceptions
-from typing import List, Optional
+from collections import defaultdict
+from datetime import datetime
+from typing import DefaultDict, Dict, List, Optional, Tuple
 from app.services.gitlab_service import gitlab_service # Correct import
-from app.models import KRCreateRequest, KRResponse, KRUpdateRequest
+from app.services.link_index import link_index
+from app.services.progress_index import progress_index
+from app.services.rate_limiter import bulk_priority
+from app.services.etag import issue_etag, list_etag, etag_matches
+from app.services.kr_document import KRDocument
+from app.models import KRBatchResult, KRCreateRequest, KRResponse, KRUpdateRequest, GitlabIssue
 from app.config import settings
-from gitlab.v4.objects import ProjectIssue
 # For gitlab.exceptions -> already imported with `import gitlab`
 
+logger = logging.getLogger(__name__)
+
 class KRService:
     def __init__(self):
         self.gitlab_service = gitlab_service # Correct assignment
         self.kr_labels: List[str] = settings.gitlab_kr_labels if settings.gitlab_kr_labels else []
         self.kr_reference_label: str = "OKR::Resultado Chave"
+        self.link_index = link_index
+        self.progress_index = progress_index
+        self._objective_locks: DefaultDict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
-    def _map_issue_to_kr_response(self, issue: ProjectIssue, objective_iid: Optional[int] = None) -> KRResponse:
+    def _map_issue_to_kr_response(self, issue: GitlabIssue, objective_iid: Optional[int] = None) -> KRResponse:
         return KRResponse(
             id=issue.iid,
             title=issue.title,
@@ -22,40 +35,77 @@ class KRService:
             objective_iid=objective_iid or 0
         )
 
-    def _get_objective_prefix(self, objective_iid: int) -> str:
-        parent_objective_issue = self.gitlab_service.get_issue(objective_iid)
+    def _filter_labels(self, team: Optional[str] = None, product: Optional[str] = None) -> List[str]:
+        # Team and product are plain GitLab labels on the issue, so they narrow the label filter.
+        return self.kr_labels + [label for label in (team, product) if label]
+
+    def _is_kr_issue(self, issue: GitlabIssue) -> bool:
+        return set(self.kr_labels).issubset(issue.labels or [])
+
+    async def _load_krs_for_objective(self, objective_iid: int) -> List[GitlabIssue]:
+        # GitLab links are bidirectional: one call on the objective returns every linked KR,
+        # with the full issue payload, instead of one links call per KR in the project.
+        linked_issues = await self.gitlab_service.list_issue_links(objective_iid)
+        kr_issues = [issue for issue in linked_issues if self._is_kr_issue(issue)]
+        self.link_index.set_krs(objective_iid, [issue.iid for issue in kr_issues])
+        return sorted(kr_issues, key=lambda issue: issue.iid)
+
+    async def _get_objective_prefix(self, objective_iid: int) -> str:
+        parent_objective_issue = await self.gitlab_service.get_issue(objective_iid, fresh=True) # Title goes into the new KR
         match = re.match(r"^(OBJ\d+):.*", parent_objective_issue.title)
         if match:
             return match.group(1)
         return f"OBJ{objective_iid}"
 
     def _format_kr_description(self, kr_data: KRCreateRequest) -> str:
-        quoted_description = ""
-        if kr_data.description and kr_data.description.strip(): # Check if description has content
-            quoted_description = "\n".join([f"> {line}" for line in kr_data.description.splitlines()])
+        return KRDocument(
+            description=kr_data.description or "",
+            meta_prevista=kr_data.meta_prevista,
+            meta_realizada=kr_data.meta_realizada,
+            responsaveis=kr_data.responsaveis,
+        ).to_markdown()
+
+    def _kr_reference_line(self, objective_prefix: str, kr_data: KRCreateRequest) -> str:
+        kr_title = f"**{objective_prefix} - KR{kr_data.kr_number}**: {kr_data.title}"
+        return f"- [ ] {kr_title} ~\"{self.kr_reference_label}\""
+
+    def _insert_kr_references(self, objective_description: str, kr_reference_lines: List[str]) -> str:
+        # New references go right under the "### Resultados Chave" heading, ahead of existing ones.
+        new_objective_description = objective_description
+        references_block = "\n".join(kr_reference_lines)
+        results_chave_heading = "### Resultados Chave"
+        if results_chave_heading in new_objective_description:
+            parts = new_objective_description.split(results_chave_heading, 1)
+            new_objective_description = parts[0] + results_chave_heading + "\n" + references_block
+            if len(parts) > 1 and parts[1].strip():
+                new_objective_description += "\n" + parts[1].strip()
+            else:
+                new_objective_description += "\n"
         else:
-            quoted_description = "> (Descrição não fornecida)" # Default if empty or only whitespace
-
-        responsaveis_list: List[str] = kr_data.responsaveis # Type hint for clarity
-        responsaveis_str = ", ".join(responsaveis_list) if responsaveis_list else "N/A"
-
-        description_parts = [
-            "### Descrição",
-            "",
-            quoted_description,
-            "",
-            f"**Meta prevista**: {kr_data.meta_prevista}%  ",
-            f"**Meta realizada**: {kr_data.meta_realizada}%  ",
-            f"**Responsável(eis)**: {responsaveis_str}  ",
-            "",
-            "| Projetos/Ações/Atividades | Partes interessadas | Prazo Previsto | Prazo Realizado | % Previsto | % Realizado |",
-            "|---------------------------|----------------------|----------------|-----------------|------------|-------------|",
-        ]
-        return "\n".join(description_parts)
-
-    def create_kr(self, kr_data: KRCreateRequest) -> KRResponse:
+            new_objective_description += f"\n\n{results_chave_heading}\n{references_block}\n"
+        return new_objective_description.strip()
+
+    async def _add_references_to_objective(self, objective_iid: int, kr_reference_lines: List[str]) -> None:
+        # Serialized per objective so concurrent KR creations cannot overwrite each other's lines.
+        async with self._objective_locks[objective_iid]:
+            parent_objective_issue = await self.gitlab_service.get_issue(objective_iid, fresh=True)
+            new_objective_description = self._insert_kr_references(parent_objective_issue.description or "", kr_reference_lines)
+            await self.gitlab_service.update_issue(
+                issue_iid=parent_objective_issue.iid, description=new_objective_description
+            )
+
+    async def _link_kr_to_objective(self, kr_iid: int, objective_iid: int) -> None:
         try:
-            objective_prefix = self._get_objective_prefix(kr_data.objective_iid)
+            await self.gitlab_service.link_issues(
+                source_issue_iid=kr_iid, target_issue_iid=objective_iid
+            )
+            self.link_index.add_link(objective_iid, kr_iid)
+        except Exception:
+            logger.warning("Failed to link KR %s to objective %s", kr_iid, objective_iid, exc_info=True)
+
+    async def create_kr(self, kr_data: KRCreateRequest) -> KRResponse:
+        try:
+            objective_prefix = await self._get_objective_prefix(kr_data.objective_iid)
         except gitlab.exceptions.GitlabGetError as e: # More specific exception
             # Consider logging the error e here
             raise ValueError(f"Parent objective with IID {kr_data.objective_iid} not found.") from e
@@ -64,130 +114,125 @@ class KRService:
         kr_description = self._format_kr_description(kr_data)
         labels_to_apply: List[str] = list(set(self.kr_labels)) + [kr_data.team_label, kr_data.product_label]
 
-        created_kr_issue = self.gitlab_service.create_issue(
+        created_kr_issue = await self.gitlab_service.create_issue(
             title=kr_title, description=kr_description, labels=labels_to_apply
         )
 
-        try:
-            self.gitlab_service.link_issues(
-                source_issue_iid=created_kr_issue.iid, target_issue_iid=kr_data.objective_iid
-            )
-        except Exception as e_link:
-            # Log this warning, e.g., using logging module
-            print(f"Warning: Failed to link KR {created_kr_issue.iid} to Objective {kr_data.objective_iid}. Error: {e_link}")
+        await self._link_kr_to_objective(created_kr_issue.iid, kr_data.objective_iid)
+        self.progress_index.record_kr(created_kr_issue.iid, kr_data.meta_prevista, kr_data.meta_realizada, kr_data.objective_iid)
 
         try:
-            parent_objective_issue = self.gitlab_service.get_issue(kr_data.objective_iid)
-            kr_title = f"**{objective_prefix} - KR{kr_data.kr_number}**: {kr_data.title}"
-            kr_reference_line = f"- [ ] {kr_title} ~\"{self.kr_reference_label}\""
-
-            new_objective_description = parent_objective_issue.description or ""
-            results_chave_heading = "### Resultados Chave"
-            if results_chave_heading in new_objective_description:
-                parts = new_objective_description.split(results_chave_heading, 1)
-                new_objective_description = parts[0] + results_chave_heading + "\n" + kr_reference_line
-                if len(parts) > 1 and parts[1].strip():
-                    new_objective_description += "\n" + parts[1].strip()
-                else:
-                    new_objective_description += "\n"
-            else:
-                new_objective_description += f"\n\n{results_chave_heading}\n{kr_reference_line}\n"
-
-            self.gitlab_service.update_issue(
-                issue_iid=parent_objective_issue.iid, description=new_objective_description.strip()
+            await self._add_references_to_objective(
+                kr_data.objective_iid, [self._kr_reference_line(objective_prefix, kr_data)]
             )
-        except Exception as e_update_obj:
-            # Log this warning
-            print(f"Warning: Failed to update parent objective {kr_data.objective_iid} with KR {created_kr_issue.iid} reference. Error: {e_update_obj}")
+        except Exception:
+            logger.warning("Failed to update parent objective %s with KR %s reference",
+                           kr_data.objective_iid, created_kr_issue.iid, exc_info=True)
 
         return self._map_issue_to_kr_response(created_kr_issue, kr_data.objective_iid)
 
+    async def create_krs_batch(self, krs_data: List[KRCreateRequest]) -> List[KRBatchResult]:
+        # Bulk import: its GitLab calls (and those of the tasks it spawns) yield to interactive reads.
+        with bulk_priority():
+            return await self._create_krs_batch(krs_data)
+
+    async def _create_krs_batch(self, krs_data: List[KRCreateRequest]) -> List[KRBatchResult]:
+        # 1. Resolve every parent objective once, before anything is created.
+        objective_iids = list(dict.fromkeys(kr_data.objective_iid for kr_data in krs_data))
+        prefixes = await asyncio.gather(
+            *(self._get_objective_prefix(objective_iid) for objective_iid in objective_iids), return_exceptions=True
+        )
+        prefix_by_objective: Dict[int, str] = {}
+        for objective_iid, prefix in zip(objective_iids, prefixes):
+            if isinstance(prefix, gitlab.exceptions.GitlabGetError):
+                raise ValueError(f"Parent objective with IID {objective_iid} not found.") from prefix
+            if isinstance(prefix, BaseException):
+                raise prefix
+            prefix_by_objective[objective_iid] = prefix
+
+        semaphore = asyncio.Semaphore(settings.gitlab_bulk_concurrency)
+
+        async def create_and_link(kr_data: KRCreateRequest) -> GitlabIssue:
+            async with semaphore:
+                objective_prefix = prefix_by_objective[kr_data.objective_iid]
+                labels_to_apply: List[str] = list(set(self.kr_labels)) + [kr_data.team_label, kr_data.product_label]
+                created_kr_issue = await self.gitlab_service.create_issue(
+                    title=f"{objective_prefix} - KR{kr_data.kr_number}: {kr_data.title}",
+                    description=self._format_kr_description(kr_data),
+                    labels=labels_to_apply,
+                )
+                await self._link_kr_to_objective(created_kr_issue.iid, kr_data.objective_iid)
+                self.progress_index.record_kr(
+                    created_kr_issue.iid, kr_data.meta_prevista, kr_data.meta_realizada, kr_data.objective_iid
+                )
+                return created_kr_issue
+
+        # 2. Create and link the KR issues concurrently.
+        results = await asyncio.gather(*(create_and_link(kr_data) for kr_data in krs_data), return_exceptions=True)
+
+        # 3. One description rewrite per parent objective, with all of its new reference lines.
+        reference_lines_by_objective: Dict[int, List[str]] = {}
+        for kr_data, result in zip(krs_data, results):
+            if not isinstance(result, BaseException):
+                reference_lines_by_objective.setdefault(kr_data.objective_iid, []).append(
+                    self._kr_reference_line(prefix_by_objective[kr_data.objective_iid], kr_data)
+                )
+        update_results = await asyncio.gather(
+            *(self._add_references_to_objective(objective_iid, lines) for objective_iid, lines in reference_lines_by_objective.items()),
+            return_exceptions=True,
+        )
+        for objective_iid, update_result in zip(reference_lines_by_objective, update_results):
+            if isinstance(update_result, BaseException):
+                logger.warning("Failed to update parent objective %s with batch KR references",
+                               objective_iid, exc_info=update_result)
+
+        # 4. One result per requested KR: the KRs that were created stay created even if others failed.
+        batch_results: List[KRBatchResult] = []
+        for kr_data, result in zip(krs_data, results):
+            if isinstance(result, BaseException):
+                logger.warning("Failed to create KR%s of objective %s in batch",
+                               kr_data.kr_number, kr_data.objective_iid, exc_info=result)
+                batch_results.append(KRBatchResult(
+                    objective_iid=kr_data.objective_iid, kr_number=kr_data.kr_number, success=False, error=str(result)
+                ))
+            else:
+                batch_results.append(KRBatchResult(
+                    objective_iid=kr_data.objective_iid, kr_number=kr_data.kr_number, success=True,
+                    kr=self._map_issue_to_kr_response(result, kr_data.objective_iid),
+                ))
+        return batch_results
+
     # Method to be placed inside KRService class:
-    def update_kr(self, kr_iid: int, kr_data: KRUpdateRequest) -> KRResponse:
+    async def update_kr(self, kr_iid: int, kr_data: KRUpdateRequest) -> KRResponse:
         try:
-            issue = self.gitlab_service.get_issue(kr_iid)
+            issue = await self.gitlab_service.get_issue(kr_iid, fresh=True) # Base of the rewrite
         except gitlab.exceptions.GitlabGetError:
             raise ValueError(f"KR with IID {kr_iid} not found.")
 
-        current_description = issue.description or ""
-
-        # --- Determine new values, falling back to current if not provided ---
-
-        # 1. Quoted Description
-        current_quoted_desc_match = re.search(r"### Descrição\s*((?:> .*(?:\n|$))+)", current_description, re.MULTILINE)
-        current_quoted_desc_content = ""
-        if current_quoted_desc_match:
-            lines = current_quoted_desc_match.group(1).strip().split('\n') # Use '\n' for split if dealing with literal
-            current_quoted_desc_content = "\n".join([line[2:] if line.startswith("> ") else line for line in lines]) # Use '\n' for join
-
-        final_description_content = kr_data.description if kr_data.description is not None else current_quoted_desc_content
-
-        if final_description_content.strip():
-            final_quoted_description_block = "\n".join([f"> {line}" for line in final_description_content.splitlines()]) # splitlines handles
-
-        else:
-            final_quoted_description_block = "> (Descrição não fornecida)"
-
-        # 2. Meta Prevista
-        meta_prevista_match = re.search(r"\*\*Meta prevista\*\*: ([\d\.]+)\s*%", current_description)
-        current_meta_prevista = int(float(meta_prevista_match.group(1))) if meta_prevista_match else 0
-        final_meta_prevista = kr_data.meta_prevista if kr_data.meta_prevista is not None else current_meta_prevista
-
-        # 3. Meta Realizada
-        meta_realizada_match = re.search(r"\*\*Meta realizada\*\*: ([\d\.]+)\s*%", current_description)
-        current_meta_realizada = int(float(meta_realizada_match.group(1))) if meta_realizada_match else 0
-        final_meta_realizada = kr_data.meta_realizada if kr_data.meta_realizada is not None else current_meta_realizada
-
-        # 4. Responsáveis
-        responsaveis_match = re.search(r"\*\*Responsável\(eis\)\*\*: ([^\n]+)", current_description) # Matches till newline
-        current_responsaveis_str = responsaveis_match.group(1).strip() if responsaveis_match else "N/A"
-
+        # Fields left as None keep their current value; the activities table is carried over verbatim.
+        document = KRDocument.parse(issue.description)
+        if kr_data.description is not None:
+            document.description = kr_data.description
+        if kr_data.meta_prevista is not None:
+            document.meta_prevista = kr_data.meta_prevista
+        if kr_data.meta_realizada is not None:
+            document.meta_realizada = kr_data.meta_realizada
         if kr_data.responsaveis is not None:
-            final_responsaveis_str = ", ".join(kr_data.responsaveis) if kr_data.responsaveis else "N/A"
-        else:
-            final_responsaveis_str = current_responsaveis_str
-
-        # --- Preserve Activities Table ---
-        activities_table_header_default = "| Projetos/Ações/Atividades | Partes interessadas | Prazo Previsto | Prazo Realizado | % Previsto | % Realizado |"
-        activities_table_separator_default = "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
+            document.responsaveis = kr_data.responsaveis
+        new_full_description = document.to_markdown()
 
-        activities_table_str = ""
-
-        header_search_match = re.search(re.escape(activities_table_header_default), current_description, re.IGNORECASE)
-        if header_search_match:
-            table_start_index = header_search_match.start()
-            activities_table_str = current_description[table_start_index:]
-            activities_table_str = activities_table_str.replace('\r\n', '\n') # Normalize newlines
-        else:
-            activities_table_str = f"{activities_table_header_default}\n{activities_table_separator_default}"
-
-        # --- Reconstruct Description ---
-        description_parts = [
-            "### Descrição",
-            "",
-            final_quoted_description_block,
-            "",
-            f"**Meta prevista**: {final_meta_prevista}%  ",
-            f"**Meta realizada**: {final_meta_realizada}%  ",
-            f"**Responsável(eis)**: {final_responsaveis_str}  ",
-            "",
-            activities_table_str.strip()
-        ]
-
-        new_full_description = "\n".join(description_parts) # Use '\n' for join
-        new_full_description = re.sub(r'\n{3,}', '\n\n', new_full_description).strip() # Use '\n'
-
-        updated_issue = self.gitlab_service.update_issue(
+        updated_issue = await self.gitlab_service.update_issue(
             issue_iid=kr_iid, description=new_full_description
         )
 
-        objective_iid_for_response = None
+        objective_iid_for_response = self.link_index.objective_for(kr_iid)
+        self.progress_index.record_kr(kr_iid, document.meta_prevista, document.meta_realizada, objective_iid_for_response)
         return self._map_issue_to_kr_response(updated_issue, objective_iid_for_response)
 
-    def get_kr(self, kr_iid: int) -> Optional[KRResponse]:
+    async def get_kr(self, kr_iid: int) -> Optional[KRResponse]:
         try:
-            issue = self.gitlab_service.get_issue(kr_iid)
-            return self._map_issue_to_kr_response(issue, None) # Objective IID not determined here
+            issue = await self.gitlab_service.get_issue(kr_iid)
+            return self._map_issue_to_kr_response(issue, self.link_index.objective_for(kr_iid))
         except gitlab.exceptions.GitlabGetError: # If KR issue itself not found
             return None # Return None as per Optional type hint
         except Exception as e:
@@ -195,44 +240,31 @@ class KRService:
             print(f"Error retrieving KR {kr_iid}: {e}")
             raise # Re-raise other exceptions
 
-    def list_krs_for_objective(self, objective_iid: int) -> List[KRResponse]:
+    # Public so derived views (progress rollup) can read an objective's raw KR issues; None if the objective does not exist.
+    async def get_kr_issues_for_objective(self, objective_iid: int) -> Optional[List[GitlabIssue]]:
         try:
             # First, check if the parent objective exists. If not, no KRs to list.
-            self.gitlab_service.get_issue(objective_iid)
+            await self.gitlab_service.get_issue(objective_iid)
         except gitlab.exceptions.GitlabGetError:
+            return None
+
+        kr_iids = self.link_index.krs_for(objective_iid)
+        if kr_iids is None:
+            return await self._load_krs_for_objective(objective_iid)
+        return await self.gitlab_service.get_issues(kr_iids)
+
+    async def list_krs_for_objective(self, objective_iid: int) -> List[KRResponse]:
+        kr_issues = await self.get_kr_issues_for_objective(objective_iid)
+        if kr_issues is None:
             return []
+        return [self._map_issue_to_kr_response(issue, objective_iid) for issue in kr_issues]
 
-        all_krs_issues: List[ProjectIssue] = self.gitlab_service.list_issues(labels=self.kr_labels)
-        linked_krs: List[KRResponse] = []
-        for kr_issue_candidate in all_krs_issues:
-            try:
-                # For each potential KR, check its links to see if it links to the given objective_iid
-                # This assumes KR is source, Objective is target as per create_kr logic.
-                # If link_issues was (Objective_Source -> KR_Target), this logic would need to change
-                # to iterate objective_issue.links.list() and check target_issue_iid.
-                # Given create_kr links KR(source) -> Objective(target), this is complex.
-                # A simpler (but less direct) way if links are "relates_to" (bidirectional):
-                # Check if objective_iid is in any link associated with kr_issue_candidate.
-                # The current python-gitlab might not make this super easy without knowing link IDs.
-
-                # Let's adjust based on create_kr: KR (source) links TO Objective (target).
-                # So, a KR's links will show the Objective as a target.
-                # However, the link is stored ON the source. So we list links FROM the KR.
-                links = kr_issue_candidate.links.list()
-                for link in links:
-                    # Assuming 'target_issue_iid' is an attribute on the link object from python-gitlab
-                    # when listing links of an issue.
-                    if hasattr(link, 'target_issue_iid') and link.target_issue_iid == objective_iid:
-                        linked_krs.append(self._map_issue_to_kr_response(kr_issue_candidate, objective_iid))
-                        break # Found link to the objective, no need to check other links for this KR
-            except Exception as e:
-                # Log error processing links for a KR candidate
-                print(f"Error processing links for KR candidate {kr_issue_candidate.iid}: {e}")
-        return linked_krs
-
-    def list_all_krs(self) -> List[KRResponse]:
+    async def list_all_krs(self, team: Optional[str] = None, product: Optional[str] = None, state: Optional[str] = None,
+                           updated_after: Optional[datetime] = None) -> List[KRResponse]:
         try:
-            issues: List[ProjectIssue] = self.gitlab_service.list_issues(labels=self.kr_labels)
+            issues: List[GitlabIssue] = await self.gitlab_service.list_issues(
+                labels=self._filter_labels(team, product), state=state, updated_after=updated_after
+            )
             # Objective IID not determined here for simplicity
             return [self._map_issue_to_kr_response(issue) for issue in issues]
         except Exception as e:
@@ -240,4 +272,45 @@ class KRService:
             print(f"Error listing all KRs: {e}")
             raise
 
+    # --- Conditional reads (ETag / If-None-Match) ---
+    # These return the ETag plus the mapped body, or None instead of the body when the client's
+    # copy is current, so unchanged issues never go through _map_issue_to_kr_response.
+
+    async def get_kr_conditional(self, kr_iid: int, if_none_match: Optional[str] = None) -> Tuple[str, Optional[KRResponse]]:
+        try:
+            issue = await self.gitlab_service.get_issue(kr_iid)
+        except gitlab.exceptions.GitlabGetError as e:
+            raise ValueError(f"KR with IID {kr_iid} not found.") from e
+        objective_iid = self.link_index.objective_for(kr_iid)
+        etag = issue_etag("kr", issue, objective_iid)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, self._map_issue_to_kr_response(issue, objective_iid)
+
+    async def list_krs_for_objective_conditional(self, objective_iid: int, if_none_match: Optional[str] = None) -> Tuple[str, Optional[List[KRResponse]]]:
+        kr_issues = await self.get_kr_issues_for_objective(objective_iid) or []
+        etag = list_etag("objective-krs", kr_issues, objective_iid)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, [self._map_issue_to_kr_response(issue, objective_iid) for issue in kr_issues]
+
+    async def list_all_krs_conditional(self, if_none_match: Optional[str] = None, limit: Optional[int] = None,
+                                       cursor: Optional[str] = None, team: Optional[str] = None, product: Optional[str] = None,
+                                       state: Optional[str] = None, updated_after: Optional[datetime] = None
+                                       ) -> Tuple[str, Optional[List[KRResponse]], Optional[str]]:
+        next_cursor: Optional[str] = None
+        labels = self._filter_labels(team, product)
+        if limit is None and cursor is None:
+            issues: List[GitlabIssue] = await self.gitlab_service.list_issues(labels=labels, state=state, updated_after=updated_after)
+        else:
+            page = await self.gitlab_service.list_issues_page(
+                labels=labels, limit=limit, cursor=cursor, state=state, updated_after=updated_after
+            )
+            issues, next_cursor = page.issues, page.next_cursor
+        objective_iids = [self.link_index.objective_for(issue.iid) for issue in issues]
+        etag = list_etag("krs", issues, next_cursor or "", objective_iids, labels, state, updated_after)
+        if etag_matches(if_none_match, etag):
+            return etag, None, next_cursor
+        return etag, [self._map_issue_to_kr_response(issue, objective_iid) for issue, objective_iid in zip(issues, objective_iids)], next_cursor
+
 kr_service = KRService()
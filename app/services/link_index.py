@@ -0,0 +1,68 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+class LinkIndex:
+    """Reverse index of the Objective <-> KR links: objective_iid -> {kr_iid} and kr_iid -> objective_iid.
+
+    An objective is only answered from the index once its full KR set has been loaded
+    (``set_krs``); before that ``krs_for`` returns None so callers know to do the bulk pass.
+    """
+
+    def __init__(self):
+        self._krs_by_objective: Dict[int, Set[int]] = {}
+        self._objective_by_kr: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def is_loaded(self, objective_iid: int) -> bool:
+        return objective_iid in self._krs_by_objective
+
+    def set_krs(self, objective_iid: int, kr_iids: Iterable[int]) -> None:
+        with self._lock:
+            for previous_kr in self._krs_by_objective.get(objective_iid, set()):
+                if self._objective_by_kr.get(previous_kr) == objective_iid:
+                    del self._objective_by_kr[previous_kr]
+            kr_set = set(kr_iids)
+            self._krs_by_objective[objective_iid] = kr_set
+            for kr_iid in kr_set:
+                self._objective_by_kr[kr_iid] = objective_iid
+
+    def add_link(self, objective_iid: int, kr_iid: int) -> None:
+        with self._lock:
+            previous_objective = self._objective_by_kr.get(kr_iid)
+            if previous_objective is not None and previous_objective != objective_iid:
+                self._krs_by_objective.get(previous_objective, set()).discard(kr_iid)
+            self._objective_by_kr[kr_iid] = objective_iid
+            # Objectives not loaded yet stay unloaded: a partial set would hide the other KRs.
+            if objective_iid in self._krs_by_objective:
+                self._krs_by_objective[objective_iid].add(kr_iid)
+
+    def remove_kr(self, kr_iid: int) -> None:
+        with self._lock:
+            objective_iid = self._objective_by_kr.pop(kr_iid, None)
+            if objective_iid is not None:
+                self._krs_by_objective.get(objective_iid, set()).discard(kr_iid)
+
+    def invalidate_objective(self, objective_iid: int) -> None:
+        with self._lock:
+            for kr_iid in self._krs_by_objective.pop(objective_iid, set()):
+                if self._objective_by_kr.get(kr_iid) == objective_iid:
+                    del self._objective_by_kr[kr_iid]
+
+    def krs_for(self, objective_iid: int) -> Optional[List[int]]:
+        kr_set = self._krs_by_objective.get(objective_iid)
+        return sorted(kr_set) if kr_set is not None else None
+
+    def objective_for(self, kr_iid: int) -> Optional[int]:
+        return self._objective_by_kr.get(kr_iid)
+
+    def loaded_links(self) -> Dict[int, List[int]]:
+        """objective_iid -> kr_iids for every loaded objective (what a snapshot needs to persist)."""
+        with self._lock:
+            return {objective_iid: sorted(kr_set) for objective_iid, kr_set in self._krs_by_objective.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._krs_by_objective.clear()
+            self._objective_by_kr.clear()
+
+link_index = LinkIndex()
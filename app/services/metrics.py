@@ -0,0 +1,253 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, TypeVar
+from app.services import rate_limiter, request_timing
+
+# Latency buckets (seconds) shared by the API routes and the GitLab calls.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram: an observation is one bisect and three additions."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]; counts are cumulated at render time
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series is not None else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, (list(series[0]), series[1], series[2])) for labels, series in self._series.items())
+        lines = self._header()
+        for labels, (counts, total, count) in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class CallbackMetric(_Metric):
+    """Series read at scrape time from a callback (e.g. cache counters kept by the caches themselves)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.callback())
+        ]
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format (0.0.4) registry; no client library needed.
+
+    Label values must come from bounded sets (route templates, method names, status codes,
+    exception class names), never from ids or free text.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames)) # type: ignore[return-value]
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets)) # type: ignore[return-value]
+
+    def callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, labelnames, callback, kind)) # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- API routes ---
+http_requests_total = registry.counter(
+    "okr_http_requests_total", "API requests by route template and status code.", ("method", "route", "status"))
+http_request_duration_seconds = registry.histogram(
+    "okr_http_request_duration_seconds", "API request latency by route template.", ("method", "route"))
+
+# --- GitlabService ---
+gitlab_calls_total = registry.counter(
+    "okr_gitlab_calls_total", "GitlabService method calls (cache hits included).", ("method",))
+gitlab_call_errors_total = registry.counter(
+    "okr_gitlab_call_errors_total", "GitlabService method calls that raised, by exception class.", ("method", "error"))
+gitlab_call_duration_seconds = registry.histogram(
+    "okr_gitlab_call_duration_seconds", "GitlabService method latency (all HTTP requests the call made).", ("method",))
+gitlab_http_requests_total = registry.counter(
+    "okr_gitlab_http_requests_total", "HTTP requests sent to the GitLab API, by verb and status code.", ("verb", "status"))
+gitlab_rate_limit_wait_seconds_total = registry.counter(
+    "okr_gitlab_rate_limit_wait_seconds_total", "Time spent waiting for a GitLab rate-limit token, by priority.", ("priority",))
+PRIORITY_NAMES = {rate_limiter.INTERACTIVE: "interactive", rate_limiter.BULK: "bulk"}
+
+# --- Caches ---
+# name -> stats() callable returning at least hits, misses and size (see IssueCache.stats).
+_cache_stats: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Exposes a cache's own counters; they are only read when /metrics is scraped."""
+    _cache_stats[name] = stats
+
+def _cache_series(key: str) -> Iterable[Tuple[LabelValues, float]]:
+    for name, stats in list(_cache_stats.items()):
+        values = stats()
+        if key == "hit_ratio":
+            lookups = values["hits"] + values["misses"]
+            yield (name,), (values["hits"] / lookups) if lookups else 0.0
+        else:
+            yield (name,), values[key]
+
+registry.callback("okr_cache_hits_total", "Cache lookups served from the cache.", ("cache",),
+                  lambda: _cache_series("hits"), kind="counter")
+registry.callback("okr_cache_misses_total", "Cache lookups that missed.", ("cache",),
+                  lambda: _cache_series("misses"), kind="counter")
+registry.callback("okr_cache_hit_ratio", "hits / (hits + misses) since the process started.", ("cache",),
+                  lambda: _cache_series("hit_ratio"))
+registry.callback("okr_cache_entries", "Entries currently held by the cache.", ("cache",),
+                  lambda: _cache_series("size"))
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def instrument_gitlab_call(func: F) -> F:
+    """Counts and times a GitlabService coroutine (or async generator) under its method name.
+
+    Also marks the method as the current one for request_timing, unless an outer GitlabService
+    method already did, so the HTTP requests of a call are attributed to what the route called.
+    """
+    name = func.__name__
+    method_var = request_timing.current_gitlab_method
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def generator_wrapper(*args, **kwargs):
+            gitlab_calls_total.inc(name)
+            generator = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    # Timed and attributed step by step: the consumer's work between items is not
+                    # GitLab time, and a context variable must not stay set across a yield.
+                    token = method_var.set(name) if method_var.get() is None else None
+                    started = time.perf_counter()
+                    try:
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except Exception as e:
+                        gitlab_call_errors_total.inc(name, type(e).__name__)
+                        raise
+                    finally:
+                        elapsed += time.perf_counter() - started
+                        if token is not None:
+                            method_var.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+                gitlab_call_duration_seconds.observe(elapsed, name)
+        return generator_wrapper # type: ignore[return-value]
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        gitlab_calls_total.inc(name)
+        token = method_var.set(name) if method_var.get() is None else None
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            gitlab_call_errors_total.inc(name, type(e).__name__)
+            raise
+        finally:
+            gitlab_call_duration_seconds.observe(time.perf_counter() - started, name)
+            if token is not None:
+                method_var.reset(token)
+    return wrapper # type: ignore[return-value]
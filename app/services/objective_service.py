@@ -1,15 +1,17 @@
+import gitlab # For gitlab.exceptions
 from app.services import gitlab_service
-from app.models import ObjectiveCreateRequest, ObjectiveResponse # Removed GitlabConfig as it's not used
+from app.services.etag import issue_etag, list_etag, etag_matches
+from app.models import ObjectiveCreateRequest, ObjectiveResponse, GitlabIssue # Removed GitlabConfig as it's not used
 from app.config import settings
-from gitlab.v4.objects import ProjectIssue
-from typing import List # Ensure List is imported
+from datetime import datetime
+from typing import List, Optional, Tuple # Ensure List is imported
 
 class ObjectiveService:
     def __init__(self):
         self.gitlab_service = gitlab_service
         self.objective_labels: List[str] = settings.gitlab_objective_labels # Ensure type hint uses List
 
-    def _map_issue_to_objective_response(self, issue: ProjectIssue) -> ObjectiveResponse:
+    def _map_issue_to_objective_response(self, issue: GitlabIssue) -> ObjectiveResponse:
         return ObjectiveResponse(
             id=issue.iid,
             title=issue.title,
@@ -17,14 +19,18 @@ class ObjectiveService:
             web_url=issue.web_url
         )
 
-    def create_objective(self, objective_data: ObjectiveCreateRequest) -> ObjectiveResponse:
+    def _filter_labels(self, team: Optional[str] = None, product: Optional[str] = None) -> List[str]:
+        # Team and product are plain GitLab labels on the issue, so they narrow the label filter.
+        return self.objective_labels + [label for label in (team, product) if label]
+
+    async def create_objective(self, objective_data: ObjectiveCreateRequest) -> ObjectiveResponse:
         title = f"OBJ{objective_data.obj_number}: {objective_data.title.upper()}"
         description = f"###  Descrição:\n\n> {objective_data.description}\n\n### Resultados Chave"
 
         labels_to_apply: List[str] = list(set(self.objective_labels)) + [objective_data.team_label, objective_data.product_label]
 
         try:
-            issue = self.gitlab_service.create_issue(
+            issue = await self.gitlab_service.create_issue(
                 title=title,
                 description=description,
                 labels=labels_to_apply
@@ -34,20 +40,55 @@ class ObjectiveService:
             print(f"Error creating objective: {e}")
             raise
 
-    def get_objective(self, objective_iid: int) -> ObjectiveResponse:
+    async def get_objective(self, objective_iid: int) -> ObjectiveResponse:
         try:
-            issue = self.gitlab_service.get_issue(objective_iid)
+            issue = await self.gitlab_service.get_issue(objective_iid)
             return self._map_issue_to_objective_response(issue)
         except Exception as e:
             print(f"Error retrieving objective {objective_iid}: {e}")
             raise
 
-    def list_objectives(self) -> List[ObjectiveResponse]:
+    async def list_objectives(self, team: Optional[str] = None, product: Optional[str] = None, state: Optional[str] = None,
+                              updated_after: Optional[datetime] = None) -> List[ObjectiveResponse]:
         try:
-            issues: List[ProjectIssue] = self.gitlab_service.list_issues(labels=self.objective_labels)
+            issues: List[GitlabIssue] = await self.gitlab_service.list_issues(
+                labels=self._filter_labels(team, product), state=state, updated_after=updated_after
+            )
             return [self._map_issue_to_objective_response(issue) for issue in issues]
         except Exception as e:
             print(f"Error listing objectives: {e}")
             raise
 
+    # --- Conditional reads (ETag / If-None-Match) ---
+    # These return the ETag plus the mapped body, or None instead of the body when the client's
+    # copy is current, so unchanged issues never go through the pydantic mapping.
+
+    async def get_objective_conditional(self, objective_iid: int, if_none_match: Optional[str] = None) -> Tuple[str, Optional[ObjectiveResponse]]:
+        try:
+            issue = await self.gitlab_service.get_issue(objective_iid)
+        except gitlab.exceptions.GitlabGetError as e:
+            raise ValueError(f"Objective with IID {objective_iid} not found.") from e
+        etag = issue_etag("objective", issue)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, self._map_issue_to_objective_response(issue)
+
+    async def list_objectives_conditional(self, if_none_match: Optional[str] = None, limit: Optional[int] = None,
+                                          cursor: Optional[str] = None, team: Optional[str] = None, product: Optional[str] = None,
+                                          state: Optional[str] = None, updated_after: Optional[datetime] = None
+                                          ) -> Tuple[str, Optional[List[ObjectiveResponse]], Optional[str]]:
+        next_cursor: Optional[str] = None
+        labels = self._filter_labels(team, product)
+        if limit is None and cursor is None:
+            issues: List[GitlabIssue] = await self.gitlab_service.list_issues(labels=labels, state=state, updated_after=updated_after)
+        else:
+            page = await self.gitlab_service.list_issues_page(
+                labels=labels, limit=limit, cursor=cursor, state=state, updated_after=updated_after
+            )
+            issues, next_cursor = page.issues, page.next_cursor
+        etag = list_etag("objectives", issues, next_cursor or "", labels, state, updated_after)
+        if etag_matches(if_none_match, etag):
+            return etag, None, next_cursor
+        return etag, [self._map_issue_to_objective_response(issue) for issue in issues], next_cursor
+
 objective_service = ObjectiveService()
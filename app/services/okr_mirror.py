@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.models import GitlabIssue
+from app.services.gitlab_service import GitlabService, gitlab_service
+
+def parse_gitlab_timestamp(value: str) -> datetime:
+    # GitLab sends "2025-01-01T12:00:00.000Z"; datetime.fromisoformat only accepts "Z" from Python 3.11.
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class OKRMirror:
+    """Local copy of every objective and KR issue, the shared source the derived views warm from.
+
+    It is filled once, either by a full scan (``ensure_complete``) or from a persisted snapshot
+    (``load``). After that it is kept current by the GitlabService issue listener and by
+    ``sync_delta``, which only lists the issues updated after the ``watermark``.
+    """
+
+    def __init__(self, gitlab_service: GitlabService, objective_labels: Iterable[str], kr_labels: Iterable[str],
+                 overlap_seconds: float = 5.0):
+        self.gitlab_service = gitlab_service
+        self.objective_labels = list(objective_labels)
+        self.kr_labels = list(kr_labels)
+        # Delta queries start this much before the watermark, to absorb clock skew with GitLab.
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._issues: Dict[int, GitlabIssue] = {}
+        self._complete = False
+        self._watermark: Optional[datetime] = None
+        self._version = 0 # Bumped on every change, so a snapshot is only rewritten when needed
+        self._lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        self.gitlab_service.add_issue_listener(self.apply_issue)
+
+    @property
+    def is_complete(self) -> bool:
+        return self._complete
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Start time of the last successful full scan or delta sync."""
+        return self._watermark
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._issues)
+
+    def get(self, issue_iid: int) -> Optional[GitlabIssue]:
+        with self._lock:
+            return self._issues.get(issue_iid)
+
+    def issues(self) -> List[GitlabIssue]:
+        with self._lock:
+            return [self._issues[iid] for iid in sorted(self._issues)]
+
+    def _is_okr_issue(self, issue: GitlabIssue) -> bool:
+        labels = set(issue.labels or [])
+        return set(self.objective_labels).issubset(labels) or set(self.kr_labels).issubset(labels)
+
+    def apply_issue(self, issue: GitlabIssue) -> bool:
+        """Stores a newer version of an OKR issue; returns whether the mirror changed."""
+        with self._lock:
+            previous = self._issues.get(issue.iid)
+            if previous is not None and previous.updated_at and issue.updated_at and issue.updated_at <= previous.updated_at:
+                return False # Same or older snapshot than the one already mirrored
+            if self._is_okr_issue(issue):
+                self._issues[issue.iid] = issue
+            elif self._issues.pop(issue.iid, None) is None:
+                return False
+            self._version += 1
+            return True
+
+    def remove_issue(self, issue_iid: int) -> bool:
+        with self._lock:
+            if self._issues.pop(issue_iid, None) is None:
+                return False
+            self._version += 1
+            return True
+
+    def _advance_watermark(self, synced_at: datetime) -> None:
+        if self._watermark is None or synced_at > self._watermark:
+            self._watermark = synced_at
+            self._version += 1
+
+    def load(self, issues: Iterable[GitlabIssue], complete: bool, watermark: Optional[datetime]) -> None:
+        """Seeds the mirror (and, through the listeners, every derived view) from a snapshot."""
+        for issue in issues:
+            if self.apply_issue(issue):
+                self.gitlab_service.publish_issue(issue)
+        if watermark is not None:
+            self._advance_watermark(watermark)
+        self._complete = self._complete or complete
+
+    async def ensure_complete(self) -> None:
+        # One scan of objectives and KRs feeds the mirror and every view; concurrent callers wait for it.
+        if self._complete:
+            return
+        async with self._sync_lock:
+            if self._complete:
+                return
+            started_at = datetime.now(timezone.utc)
+            for labels in (self.objective_labels, self.kr_labels):
+                async for issue in self.gitlab_service.iter_issues(labels=labels, remember=False):
+                    if self.apply_issue(issue):
+                        self.gitlab_service.publish_issue(issue)
+            self._advance_watermark(started_at)
+            self._complete = True
+
+    async def sync_delta(self) -> List[GitlabIssue]:
+        """Lists the issues updated since the watermark and applies them; returns the ones that changed.
+
+        Issues that lost their OKR labels are listed too (no label filter), so they leave the mirror.
+        The first call without a watermark lists nothing: it starts tracking changes from now.
+        """
+        async with self._sync_lock:
+            started_at = datetime.now(timezone.utc)
+            if self._watermark is None:
+                self._advance_watermark(started_at)
+                return []
+            changed: List[GitlabIssue] = []
+            # Oldest first, so an issue updated while the listing runs moves to the end and is still seen.
+            async for issue in self.gitlab_service.iter_issues(
+                updated_after=self._watermark - self.overlap, remember=False, order_by="updated_at"
+            ):
+                if self.ingest(issue):
+                    changed.append(issue)
+            self._advance_watermark(started_at)
+            return changed
+
+    def ingest(self, issue: GitlabIssue) -> bool:
+        """Applies an issue changed outside this process (delta sync, webhook) to the mirror, the
+        issue cache and the derived views; returns whether the mirror changed."""
+        if self.apply_issue(issue):
+            self.gitlab_service.issue_cache.put(issue)
+            self.gitlab_service.publish_issue(issue)
+            return True
+        if not self._is_okr_issue(issue):
+            self.gitlab_service.issue_cache.invalidate(issue.iid) # Drop a stale copy, if any
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._issues.clear()
+            self._complete = False
+            self._watermark = None
+            self._version += 1
+
+okr_mirror = OKRMirror(
+    gitlab_service,
+    objective_labels=settings.gitlab_objective_labels,
+    kr_labels=settings.gitlab_kr_labels,
+    overlap_seconds=settings.okr_sync_overlap_seconds,
+)
@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+class ProgressTotals(NamedTuple):
+    kr_count: int
+    total_meta_prevista: int
+    total_meta_realizada: int
+
+class ProgressIndex:
+    """Running per-objective sums of the KRs' meta prevista / meta realizada.
+
+    Like LinkIndex, an objective is only answered once its full KR set has been loaded
+    (``set_objective``); after that ``record_kr`` keeps the sums current in O(1) per write.
+    """
+
+    def __init__(self):
+        self._metas_by_objective: Dict[int, Dict[int, Tuple[int, int]]] = {}
+        self._totals: Dict[int, ProgressTotals] = {}
+        self._objective_by_kr: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def is_loaded(self, objective_iid: int) -> bool:
+        return objective_iid in self._metas_by_objective
+
+    def set_objective(self, objective_iid: int, metas_by_kr: Iterable[Tuple[int, int, int]]) -> None:
+        """Replaces the objective's KR set; metas_by_kr yields (kr_iid, meta_prevista, meta_realizada)."""
+        with self._lock:
+            for previous_kr in self._metas_by_objective.get(objective_iid, {}):
+                if self._objective_by_kr.get(previous_kr) == objective_iid:
+                    del self._objective_by_kr[previous_kr]
+            metas = {kr_iid: (prevista, realizada) for kr_iid, prevista, realizada in metas_by_kr}
+            self._metas_by_objective[objective_iid] = metas
+            self._totals[objective_iid] = ProgressTotals(
+                len(metas), sum(prevista for prevista, _ in metas.values()), sum(realizada for _, realizada in metas.values())
+            )
+            for kr_iid in metas:
+                self._objective_by_kr[kr_iid] = objective_iid
+
+    def record_kr(self, kr_iid: int, meta_prevista: int, meta_realizada: int, objective_iid: Optional[int] = None) -> None:
+        """Applies one KR write; objective_iid may be omitted when the KR is already known."""
+        with self._lock:
+            if objective_iid is None:
+                objective_iid = self._objective_by_kr.get(kr_iid)
+            if objective_iid is None:
+                return
+            previous_objective = self._objective_by_kr.get(kr_iid)
+            if previous_objective is not None and previous_objective != objective_iid:
+                self._discard(previous_objective, kr_iid)
+            self._objective_by_kr[kr_iid] = objective_iid
+            # Objectives not loaded yet stay unloaded: their other KRs are unknown.
+            metas = self._metas_by_objective.get(objective_iid)
+            if metas is None:
+                return
+            self._discard(objective_iid, kr_iid)
+            metas[kr_iid] = (meta_prevista, meta_realizada)
+            totals = self._totals[objective_iid]
+            self._totals[objective_iid] = ProgressTotals(
+                totals.kr_count + 1, totals.total_meta_prevista + meta_prevista, totals.total_meta_realizada + meta_realizada
+            )
+
+    def _discard(self, objective_iid: int, kr_iid: int) -> None:
+        metas = self._metas_by_objective.get(objective_iid)
+        if metas is None or kr_iid not in metas:
+            return
+        prevista, realizada = metas.pop(kr_iid)
+        totals = self._totals[objective_iid]
+        self._totals[objective_iid] = ProgressTotals(
+            totals.kr_count - 1, totals.total_meta_prevista - prevista, totals.total_meta_realizada - realizada
+        )
+
+    def remove_kr(self, kr_iid: int) -> None:
+        with self._lock:
+            objective_iid = self._objective_by_kr.pop(kr_iid, None)
+            if objective_iid is not None:
+                self._discard(objective_iid, kr_iid)
+
+    def invalidate_objective(self, objective_iid: int) -> None:
+        with self._lock:
+            for kr_iid in self._metas_by_objective.pop(objective_iid, {}):
+                if self._objective_by_kr.get(kr_iid) == objective_iid:
+                    del self._objective_by_kr[kr_iid]
+            self._totals.pop(objective_iid, None)
+
+    def totals_for(self, objective_iid: int) -> Optional[ProgressTotals]:
+        return self._totals.get(objective_iid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._metas_by_objective.clear()
+            self._totals.clear()
+            self._objective_by_kr.clear()
+
+progress_index = ProgressIndex()
@@ -0,0 +1,75 @@
+import asyncio
+import gitlab # For gitlab.exceptions
+from typing import List
+from app.services.gitlab_service import gitlab_service
+from app.services.okr_mirror import okr_mirror
+from app.services.objective_service import objective_service
+from app.services.kr_service import kr_service
+from app.services.kr_document import KRDocument
+from app.models import GitlabIssue, ObjectiveProgressResponse
+from app.config import settings
+
+class ProgressService:
+    """Objective-level rollup of the KRs' metas, served from kr_service.progress_index.
+
+    An objective's KRs are parsed once, on its first read; after that KRService keeps the
+    sums current on every create_kr/update_kr, so reads never re-fetch or re-parse the KRs.
+    The objectives listed come from the shared OKR mirror, not from a GitLab listing per call.
+    """
+
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.mirror = okr_mirror
+        self.objective_service = objective_service
+        self.kr_service = kr_service
+
+    async def _load_objective(self, objective_iid: int) -> None:
+        kr_issues = await self.kr_service.get_kr_issues_for_objective(objective_iid) or []
+        metas = []
+        for issue in kr_issues:
+            document = KRDocument.parse(issue.description)
+            metas.append((issue.iid, document.meta_prevista, document.meta_realizada))
+        self.kr_service.progress_index.set_objective(objective_iid, metas)
+
+    def _to_progress_response(self, objective: GitlabIssue) -> ObjectiveProgressResponse:
+        totals = self.kr_service.progress_index.totals_for(objective.iid)
+        kr_count = totals.kr_count if totals else 0
+        total_prevista = totals.total_meta_prevista if totals else 0
+        total_realizada = totals.total_meta_realizada if totals else 0
+        return ObjectiveProgressResponse(
+            objective_iid=objective.iid,
+            title=objective.title,
+            kr_count=kr_count,
+            meta_prevista=round(total_prevista / kr_count, 2) if kr_count else 0.0,
+            meta_realizada=round(total_realizada / kr_count, 2) if kr_count else 0.0,
+            progress_percent=round(100 * total_realizada / total_prevista, 2) if total_prevista else 0.0,
+        )
+
+    async def get_objective_progress(self, objective_iid: int) -> ObjectiveProgressResponse:
+        try:
+            objective = await self.gitlab_service.get_issue(objective_iid)
+        except gitlab.exceptions.GitlabGetError as e:
+            raise ValueError(f"Objective with IID {objective_iid} not found.") from e
+        if not self.kr_service.progress_index.is_loaded(objective_iid):
+            await self._load_objective(objective_iid)
+        return self._to_progress_response(objective)
+
+    async def list_objectives_progress(self) -> List[ObjectiveProgressResponse]:
+        await self.mirror.ensure_complete()
+        objective_labels = set(self.objective_service.objective_labels)
+        objectives: List[GitlabIssue] = [issue for issue in self.mirror.issues() if objective_labels.issubset(issue.labels or [])]
+
+        # Only objectives never read before need their KRs fetched; those load concurrently.
+        semaphore = asyncio.Semaphore(settings.gitlab_bulk_concurrency)
+
+        async def load(objective_iid: int) -> None:
+            async with semaphore:
+                await self._load_objective(objective_iid)
+
+        await asyncio.gather(*(
+            load(objective.iid) for objective in objectives
+            if not self.kr_service.progress_index.is_loaded(objective.iid)
+        ))
+        return [self._to_progress_response(objective) for objective in objectives]
+
+progress_service = ProgressService()
@@ -0,0 +1,162 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Mapping, Optional, Tuple
+
+# Lower value = served first.
+INTERACTIVE = 0
+BULK = 1
+
+_priority: ContextVar[int] = ContextVar("okr_gitlab_priority", default=INTERACTIVE)
+
+@contextmanager
+def bulk_priority() -> Iterator[None]:
+    """GitLab calls made inside this block (and tasks it spawns) yield to interactive ones."""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class GitlabRateLimiter:
+    """Token bucket shared by every coroutine that talks to GitLab through one GitlabService.
+
+    The refill rate starts at the configured value and then follows GitLab's own accounting:
+    each response's RateLimit-Remaining / RateLimit-Reset headers set the rate to what is left
+    in the window (minus a headroom), spread evenly until the reset. A 429 pauses everyone
+    until Retry-After, instead of each coroutine retrying on its own.
+
+    Waiters are served by priority, then arrival order, and bulk calls may not take the last
+    ``bulk_reserve`` tokens, so an interactive read never queues behind an import.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, headroom: float = 0.1, bulk_reserve: float = 0.25,
+                 clock: Callable[[], float] = time.monotonic, wall_clock: Callable[[], float] = time.time):
+        self.enabled = rate_per_second > 0
+        self.rate = rate_per_second
+        self.capacity = float(max(burst, 1))
+        self.headroom = headroom
+        self.bulk_reserve = min(self.capacity * bulk_reserve, self.capacity - 1.0)
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _needed(self, priority: int) -> float:
+        return 1.0 + (self.bulk_reserve if priority >= BULK else 0.0)
+
+    def _try_take(self, priority: int) -> bool:
+        self._refill()
+        if self._clock() < self._blocked_until or self._tokens < self._needed(priority):
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _delay(self, priority: int) -> float:
+        deficit = self._needed(priority) - self._tokens
+        delay = deficit / self.rate if deficit > 0 else 0.0
+        return max(delay, self._blocked_until - self._clock(), 0.001)
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """Waits for a token; returns the seconds spent waiting."""
+        if not self.enabled:
+            return 0.0
+        priority = current_priority() if priority is None else priority
+        # Fast path, unless someone at the same or a higher priority is already queued.
+        if (not self._waiters or self._waiters[0][0] > priority) and self._try_take(priority):
+            return 0.0
+
+        started = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not future.get_loop():
+            if self._pump_task is not None and self._pump_task.get_loop() is not future.get_loop():
+                # Left behind by a previous event loop (e.g. between test cases); its waiters are gone.
+                self._waiters = [entry for entry in self._waiters if entry[2].get_loop() is future.get_loop()]
+                heapq.heapify(self._waiters)
+            self._wake = asyncio.Event()
+            self._pump_task = asyncio.create_task(self._pump(self._wake))
+        elif self._wake is not None:
+            self._wake.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._tokens += 1.0 # Granted just as the caller went away: give the token back
+            raise
+        return self._clock() - started
+
+    async def _pump(self, wake: asyncio.Event) -> None:
+        # Hands out tokens to the queue head as they refill; a new head (higher priority) wakes it.
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done(): # Cancelled waiter
+                heapq.heappop(self._waiters)
+                continue
+            if self._try_take(priority):
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+                continue
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=self._delay(priority))
+            except asyncio.TimeoutError:
+                pass
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapts the bucket to the rate-limit headers of a GitLab response."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        reset_at = _header_float(headers, "RateLimit-Reset") # Unix time of the window reset
+        window_left = max(reset_at - self._wall_clock(), 1.0) if reset_at is not None else None
+
+        if status_code == 429:
+            retry_after = _header_float(headers, "Retry-After")
+            pause = retry_after if retry_after is not None else (window_left or 1.0)
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self._refill()
+            self._tokens = 0.0
+            return
+
+        remaining = _header_float(headers, "RateLimit-Remaining")
+        if remaining is None or window_left is None:
+            return # Endpoint or instance without rate limiting
+        usable = remaining * (1.0 - self.headroom)
+        self._refill()
+        if usable < 1.0:
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + window_left)
+            return
+        self._tokens = min(self._tokens, usable)
+        self.rate = usable / window_left
@@ -0,0 +1,62 @@
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+class RequestTiming:
+    """GitLab calls made while serving one API request, rendered as a Server-Timing header.
+
+    Child tasks (asyncio.gather) copy the context, so they share this object and their calls
+    are counted too; their durations overlap, so upstream time can exceed the request time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Thread CPU, not task CPU: with concurrent requests it also includes their work (an upper bound).
+        self.cpu_started = time.thread_time()
+        self.upstream_seconds = 0.0
+        self.upstream_calls = 0
+        # GitlabService method -> [HTTP requests, seconds]
+        self.by_method: Dict[str, List[float]] = {}
+
+    def record(self, method: str, seconds: float) -> None:
+        self.upstream_seconds += seconds
+        self.upstream_calls += 1
+        entry = self.by_method.get(method)
+        if entry is None:
+            self.by_method[method] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def header_value(self) -> str:
+        def calls(count: float) -> str:
+            return f'"{int(count)} call{"" if count == 1 else "s"}"'
+
+        total_ms = (time.perf_counter() - self.started) * 1000
+        cpu_ms = (time.thread_time() - self.cpu_started) * 1000
+        entries = [f"gitlab;dur={self.upstream_seconds * 1000:.1f};desc={calls(self.upstream_calls)}"]
+        # Most expensive first, so an N+1 pattern is the first thing after the total.
+        for method, (count, seconds) in sorted(self.by_method.items(), key=lambda item: -item[1][1]):
+            entries.append(f"gitlab.{method};dur={seconds * 1000:.1f};desc={calls(count)}")
+        entries.append(f"cpu;dur={cpu_ms:.1f}")
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+_current_request: ContextVar[Optional[RequestTiming]] = ContextVar("okr_request_timing", default=None)
+# Outermost GitlabService method running in this context (connect -> auth is attributed to connect).
+current_gitlab_method: ContextVar[Optional[str]] = ContextVar("okr_gitlab_method", default=None)
+
+def start_request() -> Token:
+    return _current_request.set(RequestTiming())
+
+def end_request(token: Token) -> None:
+    _current_request.reset(token)
+
+def current_request() -> Optional[RequestTiming]:
+    return _current_request.get()
+
+def record_upstream(seconds: float) -> None:
+    """Called for each HTTP request sent to GitLab; a no-op outside API requests (background sync)."""
+    timing = _current_request.get()
+    if timing is not None:
+        timing.record(current_gitlab_method.get() or "other", seconds)
@@ -0,0 +1,153 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.models import GitlabIssue, SearchResult
+from app.services.kr_document import KRDocument, iter_activities
+
+_TOKEN_RE = re.compile(r"\w+")
+# Portuguese function words that would match almost every document.
+STOPWORDS = frozenset({
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "que", "se", "ao", "aos",
+})
+# Title hits rank above activity hits, which rank above the free-text description.
+FIELD_WEIGHTS: Dict[str, float] = {"title": 3.0, "activities": 1.5, "description": 1.0}
+
+def fold(text: str) -> str:
+    """Lower-cases and strips accents, so "Ação" and "acao" are the same token."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(fold(text or "")) if token not in STOPWORDS]
+
+class _Document(NamedTuple):
+    version: Optional[str]
+    kind: str
+    title: str
+    web_url: str
+    terms: Dict[str, Tuple[float, Tuple[str, ...]]] # token -> (field-weighted tf, fields it occurs in)
+
+class SearchIndex:
+    """Inverted index over objective/KR titles, KR descriptions and activity rows.
+
+    Postings map each folded token to the issues containing it; ``index_issue`` replaces an
+    issue's postings, so the index follows every write without being rebuilt. Queries are
+    AND-ed and ranked by field-weighted TF-IDF.
+    """
+
+    def __init__(self, objective_labels: Iterable[str], kr_labels: Iterable[str]):
+        self.objective_labels = set(objective_labels)
+        self.kr_labels = set(kr_labels)
+        self._documents: Dict[int, _Document] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._warm = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def mark_warm(self) -> None:
+        self._warm = True
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _kind(self, issue: GitlabIssue) -> Optional[str]:
+        labels = set(issue.labels or [])
+        if self.kr_labels.issubset(labels):
+            return "kr"
+        if self.objective_labels.issubset(labels):
+            return "objective"
+        return None
+
+    @staticmethod
+    def _fields(issue: GitlabIssue, kind: str) -> Dict[str, str]:
+        if kind != "kr":
+            return {"title": issue.title, "description": issue.description or ""}
+        document = KRDocument.parse(issue.description)
+        activities = " ".join(
+            f"{activity.project_action_activity} {activity.stakeholders}" for activity in iter_activities(document.activities_table)
+        )
+        description = " ".join([document.description, *document.responsaveis])
+        return {"title": issue.title, "description": description, "activities": activities}
+
+    def _unindex(self, issue_iid: int) -> None:
+        previous = self._documents.pop(issue_iid, None)
+        if previous is None:
+            return
+        for token in previous.terms:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(issue_iid)
+                if not postings:
+                    del self._postings[token]
+
+    def index_issue(self, issue: GitlabIssue) -> None:
+        kind = self._kind(issue)
+        with self._lock:
+            previous = self._documents.get(issue.iid)
+            if previous is not None and previous.version and issue.updated_at and issue.updated_at <= previous.version:
+                return # Same or older snapshot than the one already indexed
+            self._unindex(issue.iid)
+            if kind is None:
+                return
+            counts: Dict[str, Dict[str, int]] = {}
+            for field, text in self._fields(issue, kind).items():
+                for token, count in Counter(tokenize(text)).items():
+                    counts.setdefault(token, {})[field] = count
+            # The per-document part of the score is fixed at index time; queries only multiply by idf.
+            terms = {
+                token: (sum(FIELD_WEIGHTS[field] * (1 + math.log(count)) for field, count in by_field.items()), tuple(sorted(by_field)))
+                for token, by_field in counts.items()
+            }
+            self._documents[issue.iid] = _Document(issue.updated_at, kind, issue.title, issue.web_url, terms)
+            for token in terms:
+                self._postings.setdefault(token, set()).add(issue.iid)
+
+    def remove_issue(self, issue_iid: int) -> None:
+        with self._lock:
+            self._unindex(issue_iid)
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[SearchResult]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            postings = [self._postings.get(token, set()) for token in tokens]
+            # Intersect starting from the rarest token, so the candidate set is small from the start.
+            candidates = set(min(postings, key=len))
+            for posting in postings:
+                candidates &= posting
+                if not candidates:
+                    return []
+            total = len(self._documents)
+            idf = {token: math.log(1 + total / len(posting)) for token, posting in zip(tokens, postings)}
+
+            documents = self._documents
+            scored = (
+                (sum(idf[token] * documents[iid].terms[token][0] for token in tokens), iid)
+                for iid in candidates
+                if not kind or documents[iid].kind == kind
+            )
+            top = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+            return [
+                SearchResult(
+                    iid=iid, kind=documents[iid].kind, title=documents[iid].title, web_url=documents[iid].web_url,
+                    score=round(score, 4),
+                    matched_fields=sorted({field for token in tokens for field in documents[iid].terms[token][1]}),
+                )
+                for score, iid in top
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._postings.clear()
+            self._warm = False
@@ -0,0 +1,35 @@
+from typing import List, Optional
+from app.services.gitlab_service import gitlab_service
+from app.services.okr_mirror import okr_mirror
+from app.services.objective_service import objective_service
+from app.services.kr_service import kr_service
+from app.services.search_index import SearchIndex
+from app.models import SearchResult
+
+class SearchService:
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.mirror = okr_mirror
+        self.objective_service = objective_service
+        self.kr_service = kr_service
+        self.index = SearchIndex(
+            objective_labels=self.objective_service.objective_labels, kr_labels=self.kr_service.kr_labels
+        )
+        # Every issue the service reads or writes is (re)indexed, so writes through the API are
+        # searchable immediately.
+        self.gitlab_service.add_issue_listener(self.index.index_issue)
+
+    async def ensure_warm(self) -> None:
+        # The first search indexes the objectives and KRs held by the shared mirror.
+        if self.index.is_warm:
+            return
+        await self.mirror.ensure_complete()
+        for issue in self.mirror.issues():
+            self.index.index_issue(issue)
+        self.index.mark_warm()
+
+    async def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[SearchResult]:
+        await self.ensure_warm()
+        return self.index.search(query, kind=kind, limit=limit)
+
+search_service = SearchService()
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import sqlite3
+from typing import Optional
+from app.services.okr_mirror import OKRMirror, okr_mirror
+from app.services.link_index import link_index
+from app.services.snapshot_store import OKRSnapshot, SnapshotStore
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SnapshotService:
+    """Persists the OKR mirror and the link graph so a new worker starts warm.
+
+    ``restore`` loads the snapshot, rebuilding the parsed KR documents and the derived views
+    from it with no GitLab calls. The sync engine then catches up with the issues updated after
+    its ``last_synced_at`` watermark.
+    """
+
+    def __init__(self, store: Optional[SnapshotStore] = None, mirror: Optional[OKRMirror] = None):
+        if store is None and settings.okr_snapshot_path:
+            store = SnapshotStore(settings.okr_snapshot_path)
+        self.store = store
+        self.mirror = okr_mirror if mirror is None else mirror
+        self.link_index = link_index
+        self._saved_version: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    async def restore(self) -> bool:
+        """Returns whether a snapshot was loaded."""
+        if self.store is None:
+            return False
+        try:
+            snapshot = await asyncio.to_thread(self.store.load)
+        except (sqlite3.Error, ValueError):
+            logger.warning("Ignoring unreadable OKR snapshot at %s", self.store.path, exc_info=True)
+            return False
+        if snapshot is None:
+            return False
+
+        for objective_iid, kr_iids in snapshot.links.items():
+            self.link_index.set_krs(objective_iid, kr_iids)
+        self.mirror.load(snapshot.issues, complete=snapshot.complete, watermark=snapshot.last_synced_at)
+        self._saved_version = self.mirror.version
+        logger.info("Loaded OKR snapshot: %d issues, %d objectives with links, synced at %s",
+                    len(snapshot.issues), len(snapshot.links), snapshot.last_synced_at)
+        return True
+
+    async def save(self) -> bool:
+        """Writes the current mirror; returns False when snapshots are disabled or nothing changed."""
+        if self.store is None or (not len(self.mirror) and self.mirror.watermark is None):
+            return False
+        version = self.mirror.version
+        if version == self._saved_version:
+            return False
+        snapshot = OKRSnapshot(
+            issues=self.mirror.issues(),
+            links=self.link_index.loaded_links(),
+            last_synced_at=self.mirror.watermark,
+            complete=self.mirror.is_complete,
+        )
+        await asyncio.to_thread(self.store.save, snapshot)
+        self._saved_version = version
+        return True
+
+snapshot_service = SnapshotService()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from app.models import GitlabIssue
+
+# Bumped whenever the tables change; a snapshot with another version is ignored (full scan instead).
+SCHEMA_VERSION = "1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS issues (iid INTEGER PRIMARY KEY, updated_at TEXT, payload TEXT NOT NULL);
+-- kr_iid is NULL for objectives whose (empty) KR set is known
+CREATE TABLE IF NOT EXISTS links (objective_iid INTEGER NOT NULL, kr_iid INTEGER);
+"""
+
+class OKRSnapshot(NamedTuple):
+    issues: List[GitlabIssue]
+    links: Dict[int, List[int]] # objective_iid -> kr_iids, only for objectives whose KR set was loaded
+    last_synced_at: Optional[datetime]
+    complete: bool # True when the issues came from a full scan, not only from individual reads
+
+class SnapshotStore:
+    """SQLite file holding the OKR mirror and the link graph between restarts.
+
+    ``save`` rewrites the whole snapshot in one transaction, so readers (other workers starting up)
+    never see a half-written state.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30.0)
+        connection.execute("PRAGMA journal_mode=WAL") # Workers can load while another one saves
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def load(self) -> Optional[OKRSnapshot]:
+        if not os.path.exists(self.path):
+            return None
+        with closing(self._connect()) as connection:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if meta.get("schema_version") != SCHEMA_VERSION:
+                return None
+            issues = [
+                GitlabIssue.model_validate_json(payload)
+                for (payload,) in connection.execute("SELECT payload FROM issues ORDER BY iid")
+            ]
+            links: Dict[int, List[int]] = {}
+            for objective_iid, kr_iid in connection.execute("SELECT objective_iid, kr_iid FROM links ORDER BY objective_iid, kr_iid"):
+                kr_iids = links.setdefault(objective_iid, [])
+                if kr_iid is not None:
+                    kr_iids.append(kr_iid)
+        last_synced_at = meta.get("last_synced_at")
+        return OKRSnapshot(
+            issues=issues,
+            links=links,
+            last_synced_at=datetime.fromisoformat(last_synced_at) if last_synced_at else None,
+            complete=meta.get("complete") == "1",
+        )
+
+    def save(self, snapshot: OKRSnapshot) -> None:
+        link_rows = [
+            (objective_iid, kr_iid)
+            for objective_iid, kr_iids in snapshot.links.items()
+            for kr_iid in (kr_iids or [None])
+        ]
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "last_synced_at": snapshot.last_synced_at.isoformat() if snapshot.last_synced_at else "",
+            "complete": "1" if snapshot.complete else "0",
+        }
+        with closing(self._connect()) as connection:
+            with connection: # One transaction: commit on success, rollback on error
+                connection.execute("DELETE FROM issues")
+                connection.execute("DELETE FROM links")
+                connection.execute("DELETE FROM meta")
+                connection.executemany(
+                    "INSERT INTO issues (iid, updated_at, payload) VALUES (?, ?, ?)",
+                    [(issue.iid, issue.updated_at, issue.model_dump_json()) for issue in snapshot.issues],
+                )
+                connection.executemany("INSERT INTO links (objective_iid, kr_iid) VALUES (?, ?)", link_rows)
+                connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
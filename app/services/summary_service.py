@@ -0,0 +1,39 @@
+from typing import List, Optional
+from app.services.gitlab_service import gitlab_service
+from app.services.okr_mirror import okr_mirror
+from app.services.objective_service import objective_service
+from app.services.kr_service import kr_service
+from app.services.summary_view import SummaryView
+from app.models import LabelSummary
+from app.config import settings
+
+class SummaryService:
+    def __init__(self):
+        self.gitlab_service = gitlab_service
+        self.mirror = okr_mirror
+        self.objective_service = objective_service
+        self.kr_service = kr_service
+        self.view = SummaryView(
+            objective_labels=self.objective_service.objective_labels,
+            kr_labels=self.kr_service.kr_labels,
+            excluded_labels=[self.kr_service.kr_reference_label],
+            at_risk_threshold_percent=settings.kr_at_risk_threshold_percent,
+        )
+        # Every issue the service reads or writes refreshes its rows of the view.
+        self.gitlab_service.add_issue_listener(self.view.apply_issue)
+
+    async def ensure_warm(self) -> None:
+        # Built from the shared OKR mirror: one scan (or a restored snapshot) feeds every derived
+        # view. Issues the listener already applied are skipped by their version check.
+        if self.view.is_warm:
+            return
+        await self.mirror.ensure_complete()
+        for issue in self.mirror.issues():
+            self.view.apply_issue(issue)
+        self.view.mark_warm()
+
+    async def get_summary(self, labels: Optional[List[str]] = None) -> List[LabelSummary]:
+        await self.ensure_warm()
+        return self.view.rows(labels)
+
+summary_service = SummaryService()
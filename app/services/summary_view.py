@@ -0,0 +1,136 @@
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.models import GitlabIssue, LabelSummary
+from app.services.kr_document import KRDocument
+
+class _Contribution(NamedTuple):
+    version: Optional[str] # updated_at of the issue this contribution was computed from
+    kind: str # "objective" or "kr"
+    groups: Tuple[str, ...]
+    meta_prevista: int
+    meta_realizada: int
+    at_risk: bool
+
+class _GroupTotals:
+    __slots__ = ("objective_count", "kr_count", "total_meta_prevista", "total_meta_realizada", "at_risk_krs")
+
+    def __init__(self):
+        self.objective_count = 0
+        self.kr_count = 0
+        self.total_meta_prevista = 0
+        self.total_meta_realizada = 0
+        self.at_risk_krs: Set[int] = set()
+
+    def is_empty(self) -> bool:
+        return self.objective_count == 0 and self.kr_count == 0
+
+class SummaryView:
+    """Materialized per-label summary of objectives and KRs (one row per team/product label).
+
+    Every issue contributes to the rows of its non-OKR labels. ``apply_issue`` swaps an issue's
+    previous contribution for the new one, so keeping the view current costs O(labels) per
+    changed issue and reading it never touches GitLab.
+    """
+
+    def __init__(self, objective_labels: Iterable[str], kr_labels: Iterable[str],
+                 excluded_labels: Iterable[str] = (), at_risk_threshold_percent: float = 50.0):
+        self.objective_labels = set(objective_labels)
+        self.kr_labels = set(kr_labels)
+        self.excluded_labels = self.objective_labels | self.kr_labels | set(excluded_labels)
+        self.at_risk_threshold_percent = at_risk_threshold_percent
+        self._contributions: Dict[int, _Contribution] = {}
+        self._groups: Dict[str, _GroupTotals] = {}
+        self._warm = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def mark_warm(self) -> None:
+        self._warm = True
+
+    def _kind(self, issue: GitlabIssue) -> Optional[str]:
+        labels = set(issue.labels or [])
+        if self.kr_labels.issubset(labels):
+            return "kr"
+        if self.objective_labels.issubset(labels):
+            return "objective"
+        return None
+
+    def _is_at_risk(self, issue: GitlabIssue, meta_prevista: int, meta_realizada: int) -> bool:
+        if issue.state == "closed" or meta_prevista <= 0:
+            return False
+        return 100 * meta_realizada < self.at_risk_threshold_percent * meta_prevista
+
+    def _contribution(self, issue: GitlabIssue, kind: str) -> _Contribution:
+        groups = tuple(sorted(label for label in (issue.labels or []) if label not in self.excluded_labels))
+        if kind != "kr":
+            return _Contribution(issue.updated_at, kind, groups, 0, 0, False)
+        document = KRDocument.parse(issue.description)
+        at_risk = self._is_at_risk(issue, document.meta_prevista, document.meta_realizada)
+        return _Contribution(issue.updated_at, kind, groups, document.meta_prevista, document.meta_realizada, at_risk)
+
+    def _add(self, iid: int, contribution: _Contribution, sign: int) -> None:
+        for group in contribution.groups:
+            totals = self._groups.get(group)
+            if totals is None:
+                totals = self._groups[group] = _GroupTotals()
+            if contribution.kind == "objective":
+                totals.objective_count += sign
+            else:
+                totals.kr_count += sign
+                totals.total_meta_prevista += sign * contribution.meta_prevista
+                totals.total_meta_realizada += sign * contribution.meta_realizada
+                if contribution.at_risk and sign > 0:
+                    totals.at_risk_krs.add(iid)
+                else:
+                    totals.at_risk_krs.discard(iid)
+            if totals.is_empty():
+                del self._groups[group]
+
+    def apply_issue(self, issue: GitlabIssue) -> None:
+        kind = self._kind(issue)
+        with self._lock:
+            previous = self._contributions.get(issue.iid)
+            if previous is not None and previous.version and issue.updated_at and issue.updated_at <= previous.version:
+                return # Same or older snapshot than the one already applied
+            if kind is None:
+                if previous is not None:
+                    self._add(issue.iid, self._contributions.pop(issue.iid), -1)
+                return
+            contribution = self._contribution(issue, kind)
+            if previous is not None:
+                self._add(issue.iid, previous, -1)
+            self._contributions[issue.iid] = contribution
+            self._add(issue.iid, contribution, +1)
+
+    def remove_issue(self, issue_iid: int) -> None:
+        with self._lock:
+            previous = self._contributions.pop(issue_iid, None)
+            if previous is not None:
+                self._add(issue_iid, previous, -1)
+
+    def rows(self, labels: Optional[Iterable[str]] = None) -> List[LabelSummary]:
+        wanted = set(labels) if labels else None
+        with self._lock:
+            return [
+                LabelSummary(
+                    label=label,
+                    objective_count=totals.objective_count,
+                    kr_count=totals.kr_count,
+                    progress_percent=round(100 * totals.total_meta_realizada / totals.total_meta_prevista, 2)
+                    if totals.total_meta_prevista else 0.0,
+                    at_risk_kr_count=len(totals.at_risk_krs),
+                    at_risk_kr_iids=sorted(totals.at_risk_krs),
+                )
+                for label, totals in sorted(self._groups.items())
+                if wanted is None or label in wanted
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contributions.clear()
+            self._groups.clear()
+            self._warm = False
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.services.okr_mirror import OKRMirror, okr_mirror
+from app.services.link_index import link_index
+from app.services.progress_index import progress_index
+from app.services.snapshot_service import snapshot_service
+from app.services.rate_limiter import bulk_priority
+from app.models import GitlabIssue, SyncStatus
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SyncService:
+    """Background delta sync that keeps the local OKR state fresh without re-listing the project.
+
+    Every poll lists only the issues updated after the mirror's watermark, oldest first. It applies
+    them to the issue cache, the mirror and the derived views, and drops the link-graph entries
+    they may affect. Upstream cost follows the change rate, not the project size.
+    """
+
+    def __init__(self, mirror: Optional[OKRMirror] = None, interval_seconds: Optional[float] = None):
+        self.mirror = okr_mirror if mirror is None else mirror
+        self.link_index = link_index
+        self.progress_index = progress_index
+        self.snapshot_service = snapshot_service
+        self.interval_seconds = settings.okr_sync_interval_seconds if interval_seconds is None else interval_seconds
+        self.snapshot_save_interval_seconds = settings.okr_snapshot_save_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._last_success_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+        self._last_changed_count = 0
+        self._total_changed_count = 0
+
+    async def sync_once(self) -> List[GitlabIssue]:
+        """One poll; returns the issues that changed locally. Errors are recorded and re-raised."""
+        try:
+            with bulk_priority(): # Background polling must not slow down interactive reads
+                changed = await self.mirror.sync_delta()
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            raise
+        for issue in changed:
+            self.invalidate_links(issue)
+        self._last_success_at = datetime.now(timezone.utc)
+        self._last_error = None
+        self._last_changed_count = len(changed)
+        self._total_changed_count += len(changed)
+        if changed:
+            logger.info("Delta sync applied %d changed issues", len(changed))
+        return changed
+
+    def apply_issue(self, issue: GitlabIssue) -> bool:
+        """Applies one pushed issue (webhook) the same way a poll would; returns whether it changed."""
+        if not self.mirror.ingest(issue):
+            return False
+        self.invalidate_links(issue)
+        return True
+
+    async def refresh_issue(self, issue_iid: int) -> bool:
+        """Re-reads one issue from GitLab and applies it; returns whether the mirror changed."""
+        version = self.mirror.version
+        # The fresh read goes through the issue listeners, so the mirror and the views apply it.
+        issue = await self.mirror.gitlab_service.get_issue(issue_iid, fresh=True)
+        if self.mirror.version == version:
+            return False
+        self.invalidate_links(issue)
+        return True
+
+    def invalidate_links(self, issue: GitlabIssue) -> None:
+        # Links are not part of the issue payload, so the KR sets a changed issue may belong to
+        # are dropped and reloaded from GitLab on their next read.
+        for objective_iid in {issue.iid, self.link_index.objective_for(issue.iid)}:
+            if objective_iid is not None:
+                self.link_index.invalidate_objective(objective_iid)
+                self.progress_index.invalidate_objective(objective_iid)
+
+    async def _run(self) -> None:
+        last_saved_at = time.monotonic()
+        while True:
+            try:
+                await self.sync_once()
+            except Exception:
+                # Keep polling: the next run starts from the same watermark, so nothing is lost.
+                logger.warning("Delta sync with GitLab failed", exc_info=True)
+            else:
+                if time.monotonic() - last_saved_at >= self.snapshot_save_interval_seconds:
+                    last_saved_at = time.monotonic()
+                    try:
+                        await self.snapshot_service.save()
+                    except Exception:
+                        logger.warning("Could not save the OKR snapshot", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> bool:
+        """Starts the polling task (no-op when disabled or already running)."""
+        if self.interval_seconds <= 0 or self.is_running:
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def status(self) -> SyncStatus:
+        watermark = self.mirror.watermark
+        lag_seconds = None
+        if watermark is not None:
+            lag_seconds = round((datetime.now(timezone.utc) - watermark).total_seconds(), 3)
+        return SyncStatus(
+            running=self.is_running,
+            interval_seconds=self.interval_seconds,
+            watermark=watermark,
+            lag_seconds=lag_seconds,
+            last_success_at=self._last_success_at,
+            last_error=self._last_error,
+            last_changed_count=self._last_changed_count,
+            total_changed_count=self._total_changed_count,
+            mirrored_issue_count=len(self.mirror),
+            mirror_complete=self.mirror.is_complete,
+        )
+
+sync_service = SyncService()
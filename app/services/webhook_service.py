@@ -0,0 +1,124 @@
+import hmac
+import logging
+import gitlab # For gitlab.exceptions
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from app.services.okr_mirror import parse_gitlab_timestamp
+from app.services.sync_service import sync_service, SyncService
+from app.models import GitlabIssue, WebhookResult
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ISSUE_EVENTS = frozenset({"Issue Hook", "Confidential Issue Hook"})
+_HOOK_TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%d %H:%M:%S %z")
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """Rewrites a hook timestamp in the REST API format ("2025-01-01T12:00:00.000Z").
+
+    Hooks send "2025-01-01 12:00:00 UTC" (older GitLab) or ISO 8601. The mirror and the views
+    compare REST versions as strings, so both sources have to use the same format; hook versions
+    are only precise to the second (see ``WebhookService.handle_event``).
+    """
+    if not value:
+        return None
+    parsed: Optional[datetime] = None
+    for fmt in _HOOK_TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+            break
+        except ValueError:
+            continue
+    if parsed is None:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%S.") + f"{parsed.microsecond // 1000:03d}Z"
+
+def issue_from_hook(payload: Dict[str, Any]) -> GitlabIssue:
+    """Maps an Issue Hook payload to the issue the REST API would have returned (no refetch)."""
+    attributes = payload.get("object_attributes") or {}
+    label_entries = payload.get("labels")
+    if label_entries is None:
+        label_entries = attributes.get("labels") or []
+    return GitlabIssue(
+        iid=attributes["iid"],
+        title=attributes.get("title") or "",
+        description=attributes.get("description"),
+        web_url=attributes.get("url") or "",
+        labels=[entry["title"] for entry in label_entries if isinstance(entry, dict) and entry.get("title")],
+        state=attributes.get("state"),
+        updated_at=normalize_timestamp(attributes.get("updated_at")),
+    )
+
+def _same_content(issue: GitlabIssue, other: GitlabIssue) -> bool:
+    return (issue.title, issue.description, sorted(issue.labels), issue.state) == \
+        (other.title, other.description, sorted(other.labels), other.state)
+
+class WebhookService:
+    """Applies GitLab Issue Hook events to the in-process cache, mirror and indexes.
+
+    Payloads are versioned by ``updated_at``, compared at second granularity because hooks drop
+    the milliseconds the REST API sends. An event from an earlier second than the mirrored issue,
+    or a same-second redelivery of it, changes nothing. A different issue in the same second may
+    be the newer edit or an older one delivered late, so the issue is re-read from GitLab.
+    """
+
+    def __init__(self, secret: Optional[str] = None, project_id: Optional[str] = None):
+        self.secret = settings.gitlab_webhook_secret if secret is None else secret
+        self.project_id = str(settings.gitlab_project_id if project_id is None else project_id)
+        self.sync_service: SyncService = sync_service
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret)
+
+    def verify_token(self, token: Optional[str]) -> bool:
+        if not self.secret or token is None:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.secret.encode("utf-8"))
+
+    def _is_own_project(self, payload: Dict[str, Any]) -> bool:
+        project = payload.get("project") or {}
+        return self.project_id in (str(project.get("id")), project.get("path_with_namespace"))
+
+    async def _refresh(self, issue: GitlabIssue) -> bool:
+        try:
+            return await self.sync_service.refresh_issue(issue.iid)
+        except gitlab.exceptions.GitlabError:
+            # The next delta sync lists the issue again (it was just updated); until then, reads refetch it.
+            logger.warning("Could not re-read issue %s after an ambiguous Issue Hook", issue.iid, exc_info=True)
+            self.sync_service.mirror.gitlab_service.issue_cache.invalidate(issue.iid)
+            self.sync_service.invalidate_links(issue)
+            return False
+
+    async def handle_event(self, event: Optional[str], payload: Dict[str, Any]) -> WebhookResult:
+        if event not in ISSUE_EVENTS or payload.get("object_kind") != "issue":
+            return WebhookResult(status="ignored", detail=f"Unsupported event: {event}")
+        if not self._is_own_project(payload):
+            return WebhookResult(status="ignored", detail="Event from another project")
+        try:
+            issue = issue_from_hook(payload)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed Issue Hook payload: {e}") from e
+
+        current = self.sync_service.mirror.get(issue.iid)
+        if current is not None and current.updated_at and issue.updated_at:
+            hook_second = parse_gitlab_timestamp(issue.updated_at).replace(microsecond=0)
+            current_second = parse_gitlab_timestamp(current.updated_at).replace(microsecond=0)
+            if hook_second < current_second or (hook_second == current_second and _same_content(issue, current)):
+                return WebhookResult(status="unchanged", issue_iid=issue.iid)
+            if hook_second == current_second:
+                changed = await self._refresh(issue)
+                return WebhookResult(status="applied" if changed else "unchanged", issue_iid=issue.iid)
+
+        changed = self.sync_service.apply_issue(issue)
+        if changed:
+            logger.info("Applied Issue Hook for issue %s (%s)", issue.iid, (payload.get("object_attributes") or {}).get("action"))
+        return WebhookResult(status="applied" if changed else "unchanged", issue_iid=issue.iid)
+
+webhook_service = WebhookService()
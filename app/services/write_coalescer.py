@@ -0,0 +1,52 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, DefaultDict, Dict, Generic, Hashable, List, Set, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class _PendingBatch(Generic[T, R]):
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.items: List[T] = []
+        self.future: "asyncio.Future[R]" = loop.create_future()
+
+class WriteCoalescer(Generic[T, R]):
+    """Merges writes to the same key that arrive within a short window into one apply() call.
+
+    Every submitter of a batch receives the result of that single apply(). Batches for the same
+    key are applied one at a time, so read-modify-write cycles never interleave.
+    """
+
+    def __init__(self, apply: Callable[[Hashable, List[T]], Awaitable[R]], window_seconds: float):
+        self._apply = apply
+        self.window_seconds = window_seconds
+        self._pending: Dict[Hashable, _PendingBatch[T, R]] = {}
+        self._locks: DefaultDict[Hashable, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def submit(self, key: Hashable, item: T) -> R:
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(asyncio.get_running_loop())
+            self._pending[key] = batch
+            task = asyncio.ensure_future(self._flush(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.items.append(item)
+        # shield: one caller giving up must not cancel the write for everyone else in the batch.
+        return await asyncio.shield(batch.future)
+
+    async def _flush(self, key: Hashable, batch: _PendingBatch[T, R]) -> None:
+        await asyncio.sleep(self.window_seconds)
+        async with self._locks[key]:
+            # Items that arrived while the previous batch held the lock still join this one.
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            try:
+                result = await self._apply(key, batch.items)
+            except Exception as e:
+                batch.future.set_exception(e)
+            else:
+                batch.future.set_result(result)
+        if key not in self._pending and not self._locks[key].locked():
+            del self._locks[key]
@@ -0,0 +1,69 @@
+"""Micro-benchmark: KRDocument parse + serialize vs. the previous regex-based update_kr rewrite.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_kr_document
+"""
+import re
+import timeit
+
+from app.services.kr_document import KRDocument, DEFAULT_ACTIVITIES_TABLE
+
+def legacy_rewrite(current_description: str) -> str:
+    # The description rewrite update_kr did before KRDocument (five searches over the full text).
+    current_quoted_desc_match = re.search(r"### Descrição\s*((?:> .*(?:\n|$))+)", current_description, re.MULTILINE)
+    current_quoted_desc_content = ""
+    if current_quoted_desc_match:
+        lines = current_quoted_desc_match.group(1).strip().split('\n')
+        current_quoted_desc_content = "\n".join([line[2:] if line.startswith("> ") else line for line in lines])
+    if current_quoted_desc_content.strip():
+        quoted_block = "\n".join([f"> {line}" for line in current_quoted_desc_content.splitlines()])
+    else:
+        quoted_block = "> (Descrição não fornecida)"
+    meta_prevista_match = re.search(r"\*\*Meta prevista\*\*: ([\d\.]+)\s*%", current_description)
+    meta_prevista = int(float(meta_prevista_match.group(1))) if meta_prevista_match else 0
+    meta_realizada_match = re.search(r"\*\*Meta realizada\*\*: ([\d\.]+)\s*%", current_description)
+    meta_realizada = int(float(meta_realizada_match.group(1))) if meta_realizada_match else 0
+    responsaveis_match = re.search(r"\*\*Responsável\(eis\)\*\*: ([^\n]+)", current_description)
+    responsaveis_str = responsaveis_match.group(1).strip() if responsaveis_match else "N/A"
+    header = DEFAULT_ACTIVITIES_TABLE.split("\n")[0]
+    header_search_match = re.search(re.escape(header), current_description, re.IGNORECASE)
+    if header_search_match:
+        table = current_description[header_search_match.start():].replace('\r\n', '\n')
+    else:
+        table = DEFAULT_ACTIVITIES_TABLE
+    parts = [
+        "### Descrição", "", quoted_block, "",
+        f"**Meta prevista**: {meta_prevista}%  ",
+        f"**Meta realizada**: {meta_realizada}%  ",
+        f"**Responsável(eis)**: {responsaveis_str}  ",
+        "", table.strip(),
+    ]
+    return re.sub(r'\n{3,}', '\n\n', "\n".join(parts)).strip()
+
+def document_rewrite(current_description: str) -> str:
+    return KRDocument.parse(current_description).to_markdown()
+
+def sample_description(rows: int) -> str:
+    document = KRDocument(
+        description="Aumentar a cobertura de testes\ndos serviços críticos.",
+        meta_prevista=80,
+        meta_realizada=35,
+        responsaveis=["Ana", "Bruno"],
+    )
+    activity_rows = [f"| Atividade {i} | Time {i % 7} | 2025-{i % 12 + 1:02d} |  | 10% | 5% |" for i in range(rows)]
+    document.activities_table = "\n".join([DEFAULT_ACTIVITIES_TABLE, *activity_rows])
+    return document.to_markdown()
+
+def main() -> None:
+    print(f"{'rows':>6} {'legacy (us)':>12} {'KRDocument (us)':>16} {'speedup':>8}")
+    for rows in (0, 10, 100, 1000, 10000):
+        text = sample_description(rows)
+        assert legacy_rewrite(text) == document_rewrite(text)
+        number = max(10, 20000 // (rows + 1))
+        legacy = min(timeit.repeat(lambda: legacy_rewrite(text), number=number, repeat=5)) / number
+        current = min(timeit.repeat(lambda: document_rewrite(text), number=number, repeat=5)) / number
+        print(f"{rows:>6} {legacy * 1e6:>12.1f} {current * 1e6:>16.1f} {legacy / current:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
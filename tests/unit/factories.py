@@ -0,0 +1,56 @@
+"""Builders for the GitLab issues (and the clock) the unit tests feed to the services."""
+from typing import Iterable, Optional, Sequence, Tuple
+
+from app.models import Activity, GitlabIssue
+from app.services.kr_document import KRDocument, DEFAULT_ACTIVITIES_TABLE, format_activity_row
+
+OBJECTIVE_LABELS = ["OKR::Objetivo"]
+KR_LABELS = ["OKR::Resultado Chave"]
+UPDATED_AT = "2025-01-01T00:00:00.000Z"
+
+def make_issue(iid: int, labels: Iterable[str] = (), title: Optional[str] = None, description: str = "",
+               state: Optional[str] = None, updated_at: Optional[str] = UPDATED_AT) -> GitlabIssue:
+    return GitlabIssue(iid=iid, title=title or f"Issue {iid}", description=description, labels=list(labels),
+                       web_url=f"https://fakegitlab.com/issues/{iid}", state=state, updated_at=updated_at)
+
+def make_objective(iid: int, *groups: str, title: Optional[str] = None, updated_at: str = UPDATED_AT) -> GitlabIssue:
+    # ``groups`` are the team/product labels next to the objective labels.
+    return make_issue(iid, OBJECTIVE_LABELS + list(groups), title=title or f"OBJ{iid}: X", updated_at=updated_at)
+
+def make_kr(iid: int, meta_prevista: int = 100, meta_realizada: int = 0, *groups: str, title: Optional[str] = None,
+            description: str = "", responsaveis: Sequence[str] = (), activities: Iterable[Tuple[str, str, int]] = (),
+            state: str = "opened", updated_at: str = UPDATED_AT) -> GitlabIssue:
+    # ``activities`` are (name, deadline_planned, progress_achieved_percent) rows of the activities table.
+    document = KRDocument(description=description, meta_prevista=meta_prevista, meta_realizada=meta_realizada,
+                          responsaveis=list(responsaveis))
+    rows = [
+        format_activity_row(Activity(project_action_activity=name, stakeholders="Equipe", deadline_planned=deadline,
+                                     progress_planned_percent=100, progress_achieved_percent=achieved))
+        for name, deadline, achieved in activities
+    ]
+    document.activities_table = "\n".join([DEFAULT_ACTIVITIES_TABLE, *rows])
+    return make_issue(iid, KR_LABELS + list(groups), title=title or f"KR {iid}", description=document.to_markdown(),
+                      state=state, updated_at=updated_at)
+
+def issue_json(iid: int, **overrides) -> dict:
+    """An issue as the GitLab REST API returns it."""
+    data = {
+        "iid": iid,
+        "title": f"Issue {iid}",
+        "description": f"Description {iid}",
+        "web_url": f"https://fakegitlab.com/group/project/-/issues/{iid}",
+        "labels": list(OBJECTIVE_LABELS),
+        "state": "opened",
+        "updated_at": UPDATED_AT,
+    }
+    data.update(overrides)
+    return data
+
+class FakeClock:
+    """Monotonic clock the tests move by hand (``clock.now += 30``)."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
@@ -1,13 +1,17 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch
 from app.services.activity_service import ActivityService
+from app.services.kr_document import iter_activities
+from app.services.gitlab_service import GitlabService
 from app.models import Activity
-from gitlab.v4.objects import ProjectIssue # For mocking
+from app.models import GitlabIssue # For mocking
+from gitlab.exceptions import GitlabGetError
 
-class TestActivityService(unittest.TestCase):
+class TestActivityService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.mock_gitlab_service_instance = MagicMock()
+        self.mock_gitlab_service_instance = MagicMock(spec=GitlabService)
 
         # Patch the 'gitlab_service' instance within 'app.services.activity_service'
         self.gitlab_service_patcher = patch('app.services.activity_service.gitlab_service', self.mock_gitlab_service_instance)
@@ -23,7 +27,7 @@ class TestActivityService(unittest.TestCase):
     def tearDown(self):
         self.gitlab_service_patcher.stop()
 
-    def test_serialize_activity_to_table_row(self):
+    async def test_serialize_activity_to_table_row(self):
         activity = Activity(
             project_action_activity="Develop feature X",
             stakeholders="Team Alpha",
@@ -48,9 +52,9 @@ class TestActivityService(unittest.TestCase):
         expected_row_empty_achieved = "| Plan phase 2 | Product Owner | Q2/2024 |  | 50% | 0% |"
         self.assertEqual(self.activity_service._serialize_activity_to_table_row(activity_empty_achieved), expected_row_empty_achieved)
 
-    def test_add_activities_to_kr_description_new_activities(self):
+    async def test_add_activities_to_kr_description_new_activities(self):
         kr_iid = 1
-        mock_kr_issue = MagicMock(spec=ProjectIssue)
+        mock_kr_issue = MagicMock(spec=GitlabIssue)
         mock_kr_issue.description = "### KR Details\nSome existing content." # Initial description
 
         self.mock_gitlab_service_instance_patched.get_issue.return_value = mock_kr_issue
@@ -65,9 +69,9 @@ class TestActivityService(unittest.TestCase):
         expected_row2 = "| Activity 2 | User B |  Завтра  |  | 100% | 0% |"
 
         # Call the method under test
-        updated_description = self.activity_service.add_activities_to_kr_description(kr_iid, activities_to_add)
+        updated_description = await self.activity_service.add_activities_to_kr_description(kr_iid, activities_to_add)
 
-        self.mock_gitlab_service_instance_patched.get_issue.assert_called_once_with(kr_iid)
+        self.mock_gitlab_service_instance_patched.get_issue.assert_called_once_with(kr_iid, fresh=True)
 
         expected_final_description = mock_kr_issue.description.rstrip() + "\n" + expected_row1 + "\n" + expected_row2
 
@@ -77,9 +81,9 @@ class TestActivityService(unittest.TestCase):
         )
         self.assertEqual(updated_description, expected_final_description)
 
-    def test_add_activities_to_kr_description_empty_initial_description(self):
+    async def test_add_activities_to_kr_description_empty_initial_description(self):
         kr_iid = 2
-        mock_kr_issue = MagicMock(spec=ProjectIssue)
+        mock_kr_issue = MagicMock(spec=GitlabIssue)
         mock_kr_issue.description = "" # Empty initial description
 
         self.mock_gitlab_service_instance_patched.get_issue.return_value = mock_kr_issue
@@ -93,7 +97,7 @@ class TestActivityService(unittest.TestCase):
         expected_separator = "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
         expected_final_description = f"{expected_header}\n{expected_separator}\n{expected_row}"
 
-        updated_description = self.activity_service.add_activities_to_kr_description(kr_iid, activities_to_add)
+        updated_description = await self.activity_service.add_activities_to_kr_description(kr_iid, activities_to_add)
 
         self.mock_gitlab_service_instance_patched.update_issue.assert_called_once_with(
             issue_iid=kr_iid,
@@ -101,6 +105,132 @@ class TestActivityService(unittest.TestCase):
         )
         self.assertEqual(updated_description, expected_final_description)
 
+    async def test_concurrent_appends_to_same_kr_are_coalesced(self):
+        kr_iid = 3
+        mock_kr_issue = MagicMock(spec=GitlabIssue)
+        mock_kr_issue.description = "### KR"
+        self.mock_gitlab_service_instance_patched.get_issue.return_value = mock_kr_issue
+
+        def activity(name):
+            return Activity(project_action_activity=name, stakeholders="S", deadline_planned="Q1",
+                            progress_planned_percent=100, progress_achieved_percent=0)
+
+        results = await asyncio.gather(*(
+            self.activity_service.add_activities_to_kr_description(kr_iid, [activity(name)]) for name in ["A", "B", "C"]
+        ))
+
+        self.mock_gitlab_service_instance_patched.get_issue.assert_called_once_with(kr_iid, fresh=True)
+        self.mock_gitlab_service_instance_patched.update_issue.assert_called_once()
+        final_description = self.mock_gitlab_service_instance_patched.update_issue.call_args.kwargs['description']
+        for name in ["A", "B", "C"]:
+            self.assertIn(f"| {name} | S |", final_description)
+        self.assertEqual(results, [final_description] * 3)
+
+    async def test_add_activities_bulk_reports_partial_failures(self):
+        descriptions = {1: "### KR 1", 3: "### KR 3"}
+
+        async def get_issue(kr_iid, fresh=False):
+            if kr_iid not in descriptions:
+                raise GitlabGetError("404 Not found", 404)
+            issue = MagicMock(spec=GitlabIssue)
+            issue.description = descriptions[kr_iid]
+            return issue
+        self.mock_gitlab_service_instance_patched.get_issue.side_effect = get_issue
+
+        activity = Activity(project_action_activity="A", stakeholders="S", deadline_planned="Q1",
+                            progress_planned_percent=100, progress_achieved_percent=0)
+
+        results = await self.activity_service.add_activities_bulk({1: [activity], 2: [activity], 3: [activity, activity]})
+
+        by_kr = {result.kr_iid: result for result in results}
+        self.assertTrue(by_kr[1].success)
+        self.assertEqual(by_kr[1].description, "### KR 1\n| A | S | Q1 |  | 100% | 0% |")
+        self.assertFalse(by_kr[2].success)
+        self.assertEqual(by_kr[2].error, "KR with IID 2 not found.")
+        self.assertTrue(by_kr[3].success)
+        self.assertEqual(by_kr[3].description.count("| A |"), 2)
+        self.assertEqual(self.mock_gitlab_service_instance_patched.update_issue.call_count, 2)
+
+    async def test_add_activities_bulk_reports_upstream_errors_as_they_are(self):
+        async def get_issue(kr_iid, fresh=False):
+            raise GitlabGetError("502 Bad Gateway", 502)
+        self.mock_gitlab_service_instance_patched.get_issue.side_effect = get_issue
+
+        activity = Activity(project_action_activity="A", stakeholders="S", deadline_planned="Q1",
+                            progress_planned_percent=100)
+
+        results = await self.activity_service.add_activities_bulk({7: [activity]})
+
+        self.assertFalse(results[0].success)
+        self.assertIn("502 Bad Gateway", results[0].error)
+        self.assertNotIn("not found", results[0].error)
+
+    async def test_add_activities_bulk_bounds_concurrency(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def get_issue(kr_iid, fresh=False):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            issue = MagicMock(spec=GitlabIssue)
+            issue.description = "x"
+            return issue
+        self.mock_gitlab_service_instance_patched.get_issue.side_effect = get_issue
+
+        activity = Activity(project_action_activity="A", stakeholders="S", deadline_planned="Q1",
+                            progress_planned_percent=100)
+        with patch('app.services.activity_service.settings.gitlab_bulk_concurrency', 3):
+            results = await self.activity_service.add_activities_bulk({iid: [activity] for iid in range(1, 11)})
+
+        self.assertEqual(len(results), 10)
+        self.assertLessEqual(max_in_flight, 3)
+
+
+    def _kr_issue_with_rows(self, rows):
+        issue = MagicMock(spec=GitlabIssue)
+        issue.description = (
+            "### Descrição\n\n> KR\n\n"
+            "| Projetos/Ações/Atividades | Partes interessadas | Prazo Previsto | Prazo Realizado | % Previsto | % Realizado |\n"
+            "|---------------------------|----------------------|----------------|-----------------|------------|-------------|\n"
+            + "\n".join(rows)
+        )
+        return issue
+
+    async def test_get_activities_for_kr_parses_table_with_offset_and_limit(self):
+        rows = [f"| Ação {i} | Time {i} | Q{i} |  | {i * 10}% | {i}% |" for i in range(1, 6)]
+        self.mock_gitlab_service_instance_patched.get_issue.return_value = self._kr_issue_with_rows(rows)
+
+        activities, total = await self.activity_service.get_activities_for_kr(7, offset=1, limit=2)
+
+        self.assertEqual(total, 5)
+        self.assertEqual([activity.project_action_activity for activity in activities], ["Ação 2", "Ação 3"])
+        self.assertIsNone(activities[0].deadline_achieved)
+        self.assertEqual(activities[1].progress_planned_percent, 30)
+        self.assertEqual(activities[1].progress_achieved_percent, 3)
+
+    async def test_get_activities_for_kr_reuses_parse_until_description_changes(self):
+        issue = self._kr_issue_with_rows(["| A | S | Q1 |  | 10% | 0% |"])
+        self.mock_gitlab_service_instance_patched.get_issue.return_value = issue
+
+        with patch('app.services.activity_service.iter_activities', wraps=iter_activities) as parser:
+            await self.activity_service.get_activities_for_kr(7)
+            await self.activity_service.get_activities_for_kr(7)
+            self.assertEqual(parser.call_count, 1)
+
+            issue.description += "\n| B | S | Q2 |  | 20% | 0% |"
+            activities, total = await self.activity_service.get_activities_for_kr(7)
+            self.assertEqual(parser.call_count, 2)
+        self.assertEqual(total, 2)
+
+    async def test_get_activities_for_kr_not_found(self):
+        self.mock_gitlab_service_instance_patched.get_issue.side_effect = GitlabGetError("404 Not Found", 404)
+
+        with self.assertRaises(ValueError):
+            await self.activity_service.get_activities_for_kr(404)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+
+import httpx
+from gitlab.exceptions import GitlabCreateError, GitlabGetError
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.services.gitlab_service import GitlabService
+
+from factories import FakeClock
+
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=30, clock=self.clock)
+
+    def fail(self, times: int) -> None:
+        for _ in range(times):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        self.fail(2)
+        self.breaker.record_success() # Resets the streak
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.fail(1)
+
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as ctx:
+            self.breaker.before_call()
+        self.assertEqual(ctx.exception.response_code, 503)
+        self.assertEqual(self.breaker.status()["rejected_count"], 1)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.fail(3)
+        self.clock.now += 30
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_call() # The probe
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call() # Everyone else still fails fast
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+
+    def test_failed_probe_reopens_for_another_recovery_period(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.fail(1)
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.status()["open_count"], 2)
+        self.assertAlmostEqual(self.breaker.status()["retry_in_seconds"], 30)
+
+    def test_lost_probe_is_replaced_after_the_recovery_time(self):
+        self.fail(3)
+        self.clock.now += 30
+        self.breaker.before_call() # Probe cancelled: never reports back
+
+        self.clock.now += 30
+
+        self.breaker.before_call()
+
+class TestGitlabServiceResilience(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.responses = []
+        self.requests = []
+        self.service = GitlabService()
+        self.service._project_path = "42"
+        self.service.retry_attempts = 2
+        self.service.retry_backoff_seconds = 0.001
+        self.service.circuit_breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=60)
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+    async def asyncTearDown(self):
+        await self.service.aclose()
+
+    async def test_reads_are_retried_after_blips(self):
+        self.responses = [
+            httpx.ConnectError("connection reset"),
+            httpx.Response(503, json={"message": "unavailable"}),
+            httpx.Response(200, json={"id": 42}),
+        ]
+
+        self.assertEqual(await self.service.get_project(), {"id": 42})
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.service.circuit_state, CLOSED)
+
+    async def test_retries_are_bounded(self):
+        self.responses = [httpx.Response(502, json={"message": "bad gateway"}) for _ in range(3)]
+
+        with self.assertRaises(GitlabGetError) as ctx:
+            await self.service.get_project()
+
+        self.assertEqual(ctx.exception.response_code, 502)
+        self.assertEqual(len(self.requests), 3) # First try + 2 retries
+
+    async def test_ping_is_a_single_attempt(self):
+        self.responses = [httpx.Response(503, json={"message": "unavailable"})]
+
+        with self.assertRaises(GitlabGetError):
+            await self.service.ping() # Measures the round trip: retries would only inflate it
+
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_writes_and_client_errors_are_not_retried(self):
+        self.responses = [httpx.Response(503, json={"message": "unavailable"}), httpx.Response(404, json={"message": "404 Not found"})]
+
+        with self.assertRaises(GitlabCreateError):
+            await self.service.create_issue("KR", "")
+        with self.assertRaises(GitlabGetError):
+            await self.service.get_issue(99)
+
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_open_circuit_fails_fast_without_calling_gitlab(self):
+        self.service.retry_attempts = 0
+        self.responses = [httpx.ReadTimeout("timed out") for _ in range(3)]
+        for _ in range(3):
+            with self.assertRaises(httpx.ReadTimeout):
+                await self.service.get_project()
+
+        with self.assertRaises(CircuitOpenError):
+            await self.service.get_issue(7)
+
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.service.circuit_state, OPEN)
+
+if __name__ == '__main__':
+    unittest.main()
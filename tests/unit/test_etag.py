@@ -0,0 +1,37 @@
+import unittest
+
+from app.models import GitlabIssue
+from app.services.etag import issue_etag, list_etag, etag_matches
+
+from factories import make_issue
+
+class TestETag(unittest.TestCase):
+
+    def test_issue_etag_is_quoted_and_changes_with_updated_at(self):
+        etag = issue_etag("objective", make_issue(1))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(etag, issue_etag("objective", make_issue(1)))
+        self.assertNotEqual(etag, issue_etag("objective", make_issue(1, updated_at="2025-01-02T00:00:00Z")))
+        self.assertNotEqual(etag, issue_etag("kr", make_issue(1)))
+
+    def test_issue_etag_without_updated_at_uses_content(self):
+        issue = GitlabIssue(iid=1, title="t", description="a", web_url="https://fakegitlab.com/issues/1")
+        changed = GitlabIssue(iid=1, title="t", description="b", web_url="https://fakegitlab.com/issues/1")
+        self.assertNotEqual(issue_etag("kr", issue), issue_etag("kr", changed))
+
+    def test_list_etag_tracks_membership_and_order(self):
+        base = list_etag("krs", [make_issue(1), make_issue(2)])
+        self.assertEqual(base, list_etag("krs", [make_issue(1), make_issue(2)]))
+        self.assertNotEqual(base, list_etag("krs", [make_issue(2), make_issue(1)]))
+        self.assertNotEqual(base, list_etag("krs", [make_issue(1)]))
+
+    def test_etag_matches_handles_lists_weak_and_wildcard(self):
+        etag = '"abc"'
+        self.assertTrue(etag_matches('"abc"', etag))
+        self.assertTrue(etag_matches('"x", W/"abc"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"x"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+if __name__ == '__main__':
+    unittest.main()
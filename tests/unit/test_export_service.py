@@ -0,0 +1,58 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from app.services.export_service import ExportService
+from app.services.gitlab_service import GitlabService
+from app.services.objective_service import ObjectiveService
+from app.services.kr_service import KRService
+from app.services.link_index import LinkIndex
+
+from factories import make_issue
+
+class TestExportService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.fetched = []
+        issues_by_label = {
+            "OKR::Objetivo": [make_issue(1, title="OBJ1: A")],
+            "OKR::Resultado Chave": [make_issue(11, title="OBJ1 - KR1: B"), make_issue(12, title="OBJ1 - KR2: C")],
+        }
+
+        async def iter_issues(labels=None, remember=True):
+            self.assertFalse(remember)
+            for issue in issues_by_label[labels[0]]:
+                self.fetched.append(issue.iid)
+                yield issue
+
+        self.mock_gitlab_service = MagicMock(spec=GitlabService)
+        self.mock_gitlab_service.iter_issues = iter_issues
+
+        self.export_service = ExportService()
+        self.export_service.gitlab_service = self.mock_gitlab_service
+        self.export_service.objective_service = ObjectiveService()
+        self.export_service.kr_service = KRService()
+        self.export_service.objective_service.objective_labels = ["OKR::Objetivo"]
+        self.export_service.kr_service.kr_labels = ["OKR::Resultado Chave"]
+        self.export_service.kr_service.link_index = LinkIndex()
+        self.export_service.kr_service.link_index.set_krs(1, [11])
+
+    async def test_iter_okrs_ndjson_emits_one_json_object_per_line(self):
+        lines = [line async for line in self.export_service.iter_okrs_ndjson()]
+
+        self.assertTrue(all(line.endswith("\n") for line in lines))
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([(r["type"], r["id"]) for r in records], [("objective", 1), ("kr", 11), ("kr", 12)])
+        self.assertEqual(records[1]["objective_iid"], 1)
+        self.assertEqual(records[2]["objective_iid"], 0) # Link not known locally
+
+    async def test_lines_are_yielded_before_remaining_issues_are_fetched(self):
+        stream = self.export_service.iter_okrs_ndjson()
+        first_line = await stream.__anext__()
+
+        self.assertEqual(json.loads(first_line)["id"], 1)
+        self.assertEqual(self.fetched, [1])
+        await stream.aclose()
+
+if __name__ == '__main__':
+    unittest.main()
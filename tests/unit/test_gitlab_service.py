@@ -0,0 +1,319 @@
+import asyncio
+import base64
+import json
+import time
+import unittest
+from datetime import datetime, timezone
+
+import httpx
+from gitlab.exceptions import GitlabGetError, GitlabAuthenticationError
+
+from app.services.gitlab_service import GitlabService
+from app.models import GitlabIssue
+
+from factories import issue_json
+
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+class TestGitlabService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.requests = []
+        self.handler = None
+        self.service = GitlabService()
+        self.service._project_path = "42"
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return await self.handler(request)
+
+        self.service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+    async def asyncTearDown(self):
+        await self.service.aclose()
+
+    async def test_get_issue_maps_json_to_gitlab_issue(self):
+        async def handler(request):
+            self.assertEqual(request.url.path, "/api/v4/projects/42/issues/7")
+            return httpx.Response(200, json=issue_json(7))
+        self.handler = handler
+
+        issue = await self.service.get_issue(7)
+
+        self.assertIsInstance(issue, GitlabIssue)
+        self.assertEqual(issue.iid, 7)
+        self.assertEqual(issue.description, "Description 7")
+        self.assertEqual(issue.labels, ["OKR::Objetivo"])
+
+    async def test_get_issue_not_found_raises_gitlab_get_error(self):
+        async def handler(request):
+            return httpx.Response(404, json={"message": "404 Not found"})
+        self.handler = handler
+
+        with self.assertRaises(GitlabGetError) as ctx:
+            await self.service.get_issue(404)
+        self.assertEqual(ctx.exception.response_code, 404)
+
+    async def test_unauthorized_raises_authentication_error(self):
+        async def handler(request):
+            return httpx.Response(401, json={"message": "401 Unauthorized"})
+        self.handler = handler
+
+        with self.assertRaises(GitlabAuthenticationError):
+            await self.service.get_issue(1)
+
+    async def test_update_issue_uses_put_response_without_refetch(self):
+        async def handler(request):
+            self.assertEqual(request.method, "PUT")
+            body = json.loads(request.content)
+            self.assertEqual(body, {"description": "new", "labels": "a,b"})
+            return httpx.Response(200, json=issue_json(3, description="new", labels=["a", "b"]))
+        self.handler = handler
+
+        issue = await self.service.update_issue(3, description="new", labels=["a", "b"])
+
+        self.assertEqual(issue.description, "new")
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_link_issues_targets_project_id(self):
+        async def handler(request):
+            if request.url.path == "/api/v4/projects/42":
+                return httpx.Response(200, json={"id": 42})
+            self.assertEqual(request.url.path, "/api/v4/projects/42/issues/101/links")
+            self.assertEqual(json.loads(request.content), {"target_project_id": 42, "target_issue_iid": 10})
+            return httpx.Response(201, json={"source_issue": issue_json(101), "target_issue": issue_json(10)})
+        self.handler = handler
+
+        link = await self.service.link_issues(source_issue_iid=101, target_issue_iid=10)
+
+        self.assertEqual(link["target_issue"]["iid"], 10)
+
+    async def test_list_issues_follows_link_header_pagination(self):
+        async def handler(request):
+            if request.url.params.get("page") == "2":
+                return httpx.Response(200, json=[issue_json(3)])
+            self.assertEqual(request.url.params["labels"], "OKR::Objetivo,2025")
+            next_url = f"{BASE_URL}/projects/42/issues?labels=OKR%3A%3AObjetivo%2C2025&page=2&per_page=100"
+            return httpx.Response(200, json=[issue_json(1), issue_json(2)], headers={"Link": f'<{next_url}>; rel="next"'})
+        self.handler = handler
+
+        issues = await self.service.list_issues(labels=["OKR::Objetivo", "2025"])
+
+        self.assertEqual([issue.iid for issue in issues], [1, 2, 3])
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_list_issues_sends_state_and_updated_after_filters(self):
+        async def handler(request):
+            params = request.url.params
+            self.assertEqual(params["labels"], "OKR::Objetivo,TimeA")
+            self.assertEqual(params["state"], "opened")
+            self.assertEqual(params["updated_after"], "2025-03-01T00:00:00+00:00")
+            return httpx.Response(200, json=[issue_json(1)])
+        self.handler = handler
+
+        issues = await self.service.list_issues(
+            labels=["OKR::Objetivo", "TimeA"], state="opened", updated_after=datetime(2025, 3, 1, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual([issue.iid for issue in issues], [1])
+
+    async def test_iter_issues_fetches_next_page_only_when_consumed(self):
+        async def handler(request):
+            if request.url.params.get("page") == "2":
+                return httpx.Response(200, json=[issue_json(2)])
+            next_url = f"{BASE_URL}/projects/42/issues?page=2&per_page=100"
+            return httpx.Response(200, json=[issue_json(1)], headers={"Link": f'<{next_url}>; rel="next"'})
+        self.handler = handler
+
+        stream = self.service.iter_issues(remember=False)
+        first = await stream.__anext__()
+        self.assertEqual(first.iid, 1)
+        self.assertEqual(len(self.requests), 1)
+
+        rest = [issue.iid async for issue in stream]
+        self.assertEqual(rest, [2])
+        self.assertEqual(len(self.service.issue_cache), 0)
+
+    async def test_get_issue_is_served_from_cache_after_first_fetch(self):
+        async def handler(request):
+            return httpx.Response(200, json=issue_json(5))
+        self.handler = handler
+
+        first = await self.service.get_issue(5)
+        second = await self.service.get_issue(5)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.service.issue_cache.stats()["hits"], 1)
+
+    async def test_fresh_read_bypasses_the_cache_and_refreshes_it(self):
+        descriptions = iter(["cached copy", "edited in the GitLab UI"])
+        async def handler(request):
+            return httpx.Response(200, json=issue_json(5, description=next(descriptions)))
+        self.handler = handler
+        await self.service.get_issue(5)
+
+        fresh = await self.service.get_issue(5, fresh=True)
+
+        self.assertEqual(fresh.description, "edited in the GitLab UI")
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.service.issue_cache.get(5).description, "edited in the GitLab UI")
+
+    async def test_writes_update_or_invalidate_cached_issue(self):
+        async def handler(request):
+            if request.method == "PUT":
+                return httpx.Response(200, json=issue_json(5, description="edited"))
+            if request.url.path == "/api/v4/projects/42":
+                return httpx.Response(200, json={"id": 42})
+            if request.url.path.endswith("/links"):
+                return httpx.Response(201, json={})
+            return httpx.Response(200, json=issue_json(int(request.url.path.rsplit("/", 1)[-1])))
+        self.handler = handler
+
+        await self.service.get_issue(5)
+        await self.service.update_issue(5, description="edited")
+        self.assertEqual((await self.service.get_issue(5)).description, "edited")
+        self.assertEqual(len(self.requests), 2) # GET + PUT, the last read is a cache hit
+
+        await self.service.link_issues(source_issue_iid=5, target_issue_iid=6)
+        self.assertIsNone(self.service.issue_cache.get(5))
+        self.assertIsNone(self.service.issue_cache.get(6))
+
+    async def test_timed_out_write_invalidates_cached_issue(self):
+        async def handler(request):
+            if request.method == "PUT":
+                raise httpx.ReadTimeout("timed out", request=request)
+            return httpx.Response(200, json=issue_json(5))
+        self.handler = handler
+        await self.service.get_issue(5)
+
+        with self.assertRaises(httpx.ReadTimeout):
+            await self.service.update_issue(5, description="edited")
+
+        self.assertIsNone(self.service.issue_cache.get(5)) # The PUT may have been applied
+
+    async def test_list_issues_populates_cache(self):
+        async def handler(request):
+            return httpx.Response(200, json=[issue_json(1), issue_json(2)])
+        self.handler = handler
+
+        await self.service.list_issues(labels=["OKR::Objetivo"])
+        await self.service.get_issue(2)
+
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_list_issue_links_drops_issues_of_other_projects(self):
+        self.service.issue_cache.put(GitlabIssue.model_validate(issue_json(7, title="Local issue 7")))
+        async def handler(request):
+            if request.url.path == "/api/v4/projects/42":
+                return httpx.Response(200, json={"id": 42})
+            return httpx.Response(200, json=[
+                issue_json(11, project_id=42),
+                issue_json(7, project_id=99, title="Another project's issue 7"),
+            ])
+        self.handler = handler
+
+        linked = await self.service.list_issue_links(1)
+
+        self.assertEqual([issue.iid for issue in linked], [11])
+        self.assertEqual(self.service.issue_cache.get(7).title, "Local issue 7")
+
+    async def test_get_issues_fetches_only_cache_misses_in_one_call(self):
+        async def handler(request):
+            self.assertEqual(request.url.params.get_list("iids[]"), ["2", "3"])
+            return httpx.Response(200, json=[issue_json(3), issue_json(2)])
+        self.handler = handler
+        self.service.issue_cache.put(GitlabIssue.model_validate(issue_json(1)))
+
+        issues = await self.service.get_issues([1, 2, 3])
+
+        self.assertEqual([issue.iid for issue in issues], [1, 2, 3])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_issue_listeners_see_every_remembered_issue(self):
+        async def handler(request):
+            return httpx.Response(200, json=[issue_json(1), issue_json(2)])
+        self.handler = handler
+        seen = []
+        self.service.add_issue_listener(lambda issue: seen.append(issue.iid))
+        self.service.add_issue_listener(lambda issue: 1 / 0) # A failing listener must not fail the call
+
+        issues = await self.service.list_issues(labels=["OKR::Objetivo"])
+
+        self.assertEqual(len(issues), 2)
+        self.assertEqual(seen, [1, 2])
+
+    async def test_list_issues_page_returns_keyset_cursor_for_next_page(self):
+        async def handler(request):
+            params = request.url.params
+            if params.get("cursor") == "abc":
+                self.assertEqual(params["per_page"], "2")
+                self.assertEqual(params["labels"], "OKR::Objetivo")
+                return httpx.Response(200, json=[issue_json(1)])
+            self.assertEqual(params["pagination"], "keyset")
+            self.assertEqual(params["per_page"], "2")
+            next_url = f"{BASE_URL}/projects/42/issues?cursor=abc&labels=OKR%3A%3AObjetivo&order_by=created_at&pagination=keyset&per_page=2&sort=desc"
+            return httpx.Response(200, json=[issue_json(3), issue_json(2)], headers={"Link": f'<{next_url}>; rel="next"'})
+        self.handler = handler
+
+        first = await self.service.list_issues_page(labels=["OKR::Objetivo"], limit=2)
+        self.assertEqual([issue.iid for issue in first.issues], [3, 2])
+        self.assertIsNotNone(first.next_cursor)
+
+        second = await self.service.list_issues_page(labels=["OKR::Objetivo"], cursor=first.next_cursor)
+        self.assertEqual([issue.iid for issue in second.issues], [1])
+        self.assertIsNone(second.next_cursor)
+
+    async def test_list_issues_page_takes_filters_from_the_request_not_the_cursor(self):
+        async def handler(request):
+            params = request.url.params
+            self.assertEqual(params["labels"], "OKR::Objetivo,TimeA")
+            self.assertEqual(params["state"], "opened")
+            self.assertEqual(params["cursor"], "abc")
+            self.assertEqual(params["per_page"], "100")
+            self.assertNotIn("search", params)
+            return httpx.Response(200, json=[issue_json(1)])
+        self.handler = handler
+        crafted = base64.urlsafe_b64encode(b"cursor=abc&labels=&search=secret&per_page=5000").decode("ascii")
+
+        page = await self.service.list_issues_page(labels=["OKR::Objetivo", "TimeA"], cursor=crafted, state="opened")
+
+        self.assertEqual([issue.iid for issue in page.issues], [1])
+
+    async def test_list_issues_page_falls_back_to_offset_pagination(self):
+        async def handler(request):
+            if request.url.params.get("pagination") == "keyset":
+                return httpx.Response(405, json={"message": "405 Method Not Allowed"})
+            return httpx.Response(200, json=[issue_json(1)])
+        self.handler = handler
+
+        page = await self.service.list_issues_page(limit=5)
+
+        self.assertEqual([issue.iid for issue in page.issues], [1])
+        self.assertFalse(self.service._keyset_supported)
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_list_issues_page_rejects_malformed_cursor(self):
+        with self.assertRaises(ValueError):
+            await self.service.list_issues_page(cursor="%%%not-base64")
+        with self.assertRaises(ValueError): # Decodes, but carries no position
+            await self.service.list_issues_page(cursor=base64.urlsafe_b64encode(b"labels=secret").decode("ascii"))
+        self.assertEqual(self.requests, [])
+
+    async def test_concurrent_calls_do_not_block_each_other(self):
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            iid = int(request.url.path.rsplit("/", 1)[-1])
+            return httpx.Response(200, json=issue_json(iid))
+        self.handler = handler
+
+        started = time.perf_counter()
+        issues = await asyncio.gather(*(self.service.get_issue(iid) for iid in range(1, 11)))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([issue.iid for issue in issues], list(range(1, 11)))
+        # Ten sequential 50 ms calls would take 0.5 s; concurrent calls overlap.
+        self.assertLess(elapsed, 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import gitlab
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import LivenessResponse, ReadinessResponse
+from app.routers.health import get_current_health_service
+from app.services.gitlab_service import GitlabService
+from app.services.health_service import HealthService
+
+class TestHealthService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_gitlab_service = MagicMock(spec=GitlabService)
+        self.mock_gitlab_service.connect = AsyncMock(return_value={"id": 1})
+        self.mock_gitlab_service.list_labels = AsyncMock(return_value=[{"name": "OKR::Objetivo"}, {"name": "TimeA"}])
+        self.mock_gitlab_service.ping = AsyncMock(return_value={"version": "17.0.0"})
+        self.mock_gitlab_service.is_connected = True
+        self.mock_gitlab_service.circuit_state = "closed"
+        self.service = HealthService()
+        self.service.gitlab_service = self.mock_gitlab_service
+        self.service.okr_labels = ["OKR::Objetivo", "OKR::Resultado Chave"]
+        self.service.max_rtt_ms = 2000.0
+        self.service.prewarm_retry_seconds = 0.01
+
+    async def test_not_ready_until_prewarm_finishes(self):
+        before = self.service.readiness()
+        await self.service.prewarm()
+        after = self.service.readiness()
+
+        self.assertFalse(before.ready)
+        self.assertEqual(before.detail, "GitLab prewarm has not finished")
+        self.mock_gitlab_service.ping.assert_awaited() # RTT measured as part of the prewarm
+        self.assertTrue(after.ready)
+        self.assertTrue(after.project_loaded and after.labels_loaded and after.connection_pooled)
+        self.assertEqual(after.missing_labels, ["OKR::Resultado Chave"]) # Reported, not fatal
+        self.assertIsNotNone(after.gitlab_rtt_ms)
+
+    async def test_slow_gitlab_takes_the_instance_out_of_rotation(self):
+        await self.service.prewarm()
+        self.service.max_rtt_ms = 0.0001
+
+        readiness = self.service.readiness()
+
+        self.assertFalse(readiness.ready)
+        self.assertIn("above", readiness.detail)
+
+    async def test_probes_never_call_gitlab(self):
+        await self.service.prewarm()
+        self.mock_gitlab_service.ping.reset_mock()
+
+        for _ in range(5):
+            self.assertTrue(self.service.readiness().ready)
+
+        self.mock_gitlab_service.ping.assert_not_awaited()
+
+    async def test_rtt_is_measured_again_in_the_background(self):
+        self.service.rtt_check_interval_seconds = 0.01
+
+        self.service.start()
+        for _ in range(100):
+            if self.mock_gitlab_service.ping.await_count >= 3:
+                break
+            await asyncio.sleep(0.01)
+        await self.service.stop()
+
+        self.assertGreaterEqual(self.mock_gitlab_service.ping.await_count, 3) # Prewarm + background checks
+
+    async def test_failed_ping_makes_the_instance_not_ready(self):
+        await self.service.prewarm()
+        self.mock_gitlab_service.ping.side_effect = gitlab.exceptions.GitlabGetError("down", 502)
+
+        await self.service._refresh_rtt()
+        readiness = self.service.readiness()
+
+        self.assertFalse(readiness.ready)
+        self.assertIsNone(readiness.gitlab_rtt_ms)
+        self.assertIn("GitLab ping failed", readiness.detail)
+
+    async def test_open_circuit_takes_the_instance_out_of_rotation(self):
+        await self.service.prewarm()
+        self.mock_gitlab_service.circuit_state = "open"
+
+        readiness = self.service.readiness()
+
+        self.assertFalse(readiness.ready)
+        self.assertEqual(readiness.gitlab_circuit, "open")
+        self.assertEqual(readiness.detail, "GitLab circuit breaker is open")
+
+    async def test_background_prewarm_retries_until_gitlab_answers(self):
+        self.mock_gitlab_service.connect.side_effect = [gitlab.exceptions.GitlabAuthenticationError("401", 401), {"id": 1}]
+        self.service.rtt_check_interval_seconds = 0 # The task ends after the prewarm
+
+        self.service.start()
+        await asyncio.wait_for(self.service._task, timeout=1)
+
+        self.assertEqual(self.mock_gitlab_service.connect.await_count, 2)
+        self.assertTrue(self.service.readiness().ready)
+        await self.service.stop()
+
+class TestHealthRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.service = MagicMock(spec=HealthService)
+        self.service.liveness.return_value = LivenessResponse()
+        app.dependency_overrides[get_current_health_service] = lambda: self.service
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_live_needs_no_token_and_no_gitlab(self):
+        response = self.client.get("/health/live")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "alive"})
+
+    def test_ready_is_503_until_ready(self):
+        self.service.readiness.return_value = ReadinessResponse(ready=False, detail="GitLab prewarm has not finished")
+        self.assertEqual(self.client.get("/health/ready").status_code, 503)
+
+        self.service.readiness.return_value = ReadinessResponse(ready=True, gitlab_rtt_ms=12.5)
+        response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["gitlab_rtt_ms"], 12.5)
+
+if __name__ == '__main__':
+    unittest.main()
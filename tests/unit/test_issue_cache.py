@@ -0,0 +1,55 @@
+import unittest
+
+from app.services.issue_cache import IssueCache
+
+from factories import FakeClock, make_issue
+
+class TestIssueCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = IssueCache(max_size=2, ttl_seconds=60, clock=self.clock)
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get(1))
+        self.cache.put(make_issue(1))
+        self.assertEqual(self.cache.get(1).iid, 1)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.put(make_issue(1))
+        self.clock.now += 59
+        self.assertIsNotNone(self.cache.get(1))
+        self.clock.now += 2
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.put(make_issue(1))
+        self.cache.put(make_issue(2))
+        self.cache.get(1) # 1 becomes most recently used
+        self.cache.put(make_issue(3))
+
+        self.assertIsNotNone(self.cache.get(1))
+        self.assertIsNone(self.cache.get(2))
+        self.assertIsNotNone(self.cache.get(3))
+
+    def test_put_replaces_and_invalidate_removes(self):
+        self.cache.put(make_issue(1, title="old"))
+        self.cache.put(make_issue(1, title="new"))
+        self.assertEqual(self.cache.get(1).title, "new")
+
+        self.cache.invalidate(1)
+        self.assertIsNone(self.cache.get(1))
+
+    def test_zero_ttl_disables_cache(self):
+        cache = IssueCache(max_size=10, ttl_seconds=0, clock=self.clock)
+        cache.put(make_issue(1))
+        self.assertIsNone(cache.get(1))
+
+if __name__ == '__main__':
+    unittest.main()
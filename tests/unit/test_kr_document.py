@@ -0,0 +1,107 @@
+import unittest
+
+from app.models import Activity
+from app.services.kr_document import (
+    KRDocument, DEFAULT_ACTIVITIES_TABLE, ACTIVITIES_TABLE_HEADER, append_activity_rows, format_activity_row,
+    iter_activities, parse_activity_row
+)
+
+NL = "\n"
+
+SAMPLE_DESCRIPTION = (
+    "### Descrição" + NL + NL +
+    "> Primeira linha" + NL +
+    "> Segunda linha" + NL + NL +
+    "**Meta prevista**: 80%  " + NL +
+    "**Meta realizada**: 25%  " + NL +
+    "**Responsável(eis)**: Ana, Bruno  " + NL + NL +
+    DEFAULT_ACTIVITIES_TABLE + NL +
+    "| Ação 1 | Time A | 2025-01-01 |  | 50% | 10% |" + NL +
+    "| Ação 2 | Time B | 2025-02-01 |  | 50% | 0% |"
+)
+
+class TestKRDocument(unittest.TestCase):
+
+    def test_parse_reads_all_fields(self):
+        document = KRDocument.parse(SAMPLE_DESCRIPTION)
+
+        self.assertEqual(document.description, "Primeira linha" + NL + "Segunda linha")
+        self.assertEqual(document.meta_prevista, 80)
+        self.assertEqual(document.meta_realizada, 25)
+        self.assertEqual(document.responsaveis, ["Ana", "Bruno"])
+        self.assertEqual(len(document.activity_rows), 2)
+        self.assertTrue(document.activity_rows[0].startswith("| Ação 1 |"))
+
+    def test_round_trip_is_byte_identical(self):
+        self.assertEqual(KRDocument.parse(SAMPLE_DESCRIPTION).to_markdown(), SAMPLE_DESCRIPTION)
+
+    def test_default_document_round_trips_with_placeholder(self):
+        markdown = KRDocument(meta_prevista=100).to_markdown()
+
+        self.assertIn("> (Descrição não fornecida)", markdown)
+        self.assertIn("**Responsável(eis)**: N/A  ", markdown)
+        parsed = KRDocument.parse(markdown)
+        self.assertEqual(parsed.description, "")
+        self.assertEqual(parsed.responsaveis, [])
+        self.assertEqual(parsed.to_markdown(), markdown)
+
+    def test_table_header_is_matched_case_insensitively_and_kept_verbatim(self):
+        lower_header = ACTIVITIES_TABLE_HEADER.lower()
+        text = "**Meta prevista**: 10.7%  " + NL + NL + lower_header + NL + "|---|" + NL + "| row |"
+
+        document = KRDocument.parse(text)
+
+        self.assertEqual(document.meta_prevista, 10)
+        self.assertEqual(document.activities_table, lower_header + NL + "|---|" + NL + "| row |")
+
+    def test_missing_sections_fall_back_to_defaults(self):
+        document = KRDocument.parse("Texto livre sem estrutura")
+
+        self.assertEqual(document.description, "")
+        self.assertEqual(document.meta_prevista, 0)
+        self.assertEqual(document.meta_realizada, 0)
+        self.assertEqual(document.responsaveis, [])
+        self.assertEqual(document.activities_table, DEFAULT_ACTIVITIES_TABLE)
+        self.assertEqual(document.activity_rows, [])
+
+    def test_metadata_inside_the_table_is_ignored(self):
+        text = DEFAULT_ACTIVITIES_TABLE + NL + "| **Meta prevista**: 99% | | | | 0% | 0% |"
+
+        self.assertEqual(KRDocument.parse(text).meta_prevista, 0)
+
+    def test_crlf_descriptions_are_normalized(self):
+        document = KRDocument.parse(SAMPLE_DESCRIPTION.replace(NL, "\r\n"))
+
+        self.assertEqual(document.to_markdown(), SAMPLE_DESCRIPTION)
+
+class TestActivityRows(unittest.TestCase):
+
+    def test_append_to_empty_description_adds_table_header(self):
+        row = format_activity_row(Activity(project_action_activity="A", stakeholders="B", deadline_planned="2025-06", progress_planned_percent=10))
+
+        self.assertEqual(append_activity_rows("", [row]), DEFAULT_ACTIVITIES_TABLE + NL + row)
+        self.assertEqual(append_activity_rows(None, []), "")
+
+    def test_appended_rows_are_read_back_as_activity_rows(self):
+        row = "| Ação 3 | Time C | | | 0% | 0% |"
+
+        document = KRDocument.parse(append_activity_rows(SAMPLE_DESCRIPTION + NL + NL, [row]))
+
+        self.assertEqual(document.activity_rows[-1], row)
+        self.assertEqual(len(document.activity_rows), 3)
+    def test_formatted_rows_parse_back_to_the_same_activity(self):
+        activity = Activity(project_action_activity="Ação", stakeholders="Time A, Time B", deadline_planned="Q1/2025",
+                            deadline_achieved="Q2/2025", progress_planned_percent=100, progress_achieved_percent=40)
+
+        self.assertEqual(parse_activity_row(format_activity_row(activity)), activity)
+
+    def test_iter_activities_skips_header_separator_and_malformed_rows(self):
+        text = SAMPLE_DESCRIPTION + NL + "| incompleta | 10% |" + NL + "| X | Y | Z |  | 150% | 0% |" + NL + "texto solto"
+
+        activities = list(iter_activities(text))
+
+        self.assertEqual([activity.project_action_activity for activity in activities], ["Ação 1", "Ação 2"])
+        self.assertEqual(list(iter_activities("sem tabela")), [])
+
+if __name__ == '__main__':
+    unittest.main()
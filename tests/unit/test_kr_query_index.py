@@ -0,0 +1,92 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+
+from app.services.gitlab_service import GitlabService
+from app.services.kr_document import parse_deadline
+from app.services.kr_query_index import KRQueryIndex
+from app.services.kr_query_service import KRQueryService
+from app.services.kr_service import KRService
+from app.services.link_index import LinkIndex
+from app.services.okr_mirror import OKRMirror
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_kr
+
+class TestParseDeadline(unittest.TestCase):
+
+    def test_known_formats_resolve_to_the_end_of_the_period(self):
+        self.assertEqual(parse_deadline("2025-06-15"), date(2025, 6, 15))
+        self.assertEqual(parse_deadline("15/06/2025"), date(2025, 6, 15))
+        self.assertEqual(parse_deadline("06/2025"), date(2025, 6, 30))
+        self.assertEqual(parse_deadline("Março/2025"), date(2025, 3, 31))
+        self.assertEqual(parse_deadline("Q1/2024"), date(2024, 3, 31))
+        self.assertEqual(parse_deadline("2025"), date(2025, 12, 31))
+
+    def test_unreadable_deadlines_are_none(self):
+        for text in ("", None, "em breve", "13/2025", "Q5/2025", "31/02/2025"):
+            self.assertIsNone(parse_deadline(text), text)
+
+class TestKRQueryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = KRQueryIndex(KR_LABELS)
+        self.index.index_issue(make_kr(11, 100, 30, responsaveis=["Maria Souza", "João"], activities=[("A", "Q1/2025", 50), ("B", "Q3/2025", 100)]))
+        self.index.index_issue(make_kr(12, 80, 70, responsaveis=["Maria Souza"], activities=[("C", "02/2025", 100), ("D", "sem prazo", 0)]))
+        self.index.index_issue(make_kr(13, 50, 10, responsaveis=["Ana"]))
+
+    def test_find_krs_by_responsavel_ignores_accents_and_case(self):
+        self.assertEqual([issue.iid for issue in self.index.find_krs(responsavel="maria souza")], [11, 12])
+        self.assertEqual([issue.iid for issue in self.index.find_krs(responsavel="JOAO")], [11])
+
+    def test_find_krs_combines_ranges_and_responsavel(self):
+        self.assertEqual([issue.iid for issue in self.index.find_krs(meta_realizada_max=49)], [11, 13])
+        self.assertEqual([issue.iid for issue in self.index.find_krs(responsavel="Maria Souza", meta_realizada_max=49)], [11])
+        self.assertEqual([issue.iid for issue in self.index.find_krs(meta_prevista_min=80, meta_prevista_max=90)], [12])
+
+    def test_find_activities_by_deadline_and_progress(self):
+        late = self.index.find_activities(deadline_before=date(2025, 4, 1), progress_achieved_max=99)
+
+        self.assertEqual([(iid, activity.project_action_activity) for iid, activity in late], [(11, "A")])
+        after = self.index.find_activities(deadline_after=date(2025, 3, 31))
+        self.assertEqual([activity.project_action_activity for _, activity in after], ["B"])
+
+    def test_reindexing_a_kr_replaces_its_entries(self):
+        self.index.index_issue(make_kr(11, 100, 90, responsaveis=["Ana"], activities=[("A", "Q1/2025", 100)], updated_at="2025-01-02T00:00:00.000Z"))
+
+        self.assertEqual([issue.iid for issue in self.index.find_krs(responsavel="Maria Souza")], [12])
+        self.assertEqual(self.index.find_activities(deadline_before=date(2025, 4, 1), progress_achieved_max=99), [])
+        self.assertEqual(len(self.index.find_activities(deadline_after=date(2025, 3, 31))), 0)
+
+        self.index.remove_issue(12)
+        self.assertEqual([issue.iid for issue in self.index.find_krs()], [11, 13])
+
+class TestKRQueryService(unittest.IsolatedAsyncioTestCase):
+
+    async def test_filters_are_answered_after_a_single_scan(self):
+        scans = []
+
+        async def iter_issues(labels=None, remember=True):
+            scans.append(labels)
+            if labels == KR_LABELS:
+                yield make_kr(11, 100, 30, responsaveis=["Maria"], activities=[("A", "2020-01-01", 50), ("B", "2999-01-01", 0)])
+
+        mock_gitlab_service = MagicMock(spec=GitlabService)
+        mock_gitlab_service.iter_issues = iter_issues
+        service = KRQueryService()
+        service.gitlab_service = mock_gitlab_service
+        service.kr_service = KRService()
+        service.kr_service.link_index = LinkIndex()
+        service.kr_service.link_index.set_krs(1, [11])
+        service.index = KRQueryIndex(KR_LABELS)
+        service.mirror = OKRMirror(mock_gitlab_service, OBJECTIVE_LABELS, KR_LABELS)
+
+        krs = await service.filter_krs(responsavel="maria", meta_realizada_max=49)
+        activities, total = await service.filter_activities(overdue=True)
+
+        self.assertEqual([(kr.id, kr.objective_iid) for kr in krs], [(11, 1)])
+        self.assertEqual(total, 1)
+        self.assertEqual((activities[0].kr_iid, activities[0].project_action_activity), (11, "A"))
+        self.assertEqual(scans, [OBJECTIVE_LABELS, KR_LABELS]) # The mirror's one scan, shared by both filters
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,23 +1,22 @@
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch, call
 import re # For verifying appended KR reference in objective's description
 
 from app.services.kr_service import KRService
+from app.services.gitlab_service import GitlabService
+from app.services.link_index import LinkIndex
+from app.services.progress_index import ProgressIndex
 from app.models import KRCreateRequest, KRResponse, KRUpdateRequest # Added KRUpdateRequest
 from app.config import Settings # Import Settings to create test_settings instance
-from gitlab.v4.objects import ProjectIssue
-from gitlab.exceptions import GitlabGetError # Added for test_update_kr_not_found
+from app.models import GitlabIssue
+from gitlab.exceptions import GitlabCreateError, GitlabGetError # Added for test_update_kr_not_found
 
-class TestKRService(unittest.TestCase):
+class TestKRService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        # Crie um mock explícito para cada método usado
-        self.mock_gitlab_service_instance = MagicMock(spec=[
-            "get_issue",
-            "create_issue",
-            "link_issues",
-            "update_issue"
-        ])
+        # Mock com spec da classe: os métodos async viram AsyncMock automaticamente
+        self.mock_gitlab_service_instance = MagicMock(spec=GitlabService)
         # Patch o gitlab_service no local correto
         gitlab_service_patcher = patch('app.services.kr_service.gitlab_service', self.mock_gitlab_service_instance)
         self.gitlab_service_patcher = gitlab_service_patcher
@@ -30,14 +29,17 @@ class TestKRService(unittest.TestCase):
             gitlab_objective_labels=["2025", "OKR SUTI", "OKR::Objetivo", "OKR::Q2"],
             gitlab_kr_labels=["2025", "OKR SUTI", "OKR::Resultado Chave", "OKR::Q2"]
         )
-        # Patch 'settings' instance em app.config
-        settings_patcher = patch('app.config.settings', self.test_settings)
+        # Patch da instância 'settings' já importada pelo módulo do serviço (patch em app.config não a alcança)
+        settings_patcher = patch('app.services.kr_service.settings', self.test_settings)
         self.settings_patcher = settings_patcher
         self.mock_settings_patched = settings_patcher.start()
 
         self.kr_service = KRService()
         # Injete explicitamente o mock na instância do serviço
         self.kr_service.gitlab_service = self.mock_gitlab_service_instance
+        # Índice de links isolado por teste (o singleton do módulo é compartilhado)
+        self.kr_service.link_index = LinkIndex()
+        self.kr_service.progress_index = ProgressIndex()
 
         # Limpe o mock para garantir que não há chamadas anteriores
         self.mock_gitlab_service_instance.reset_mock()
@@ -46,16 +48,29 @@ class TestKRService(unittest.TestCase):
         self.gitlab_service_patcher.stop()
         self.settings_patcher.stop()
 
-    def test_create_kr_full_logic(self):
+    @staticmethod
+    def _updated_issue(current_issue):
+        # Side effect for update_issue: a copy of the current issue carrying the written description.
+        def update_issue(issue_iid, description=None, **kwargs):
+            updated = MagicMock(spec=GitlabIssue)
+            updated.iid = current_issue.iid
+            updated.title = current_issue.title
+            updated.web_url = current_issue.web_url
+            updated.labels = getattr(current_issue, "labels", [])
+            updated.description = description if description is not None else current_issue.description
+            return updated
+        return update_issue
+
+    async def test_create_kr_full_logic(self):
         # --- Mocking Parent Objective ---
-        mock_parent_objective = MagicMock(spec=ProjectIssue)
+        mock_parent_objective = MagicMock(spec=GitlabIssue)
         mock_parent_objective.iid = 10
         mock_parent_objective.title = "OBJ1: Parent Objective Title"
         # Initial description of the parent objective
         mock_parent_objective.description = "Initial objective description.\n\n### Resultados Chave\n- [ ] Some existing KR"
 
         # --- Mocking Created KR Issue ---
-        mock_created_kr = MagicMock(spec=ProjectIssue)
+        mock_created_kr = MagicMock(spec=GitlabIssue)
         mock_created_kr.iid = 101
         # Title below is what gitlab_service.create_issue would get after formatting by KRService
         mock_created_kr.title = "OBJ1 - KR1: New KR Title"
@@ -89,9 +104,9 @@ class TestKRService(unittest.TestCase):
             product_label="ProductY"
         )
 
-        response = self.kr_service.create_kr(kr_data)
+        response = await self.kr_service.create_kr(kr_data)
 
-        self.mock_gitlab_service_patched.get_issue.assert_any_call(kr_data.objective_iid)
+        self.mock_gitlab_service_patched.get_issue.assert_any_call(kr_data.objective_iid, fresh=True)
         self.assertEqual(self.mock_gitlab_service_patched.get_issue.call_count, 2)
 
         expected_kr_title_on_create = "OBJ1 - KR1: New KR Title"
@@ -135,15 +150,15 @@ class TestKRService(unittest.TestCase):
         self.assertEqual(response.title, mock_created_kr.title)
         self.assertEqual(response.objective_iid, mock_parent_objective.iid)
 
-    def test_create_kr_parent_objective_title_parsing_fallback(self):
-        mock_parent_objective_bad_title = MagicMock(spec=ProjectIssue)
+    async def test_create_kr_parent_objective_title_parsing_fallback(self):
+        mock_parent_objective_bad_title = MagicMock(spec=GitlabIssue)
         mock_parent_objective_bad_title.iid = 20
         mock_parent_objective_bad_title.title = "Objective Without Standard Prefix"
         mock_parent_objective_bad_title.description = "Desc"
 
         expected_kr_title_fallback = f"OBJ{mock_parent_objective_bad_title.iid} - KR2: Fallback KR"
 
-        mock_created_kr_fallback = MagicMock(spec=ProjectIssue)
+        mock_created_kr_fallback = MagicMock(spec=GitlabIssue)
         mock_created_kr_fallback.iid = 102
         mock_created_kr_fallback.title = expected_kr_title_fallback
         # For description consistency, create a dummy KRCreateRequest
@@ -174,7 +189,7 @@ class TestKRService(unittest.TestCase):
             product_label="ProductY"
         )
 
-        response = self.kr_service.create_kr(kr_data)
+        response = await self.kr_service.create_kr(kr_data)
 
         args_create, kwargs_create = self.mock_gitlab_service_patched.create_issue.call_args
         self.assertEqual(kwargs_create['title'], expected_kr_title_fallback)
@@ -190,7 +205,7 @@ class TestKRService(unittest.TestCase):
 
         self.assertEqual(response.title, expected_kr_title_fallback)
 
-    def test_update_kr_all_fields_success(self):
+    async def test_update_kr_all_fields_success(self):
         NL = '\n'
         kr_iid = 123
         original_description_text = "Original detailed description."
@@ -203,7 +218,7 @@ class TestKRService(unittest.TestCase):
             "| Action 1                  | Stakeholder A        | Q1/2024        |                 | 100        | 0           |"
         )
 
-        mock_current_issue = MagicMock(spec=ProjectIssue)
+        mock_current_issue = MagicMock(spec=GitlabIssue)
         mock_current_issue.iid = kr_iid
         mock_current_issue.title = "OBJ1 - KR1: Test KR"
         mock_current_issue.web_url = f"https://fakegitlab.com/fakeproject/issues/{kr_iid}"
@@ -218,9 +233,8 @@ class TestKRService(unittest.TestCase):
 
         self.mock_gitlab_service_patched.get_issue.return_value = mock_current_issue
 
-        # Mock the return value of update_issue to be the same issue object,
-        # but its description will be checked via call_args
-        self.mock_gitlab_service_patched.update_issue.return_value = mock_current_issue
+        # update_issue answers with the issue as written (GitLab's PUT response)
+        self.mock_gitlab_service_patched.update_issue.side_effect = self._updated_issue(mock_current_issue)
 
         update_payload = KRUpdateRequest(
             description="Updated detailed description.",
@@ -229,9 +243,9 @@ class TestKRService(unittest.TestCase):
             responsaveis=["User Gamma", "User Delta"]
         )
 
-        response = self.kr_service.update_kr(kr_iid, update_payload)
+        response = await self.kr_service.update_kr(kr_iid, update_payload)
 
-        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid)
+        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid, fresh=True)
 
         args, kwargs = self.mock_gitlab_service_patched.update_issue.call_args
         self.assertEqual(kwargs['issue_iid'], kr_iid)
@@ -251,7 +265,7 @@ class TestKRService(unittest.TestCase):
         # The title and web_url are from mock_current_issue, description from update_issue call
         self.assertEqual(response.description, kwargs['description'])
 
-    def test_update_kr_partial_meta_realizada_success(self):
+    async def test_update_kr_partial_meta_realizada_success(self):
         NL = '\n'
         kr_iid = 124
         original_description_text = "Another KR description."
@@ -263,7 +277,7 @@ class TestKRService(unittest.TestCase):
             "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
         ) # Empty table
 
-        mock_current_issue = MagicMock(spec=ProjectIssue)
+        mock_current_issue = MagicMock(spec=GitlabIssue)
         mock_current_issue.iid = kr_iid
         mock_current_issue.title = "OBJ2 - KR1: Partial Update KR"
         mock_current_issue.web_url = f"https://fakegitlab.com/fakeproject/issues/{kr_iid}"
@@ -276,12 +290,12 @@ class TestKRService(unittest.TestCase):
         )
 
         self.mock_gitlab_service_patched.get_issue.return_value = mock_current_issue
-        self.mock_gitlab_service_patched.update_issue.return_value = mock_current_issue
+        self.mock_gitlab_service_patched.update_issue.side_effect = self._updated_issue(mock_current_issue)
 
         update_payload = KRUpdateRequest(meta_realizada=55) # Only updating this
 
-        response = self.kr_service.update_kr(kr_iid, update_payload)
-        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid)
+        response = await self.kr_service.update_kr(kr_iid, update_payload)
+        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid, fresh=True)
 
         args, kwargs = self.mock_gitlab_service_patched.update_issue.call_args
         self.assertEqual(kwargs['issue_iid'], kr_iid)
@@ -296,7 +310,7 @@ class TestKRService(unittest.TestCase):
         self.assertEqual(kwargs['description'].replace('\r\n', NL), expected_updated_description.replace('\r\n', NL))
         self.assertEqual(response.description, kwargs['description'])
 
-    def test_update_kr_not_found(self):
+    async def test_update_kr_not_found(self):
         kr_iid = 404
         # Ensure GitlabGetError is imported for this: from gitlab.exceptions import GitlabGetError
         # If not already, add `from gitlab.exceptions import GitlabGetError` to test file imports
@@ -306,11 +320,11 @@ class TestKRService(unittest.TestCase):
         update_payload = KRUpdateRequest(description="Doesn't matter")
 
         with self.assertRaisesRegex(ValueError, f"KR with IID {kr_iid} not found."):
-            self.kr_service.update_kr(kr_iid, update_payload)
-        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid)
+            await self.kr_service.update_kr(kr_iid, update_payload)
+        self.mock_gitlab_service_patched.get_issue.assert_called_once_with(kr_iid, fresh=True)
         self.mock_gitlab_service_patched.update_issue.assert_not_called()
 
-    def test_update_kr_empty_description_and_responsaveis(self):
+    async def test_update_kr_empty_description_and_responsaveis(self):
         NL = '\n'
         kr_iid = 125
         original_description_text = "KR with content."
@@ -322,7 +336,7 @@ class TestKRService(unittest.TestCase):
             "|---------------------------|----------------------|----------------|-----------------|------------|-------------|"
         )
 
-        mock_current_issue = MagicMock(spec=ProjectIssue)
+        mock_current_issue = MagicMock(spec=GitlabIssue)
         mock_current_issue.iid = kr_iid
         mock_current_issue.title = "OBJ3 - KR1: Empty Fields Test"
         mock_current_issue.web_url = f"https://fakegitlab.com/fakeproject/issues/{kr_iid}"
@@ -335,11 +349,11 @@ class TestKRService(unittest.TestCase):
         )
 
         self.mock_gitlab_service_patched.get_issue.return_value = mock_current_issue
-        self.mock_gitlab_service_patched.update_issue.return_value = mock_current_issue
+        self.mock_gitlab_service_patched.update_issue.side_effect = self._updated_issue(mock_current_issue)
 
         update_payload = KRUpdateRequest(description="", responsaveis=[])
 
-        response = self.kr_service.update_kr(kr_iid, update_payload)
+        response = await self.kr_service.update_kr(kr_iid, update_payload)
 
         args, kwargs = self.mock_gitlab_service_patched.update_issue.call_args
         expected_updated_description = (
@@ -352,6 +366,173 @@ class TestKRService(unittest.TestCase):
         self.assertEqual(kwargs['description'].replace('\r\n', NL), expected_updated_description.replace('\r\n', NL))
         self.assertEqual(response.description, kwargs['description'])
 
+    def _make_issue(self, iid, labels=None):
+        issue = MagicMock(spec=GitlabIssue)
+        issue.iid = iid
+        issue.title = f"OBJ1 - KR{iid}: KR {iid}"
+        issue.description = "### Descrição"
+        issue.web_url = f"https://fakegitlab.com/fakeproject/issues/{iid}"
+        issue.labels = labels if labels is not None else ["OKR::Resultado Chave"]
+        return issue
+
+    async def test_list_krs_for_objective_cold_index_uses_single_links_call(self):
+        self.kr_service.kr_labels = ["OKR::Resultado Chave"]
+        objective = self._make_issue(10, labels=["OKR::Objetivo"])
+        self.mock_gitlab_service_patched.get_issue.return_value = objective
+        self.mock_gitlab_service_patched.list_issue_links.return_value = [
+            self._make_issue(102), self._make_issue(101), self._make_issue(55, labels=["Other"])
+        ]
+
+        krs = await self.kr_service.list_krs_for_objective(10)
+
+        self.assertEqual([kr.id for kr in krs], [101, 102])
+        self.assertTrue(all(kr.objective_iid == 10 for kr in krs))
+        self.mock_gitlab_service_patched.list_issue_links.assert_called_once_with(10)
+        self.mock_gitlab_service_patched.list_issues.assert_not_called()
+        self.assertEqual(self.kr_service.link_index.krs_for(10), [101, 102])
+        self.assertEqual(self.kr_service.link_index.objective_for(101), 10)
+
+    async def test_list_krs_for_objective_warm_index_uses_one_batched_fetch(self):
+        self.kr_service.link_index.set_krs(10, [101, 102])
+        self.mock_gitlab_service_patched.get_issue.return_value = self._make_issue(10)
+        self.mock_gitlab_service_patched.get_issues.return_value = [self._make_issue(101), self._make_issue(102)]
+
+        krs = await self.kr_service.list_krs_for_objective(10)
+
+        self.assertEqual([kr.id for kr in krs], [101, 102])
+        self.mock_gitlab_service_patched.get_issues.assert_called_once_with([101, 102])
+        self.mock_gitlab_service_patched.list_issue_links.assert_not_called()
+        self.mock_gitlab_service_patched.list_issues.assert_not_called()
+
+    async def test_list_krs_for_objective_missing_objective_returns_empty(self):
+        self.mock_gitlab_service_patched.get_issue.side_effect = GitlabGetError
+
+        self.assertEqual(await self.kr_service.list_krs_for_objective(999), [])
+        self.mock_gitlab_service_patched.list_issue_links.assert_not_called()
+
+    async def test_create_kr_keeps_loaded_link_index_current(self):
+        self.kr_service.link_index.set_krs(10, [101])
+        parent = self._make_issue(10)
+        parent.title = "OBJ1: Parent"
+        parent.description = "### Resultados Chave"
+        self.mock_gitlab_service_patched.get_issue.return_value = parent
+        self.mock_gitlab_service_patched.create_issue.return_value = self._make_issue(103)
+
+        await self.kr_service.create_kr(KRCreateRequest(
+            objective_iid=10, kr_number=3, title="New", description="d", meta_prevista=50,
+            responsaveis=["A"], team_label="TeamX", product_label="ProductY"
+        ))
+
+        self.assertEqual(self.kr_service.link_index.krs_for(10), [101, 103])
+        self.assertEqual(self.kr_service.link_index.objective_for(103), 10)
+
+    async def test_list_krs_for_objective_conditional_returns_none_when_unchanged(self):
+        self.kr_service.link_index.set_krs(10, [101])
+        kr = GitlabIssue(iid=101, title="OBJ1 - KR1: A", web_url="https://fakegitlab.com/issues/101", updated_at="2025-01-01T00:00:00Z")
+        self.mock_gitlab_service_patched.get_issue.return_value = self._make_issue(10)
+        self.mock_gitlab_service_patched.get_issues.return_value = [kr]
+
+        etag, krs = await self.kr_service.list_krs_for_objective_conditional(10)
+        self.assertEqual([k.id for k in krs], [101])
+
+        same_etag, unchanged = await self.kr_service.list_krs_for_objective_conditional(10, if_none_match=etag)
+        self.assertEqual(same_etag, etag)
+        self.assertIsNone(unchanged)
+
+        kr_edited = kr.model_copy(update={"updated_at": "2025-01-02T00:00:00Z"})
+        self.mock_gitlab_service_patched.get_issues.return_value = [kr_edited]
+        new_etag, krs = await self.kr_service.list_krs_for_objective_conditional(10, if_none_match=etag)
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(len(krs), 1)
+
+    def _install_fake_objectives(self, objectives):
+        # Stateful fake: update_issue writes back into the objective the next get_issue returns.
+        store = {iid: GitlabIssue(iid=iid, title=title, description="### Resultados Chave", web_url=f"https://fakegitlab.com/issues/{iid}")
+                 for iid, title in objectives.items()}
+        created = iter(range(500, 600))
+
+        async def get_issue(iid, fresh=False):
+            await asyncio.sleep(0)
+            if iid not in store:
+                raise GitlabGetError("404 Not found", 404)
+            return store[iid]
+
+        async def update_issue(issue_iid, description):
+            await asyncio.sleep(0)
+            store[issue_iid] = store[issue_iid].model_copy(update={"description": description})
+            return store[issue_iid]
+
+        async def create_issue(title, description, labels):
+            iid = next(created)
+            return GitlabIssue(iid=iid, title=title, description=description, web_url=f"https://fakegitlab.com/issues/{iid}")
+
+        self.mock_gitlab_service_patched.get_issue.side_effect = get_issue
+        self.mock_gitlab_service_patched.update_issue.side_effect = update_issue
+        self.mock_gitlab_service_patched.create_issue.side_effect = create_issue
+        return store
+
+    def _kr_request(self, objective_iid, kr_number):
+        return KRCreateRequest(
+            objective_iid=objective_iid, kr_number=kr_number, title=f"KR {kr_number}", description="d",
+            meta_prevista=50, responsaveis=["A"], team_label="TeamX", product_label="ProductY"
+        )
+
+    async def test_create_krs_batch_rewrites_each_objective_once(self):
+        store = self._install_fake_objectives({10: "OBJ1: First", 20: "OBJ2: Second"})
+
+        results = await self.kr_service.create_krs_batch([
+            self._kr_request(10, 1), self._kr_request(10, 2), self._kr_request(20, 1)
+        ])
+        self.assertTrue(all(result.success for result in results))
+        responses = [result.kr for result in results]
+
+        self.assertEqual([r.objective_iid for r in responses], [10, 10, 20])
+        self.assertEqual(responses[1].title, "OBJ1 - KR2: KR 2")
+        self.assertEqual(self.mock_gitlab_service_patched.create_issue.call_count, 3)
+        self.assertEqual(self.mock_gitlab_service_patched.link_issues.call_count, 3)
+        self.assertEqual(self.mock_gitlab_service_patched.update_issue.call_count, 2)
+        self.assertEqual(
+            store[10].description,
+            "### Resultados Chave\n"
+            f"- [ ] **OBJ1 - KR1**: KR 1 ~\"{self.kr_service.kr_reference_label}\"\n"
+            f"- [ ] **OBJ1 - KR2**: KR 2 ~\"{self.kr_service.kr_reference_label}\""
+        )
+        self.assertEqual(self.kr_service.link_index.objective_for(responses[2].id), 20)
+
+    async def test_create_krs_batch_reports_partial_failures_per_item(self):
+        store = self._install_fake_objectives({10: "OBJ1: First"})
+        create_issue = self.mock_gitlab_service_patched.create_issue.side_effect
+
+        async def flaky_create_issue(title, description, labels):
+            if "KR2" in title:
+                raise GitlabCreateError("500 Internal Server Error", 500)
+            return await create_issue(title, description, labels)
+        self.mock_gitlab_service_patched.create_issue.side_effect = flaky_create_issue
+
+        with self.assertLogs("app.services.kr_service", level="WARNING"):
+            results = await self.kr_service.create_krs_batch([self._kr_request(10, 1), self._kr_request(10, 2)])
+
+        self.assertEqual([(r.kr_number, r.success) for r in results], [(1, True), (2, False)])
+        self.assertEqual(results[0].kr.title, "OBJ1 - KR1: KR 1")
+        self.assertIn("500 Internal Server Error", results[1].error)
+        self.assertIn("**OBJ1 - KR1**", store[10].description)
+        self.assertNotIn("**OBJ1 - KR2**", store[10].description)
+
+    async def test_create_krs_batch_missing_objective_creates_nothing(self):
+        self._install_fake_objectives({10: "OBJ1: First"})
+
+        with self.assertRaisesRegex(ValueError, "Parent objective with IID 99 not found."):
+            await self.kr_service.create_krs_batch([self._kr_request(10, 1), self._kr_request(99, 1)])
+        self.mock_gitlab_service_patched.create_issue.assert_not_called()
+
+    async def test_concurrent_create_kr_keeps_every_objective_reference(self):
+        store = self._install_fake_objectives({10: "OBJ1: First"})
+
+        await asyncio.gather(*(self.kr_service.create_kr(self._kr_request(10, n)) for n in range(1, 5)))
+
+        for n in range(1, 5):
+            self.assertIn(f"**OBJ1 - KR{n}**", store[10].description)
+
     # Remember to reset mocks for each test if not done in setUp for every call
     # The current setUp does reset_mock on the main instance.
     # For get_issue, update_issue per-test, ensure they are reset or configured freshly.
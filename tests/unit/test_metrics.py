@@ -0,0 +1,120 @@
+import time
+import unittest
+
+import httpx
+from fastapi.testclient import TestClient
+from gitlab.exceptions import GitlabGetError
+
+from app.main import app
+from app.services import metrics
+from app.services.gitlab_service import GitlabService
+from app.services.metrics import MetricsRegistry
+
+from factories import issue_json
+
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+class TestRegistry(unittest.TestCase):
+
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "/krs/{kr_iid}")
+
+        text = registry.render()
+
+        self.assertIn('latency_seconds_bucket{route="/krs/{kr_iid}",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/krs/{kr_iid}",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/krs/{kr_iid}",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/krs/{kr_iid}"} 4.05', text)
+        self.assertIn('latency_seconds_count{route="/krs/{kr_iid}"} 4', text)
+        self.assertIn("# TYPE latency_seconds histogram", text)
+
+    def test_label_values_are_escaped_and_names_unique(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("errors_total", "Errors.", ("error",))
+        counter.inc('say "hi"\n')
+
+        self.assertIn('errors_total{error="say \\"hi\\"\\n"} 1', registry.render())
+        with self.assertRaises(ValueError):
+            registry.counter("errors_total", "Again.")
+
+    def test_observation_costs_microseconds(self):
+        histogram = MetricsRegistry().histogram("h", "H.", ("route",))
+        started = time.perf_counter()
+        for _ in range(10_000):
+            histogram.observe(0.02, "/krs/{kr_iid}")
+        per_call_us = (time.perf_counter() - started) / 10_000 * 1e6
+
+        self.assertLess(per_call_us, 50) # Around 1 µs on a laptop; generous for slow CI runners
+
+class TestGitlabCallMetrics(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.service = GitlabService()
+        self.service._project_path = "42"
+        self.status = 200
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(self.status, json=issue_json(7) if self.status == 200 else {"message": "boom"})
+
+        self.service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+    async def asyncTearDown(self):
+        await self.service.aclose()
+
+    async def test_calls_latency_and_errors_are_counted_per_method(self):
+        calls = metrics.gitlab_calls_total.value("get_issue")
+        observed = metrics.gitlab_call_duration_seconds.count("get_issue")
+        errors = metrics.gitlab_call_errors_total.value("get_issue", "GitlabGetError")
+        responses_404 = metrics.gitlab_http_requests_total.value("GET", "404")
+
+        await self.service.get_issue(7)
+        await self.service.get_issue(7) # Cache hit: counted as a call, no HTTP request
+        self.service.issue_cache.invalidate(7)
+        self.status = 404
+        with self.assertRaises(GitlabGetError):
+            await self.service.get_issue(7)
+
+        self.assertEqual(metrics.gitlab_calls_total.value("get_issue") - calls, 3)
+        self.assertEqual(metrics.gitlab_call_duration_seconds.count("get_issue") - observed, 3)
+        self.assertEqual(metrics.gitlab_call_errors_total.value("get_issue", "GitlabGetError") - errors, 1)
+        self.assertEqual(metrics.gitlab_http_requests_total.value("GET", "404") - responses_404, 1)
+
+    async def test_async_generators_stay_async_generators(self):
+        calls = metrics.gitlab_calls_total.value("iter_issues")
+        self.status = 200
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=[issue_json(1), issue_json(2)])
+        self.service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+        issues = [issue async for issue in self.service.iter_issues(remember=False)]
+
+        self.assertEqual([issue.iid for issue in issues], [1, 2])
+        self.assertEqual(metrics.gitlab_calls_total.value("iter_issues") - calls, 1)
+
+class TestMetricsRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_routes_are_labelled_by_template(self):
+        self.client.get("/krs/5") # 401 without a token
+        self.client.get("/krs/6")
+        self.client.get("/no/such/path/123")
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('okr_http_requests_total{method="GET",route="/krs/{kr_iid}",status="401"}', response.text)
+        self.assertIn('route="unmatched",status="404"', response.text)
+        self.assertNotIn("/krs/5", response.text)
+        self.assertNotIn("/no/such/path", response.text)
+        self.assertIn('okr_cache_hit_ratio{cache="issue"}', response.text)
+        self.assertIn('okr_cache_hit_ratio{cache="parsed_activities"}', response.text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,18 @@
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 from app.services.objective_service import ObjectiveService
+from app.services.gitlab_service import GitlabService
 from app.models import ObjectiveCreateRequest, ObjectiveResponse
 # Removed GitlabConfig as it's not used by the service directly in tests
 from app.config import Settings # Import Settings to create test_settings instance
-from gitlab.v4.objects import ProjectIssue
+from app.models import GitlabIssue, GitlabIssuePage
+from gitlab.exceptions import GitlabGetError
 
-class TestObjectiveService(unittest.TestCase):
+class TestObjectiveService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.mock_gitlab_service_instance = MagicMock()
+        self.mock_gitlab_service_instance = MagicMock(spec=GitlabService)
         self.gitlab_service_patcher = patch('app.services.objective_service.gitlab_service', self.mock_gitlab_service_instance)
         self.mock_gitlab_service_instance_patched = self.gitlab_service_patcher.start()
         self.test_settings = Settings(
@@ -19,7 +22,7 @@ class TestObjectiveService(unittest.TestCase):
             gitlab_objective_labels=["2025", "OKR SUTI", "OKR::Objetivo", "OKR::Q2"],
             gitlab_kr_labels=["2025", "OKR SUTI", "OKR::Resultado Chave", "OKR::Q2"]
         )
-        self.settings_patcher = patch('app.config.settings', self.test_settings)
+        self.settings_patcher = patch('app.services.objective_service.settings', self.test_settings)
         self.mock_settings_patched = self.settings_patcher.start()
         self.objective_service = ObjectiveService()
         # Injete explicitamente o mock na instância do serviço
@@ -30,8 +33,8 @@ class TestObjectiveService(unittest.TestCase):
         self.gitlab_service_patcher.stop()
         self.settings_patcher.stop()
 
-    def test_create_objective_formatting_and_service_call(self):
-        mock_created_issue = MagicMock(spec=ProjectIssue)
+    async def test_create_objective_formatting_and_service_call(self):
+        mock_created_issue = MagicMock(spec=GitlabIssue)
         mock_created_issue.iid = 123
         mock_created_issue.title = "OBJ1: TEST OBJECTIVE UPPERCASE"
         mock_created_issue.description = "###  Descrição:\n\n> Test Description\n\n### Resultados Chave"
@@ -47,7 +50,7 @@ class TestObjectiveService(unittest.TestCase):
             product_label="ProductY"
         )
 
-        response = self.objective_service.create_objective(objective_data)
+        response = await self.objective_service.create_objective(objective_data)
 
         expected_title = "OBJ1: TEST OBJECTIVE UPPERCASE"
         expected_description = "###  Descrição:\n\n> Test Description\n\n### Resultados Chave"
@@ -67,8 +70,8 @@ class TestObjectiveService(unittest.TestCase):
         self.assertEqual(response.description, mock_created_issue.description)
         self.assertEqual(str(response.web_url), str(mock_created_issue.web_url))
 
-    def test_create_objective_title_is_upper_cased(self):
-        mock_created_issue = MagicMock(spec=ProjectIssue)
+    async def test_create_objective_title_is_upper_cased(self):
+        mock_created_issue = MagicMock(spec=GitlabIssue)
         mock_created_issue.iid = 124
         # This title is what create_issue would be called with by the service
         mock_created_issue.title = "OBJ2: ANOTHER TEST LOWERCASE"
@@ -83,11 +86,62 @@ class TestObjectiveService(unittest.TestCase):
             team_label="TeamX",
             product_label="ProductY"
         )
-        self.objective_service.create_objective(objective_data)
+        await self.objective_service.create_objective(objective_data)
 
         args, kwargs = self.mock_gitlab_service_instance_patched.create_issue.call_args
         # The 'title' kwarg passed to the mock should be the fully formatted one.
         self.assertEqual(kwargs['title'], "OBJ2: ANOTHER TEST LOWERCASE")
 
+    async def test_list_objectives_conditional_pages_and_maps_issues(self):
+        mock_issue = MagicMock(spec=GitlabIssue)
+        mock_issue.iid = 7
+        mock_issue.title = "OBJ7: PAGED"
+        mock_issue.description = "desc"
+        mock_issue.web_url = "https://fakegitlab.com/fakeproject/issues/7"
+        mock_issue.updated_at = "2025-01-01T00:00:00Z"
+        self.mock_gitlab_service_instance_patched.list_issues_page.return_value = GitlabIssuePage.model_construct(
+            issues=[mock_issue], next_cursor="next-token"
+        )
+
+        etag, objectives, next_cursor = await self.objective_service.list_objectives_conditional(limit=1, cursor="token")
+
+        self.mock_gitlab_service_instance_patched.list_issues_page.assert_called_once_with(
+            labels=self.objective_service.objective_labels, limit=1, cursor="token", state=None, updated_after=None
+        )
+        self.assertEqual([objective.id for objective in objectives], [7])
+        self.assertEqual(next_cursor, "next-token")
+
+    async def test_list_objectives_conditional_passes_filters_to_gitlab(self):
+        self.mock_gitlab_service_instance_patched.list_issues.return_value = []
+        updated_after = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+        await self.objective_service.list_objectives_conditional(
+            team="TimeA", product="ProdutoX", state="opened", updated_after=updated_after
+        )
+
+        self.mock_gitlab_service_instance_patched.list_issues.assert_called_once_with(
+            labels=self.objective_service.objective_labels + ["TimeA", "ProdutoX"], state="opened", updated_after=updated_after
+        )
+
+    async def test_get_objective_conditional_skips_mapping_when_etag_matches(self):
+        issue = GitlabIssue(iid=8, title="OBJ8: X", description="d", web_url="https://fakegitlab.com/issues/8",
+                            updated_at="2025-03-01T10:00:00Z")
+        self.mock_gitlab_service_instance_patched.get_issue.return_value = issue
+
+        etag, objective = await self.objective_service.get_objective_conditional(8)
+        self.assertEqual(objective.id, 8)
+
+        with patch.object(self.objective_service, '_map_issue_to_objective_response') as mock_map:
+            same_etag, not_modified = await self.objective_service.get_objective_conditional(8, if_none_match=etag)
+        self.assertEqual(same_etag, etag)
+        self.assertIsNone(not_modified)
+        mock_map.assert_not_called()
+
+    async def test_get_objective_conditional_not_found_raises_value_error(self):
+        self.mock_gitlab_service_instance_patched.get_issue.side_effect = GitlabGetError
+
+        with self.assertRaisesRegex(ValueError, "Objective with IID 404 not found."):
+            await self.objective_service.get_objective_conditional(404)
+
 if __name__ == '__main__':
     unittest.main()
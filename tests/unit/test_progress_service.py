@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import MagicMock
+
+from gitlab.exceptions import GitlabGetError
+
+from app.models import KRUpdateRequest
+from app.services.gitlab_service import GitlabService
+from app.services.kr_service import KRService
+from app.services.link_index import LinkIndex
+from app.services.objective_service import ObjectiveService
+from app.services.okr_mirror import OKRMirror
+from app.services.progress_index import ProgressIndex, ProgressTotals
+from app.services.progress_service import ProgressService
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_kr, make_objective
+
+class TestProgressIndex(unittest.TestCase):
+
+    def test_record_kr_keeps_totals_incrementally(self):
+        index = ProgressIndex()
+        index.set_objective(1, [(11, 100, 40), (12, 50, 50)])
+
+        index.record_kr(11, 100, 80) # Known KR, objective resolved from the index
+        index.record_kr(13, 20, 0, objective_iid=1)
+
+        self.assertEqual(index.totals_for(1), ProgressTotals(3, 170, 130))
+
+    def test_record_kr_ignores_objectives_not_loaded(self):
+        index = ProgressIndex()
+        index.record_kr(11, 100, 40, objective_iid=1)
+
+        self.assertFalse(index.is_loaded(1))
+        self.assertIsNone(index.totals_for(1))
+
+    def test_moving_and_removing_krs(self):
+        index = ProgressIndex()
+        index.set_objective(1, [(11, 100, 40)])
+        index.set_objective(2, [])
+
+        index.record_kr(11, 100, 40, objective_iid=2)
+        self.assertEqual(index.totals_for(1), ProgressTotals(0, 0, 0))
+        self.assertEqual(index.totals_for(2), ProgressTotals(1, 100, 40))
+
+        index.remove_kr(11)
+        self.assertEqual(index.totals_for(2), ProgressTotals(0, 0, 0))
+
+class TestProgressService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.issues = {1: make_objective(1), 2: make_objective(2), 11: make_kr(11, 100, 40), 12: make_kr(12, 50, 10)}
+        self.mock_gitlab_service = MagicMock(spec=GitlabService)
+
+        async def get_issue(iid, fresh=False):
+            if iid not in self.issues:
+                raise GitlabGetError("404 Not Found", 404)
+            return self.issues[iid]
+
+        async def update_issue(issue_iid, description=None, **kwargs):
+            self.issues[issue_iid] = self.issues[issue_iid].model_copy(update={"description": description})
+            return self.issues[issue_iid]
+
+        self.mock_gitlab_service.get_issue.side_effect = get_issue
+        self.mock_gitlab_service.update_issue.side_effect = update_issue
+        self.mock_gitlab_service.list_issue_links.side_effect = self._links
+        self.scans = []
+
+        async def iter_issues(labels=None, remember=True, state=None, updated_after=None, order_by=None):
+            self.scans.append(labels)
+            for issue in self.issues.values():
+                if set(labels).issubset(issue.labels):
+                    yield issue
+
+        self.mock_gitlab_service.iter_issues = iter_issues
+
+        self.kr_service = KRService()
+        self.kr_service.gitlab_service = self.mock_gitlab_service
+        self.kr_service.kr_labels = KR_LABELS
+        self.kr_service.link_index = LinkIndex()
+        self.kr_service.progress_index = ProgressIndex()
+
+        self.progress_service = ProgressService()
+        self.progress_service.gitlab_service = self.mock_gitlab_service
+        self.progress_service.objective_service = ObjectiveService()
+        self.progress_service.kr_service = self.kr_service
+        self.progress_service.objective_service.objective_labels = OBJECTIVE_LABELS
+        self.progress_service.mirror = OKRMirror(self.mock_gitlab_service, OBJECTIVE_LABELS, KR_LABELS)
+
+    async def _links(self, objective_iid):
+        return [self.issues[11], self.issues[12]] if objective_iid == 1 else []
+
+    async def test_get_objective_progress_aggregates_kr_metas(self):
+        progress = await self.progress_service.get_objective_progress(1)
+
+        self.assertEqual(progress.kr_count, 2)
+        self.assertEqual(progress.meta_prevista, 75.0)
+        self.assertEqual(progress.meta_realizada, 25.0)
+        self.assertEqual(progress.progress_percent, round(100 * 50 / 150, 2))
+
+    async def test_update_kr_is_reflected_without_reloading_the_objective(self):
+        await self.progress_service.get_objective_progress(1)
+        self.assertEqual(self.mock_gitlab_service.list_issue_links.call_count, 1)
+
+        await self.kr_service.update_kr(11, KRUpdateRequest(meta_realizada=100))
+        progress = await self.progress_service.get_objective_progress(1)
+
+        self.assertEqual(progress.meta_realizada, 55.0)
+        self.assertEqual(self.mock_gitlab_service.list_issue_links.call_count, 1)
+
+    async def test_list_objectives_progress_loads_each_objective_once(self):
+        first = await self.progress_service.list_objectives_progress()
+        second = await self.progress_service.list_objectives_progress()
+
+        self.assertEqual([progress.kr_count for progress in first], [2, 0])
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_gitlab_service.list_issue_links.call_count, 2)
+        self.assertEqual(self.scans, [OBJECTIVE_LABELS, KR_LABELS]) # One mirror scan, not a listing per call
+        self.mock_gitlab_service.list_issues.assert_not_called()
+
+    async def test_get_objective_progress_not_found(self):
+        with self.assertRaises(ValueError):
+            await self.progress_service.get_objective_progress(404)
+
+if __name__ == '__main__':
+    unittest.main()
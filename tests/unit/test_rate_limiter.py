@@ -0,0 +1,101 @@
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from app.services.gitlab_service import GitlabService
+from app.services.rate_limiter import BULK, INTERACTIVE, GitlabRateLimiter, bulk_priority, current_priority
+
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+class TestGitlabRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def drain(self, limiter: GitlabRateLimiter) -> None:
+        while limiter.tokens >= 1:
+            await limiter.acquire(INTERACTIVE)
+
+    async def test_interactive_reads_jump_the_bulk_queue(self):
+        limiter = GitlabRateLimiter(rate_per_second=50, burst=4, bulk_reserve=0.25)
+        await self.drain(limiter)
+        served = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            served.append(name)
+
+        bulk = [asyncio.create_task(call(f"bulk{i}", BULK)) for i in range(3)]
+        await asyncio.sleep(0) # Bulk calls are queued first
+        interactive = asyncio.create_task(call("read", INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+
+        self.assertEqual(served[0], "read")
+        self.assertEqual(served[1:], ["bulk0", "bulk1", "bulk2"])
+
+    async def test_bulk_calls_leave_the_reserve_to_interactive_ones(self):
+        limiter = GitlabRateLimiter(rate_per_second=0.001, burst=4, bulk_reserve=0.5) # Practically no refill
+
+        await limiter.acquire(BULK)
+        await limiter.acquire(BULK)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(BULK), timeout=0.05)
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), timeout=0.05)
+        await asyncio.wait_for(limiter.acquire(INTERACTIVE), timeout=0.05)
+
+    async def test_rate_follows_the_rate_limit_headers(self):
+        now = time.time()
+        limiter = GitlabRateLimiter(rate_per_second=100, burst=50, headroom=0.1, wall_clock=lambda: now)
+
+        limiter.observe(200, {"RateLimit-Remaining": "20", "RateLimit-Reset": str(now + 10)})
+
+        self.assertAlmostEqual(limiter.rate, 1.8) # 90% of what is left, spread over the 10 s to the reset
+        self.assertLess(limiter.tokens, 18.5)
+
+    async def test_429_pauses_every_caller_until_retry_after(self):
+        limiter = GitlabRateLimiter(rate_per_second=1000, burst=10)
+        limiter.observe(429, {"Retry-After": "0.2"})
+
+        started = time.monotonic()
+        await asyncio.gather(limiter.acquire(INTERACTIVE), limiter.acquire(BULK))
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    async def test_disabled_limiter_never_waits(self):
+        limiter = GitlabRateLimiter(rate_per_second=0, burst=1)
+        limiter.observe(429, {"Retry-After": "60"})
+
+        for _ in range(100):
+            self.assertEqual(await limiter.acquire(BULK), 0.0)
+
+    def test_bulk_priority_is_scoped(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with bulk_priority():
+            self.assertEqual(current_priority(), BULK)
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+class TestGitlabServiceThrottling(unittest.IsolatedAsyncioTestCase):
+
+    async def test_429_is_retried_after_the_pause(self):
+        service = GitlabService()
+        service._project_path = "42"
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0.05"}, json={"message": "Retry later"}),
+            httpx.Response(200, json={"id": 42}),
+        ]
+        calls = []
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            calls.append(time.monotonic())
+            return responses.pop(0)
+        service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+        try:
+            self.assertEqual(await service.get_project(), {"id": 42})
+        finally:
+            await service.aclose()
+
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.04)
+
+if __name__ == '__main__':
+    unittest.main()
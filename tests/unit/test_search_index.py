@@ -0,0 +1,52 @@
+import unittest
+
+from app.services.search_index import SearchIndex, fold, tokenize
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_kr, make_objective
+
+class TestTokenizer(unittest.TestCase):
+
+    def test_fold_strips_accents_and_case(self):
+        self.assertEqual(fold("Ação Única ÇÃO"), "acao unica cao")
+
+    def test_tokenize_drops_stopwords(self):
+        self.assertEqual(tokenize("Migração da plataforma de Pagamentos"), ["migracao", "plataforma", "pagamentos"])
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex(OBJECTIVE_LABELS, KR_LABELS)
+        self.index.index_issue(make_objective(1, title="OBJ1: Melhorar a operação"))
+        self.index.index_issue(make_kr(11, title="OBJ1 - KR1: Reduzir incidentes", description="Cobertura de monitoração",
+                                       responsaveis=["Maria"], activities=[("Projeto Ágora", "Q1", 0)]))
+        self.index.index_issue(make_kr(12, title="OBJ1 - KR2: Projeto Ágora em produção", description="Lançar o portal",
+                                       responsaveis=["Maria"]))
+
+    def test_search_is_accent_insensitive_and_ranks_title_hits_first(self):
+        results = self.index.search("agora")
+
+        self.assertEqual([result.iid for result in results], [12, 11])
+        self.assertEqual(results[0].matched_fields, ["title"])
+        self.assertEqual(results[1].matched_fields, ["activities"])
+
+    def test_all_query_words_must_match(self):
+        self.assertEqual([result.iid for result in self.index.search("agora monitoracao")], [11])
+        self.assertEqual(self.index.search("agora inexistente"), [])
+
+    def test_kind_filter_and_responsaveis(self):
+        self.assertEqual([result.iid for result in self.index.search("maria", kind="kr")], [11, 12])
+        self.assertEqual([result.iid for result in self.index.search("operacao", kind="objective")], [1])
+        self.assertEqual(self.index.search("operacao", kind="kr"), [])
+
+    def test_reindexing_replaces_previous_postings(self):
+        self.index.index_issue(make_kr(12, title="OBJ1 - KR2: Portal novo", responsaveis=["Maria"], updated_at="2025-01-02T00:00:00.000Z"))
+
+        self.assertEqual([result.iid for result in self.index.search("agora")], [11])
+        self.assertEqual([result.iid for result in self.index.search("portal")], [12])
+
+        self.index.remove_issue(12)
+        self.assertEqual(self.index.search("portal"), [])
+        self.assertEqual(len(self.index), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import re
+import unittest
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import ServerTimingMiddleware
+from app.services import request_timing
+from app.services.gitlab_service import GitlabService
+
+from factories import issue_json
+
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+def parse_server_timing(header: str) -> dict:
+    # {"gitlab.get_issue": (dur_ms, "3 calls"), ...}
+    entries = {}
+    for part in header.split(", "):
+        fields = part.split(";")
+        params = dict(field.split("=", 1) for field in fields[1:])
+        entries[fields[0]] = (float(params["dur"]), params.get("desc", "").strip('"'))
+    return entries
+
+class TestServerTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.gitlab_service = GitlabService()
+        self.gitlab_service._project_path = "42"
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/42"):
+                return httpx.Response(200, json={"id": 42})
+            iid = int(request.url.path.rsplit("/", 1)[-1])
+            return httpx.Response(200, json=issue_json(iid))
+
+        self.transport = httpx.MockTransport(dispatch)
+        service = self.gitlab_service
+        api = FastAPI()
+        api.add_middleware(ServerTimingMiddleware)
+
+        @api.get("/n-plus-one")
+        async def n_plus_one():
+            service._client = httpx.AsyncClient(base_url=BASE_URL, transport=self.transport)
+            await service.get_project()
+            # Concurrent calls run in child tasks; they are still counted for this request.
+            await asyncio.gather(*(service.get_issue(iid) for iid in (1, 2, 3)))
+            await service.get_issue(1) # Cache hit: no HTTP request, so no upstream call
+            await service.aclose()
+            return {}
+
+        @api.get("/local")
+        async def local():
+            return {}
+
+        self.client = TestClient(api)
+
+    def test_upstream_calls_are_counted_per_outer_method(self):
+        response = self.client.get("/n-plus-one")
+        timing = parse_server_timing(response.headers["server-timing"])
+
+        self.assertEqual(timing["gitlab"][1], "4 calls")
+        self.assertEqual(timing["gitlab.get_issue"][1], "3 calls")
+        self.assertEqual(timing["gitlab.get_project"][1], "1 call")
+        self.assertIn("cpu", timing)
+        self.assertGreaterEqual(timing["total"][0], 0)
+
+    def test_requests_without_gitlab_calls_report_zero(self):
+        header = self.client.get("/local").headers["server-timing"]
+
+        self.assertTrue(re.match(r'gitlab;dur=0\.0;desc="0 calls", cpu;dur=[\d.]+, total;dur=[\d.]+$', header), header)
+
+    def test_calls_outside_a_request_are_not_collected(self):
+        self.assertIsNone(request_timing.current_request())
+        request_timing.record_upstream(0.5) # e.g. the background sync; must not fail
+
+class TestAttribution(unittest.IsolatedAsyncioTestCase):
+
+    async def test_nested_calls_are_attributed_to_the_outer_method(self):
+        service = GitlabService()
+        service._project_path = "42"
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/user"):
+                return httpx.Response(200, json={"id": 1})
+            if request.url.path.endswith("/issues"):
+                return httpx.Response(200, json=[issue_json(1), issue_json(2)])
+            return httpx.Response(200, json={"id": 42})
+        service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+        token = request_timing.start_request()
+        try:
+            await service.connect() # auth + get_project
+            await service.list_issues() # iter_issues underneath
+            timing = request_timing.current_request()
+        finally:
+            request_timing.end_request(token)
+            await service.aclose()
+
+        self.assertEqual({method: entry[0] for method, entry in timing.by_method.items()}, {"connect": 2, "list_issues": 1})
+        self.assertIsNone(request_timing.current_gitlab_method.get())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from app.services.gitlab_service import GitlabService
+from app.services.issue_cache import IssueCache
+from app.services.link_index import LinkIndex
+from app.services.okr_mirror import OKRMirror, parse_gitlab_timestamp
+from app.services.snapshot_service import SnapshotService
+from app.services.snapshot_store import OKRSnapshot, SnapshotStore
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_issue
+
+SYNCED_AT = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+def make_gitlab_service(delta=()) -> MagicMock:
+    calls = []
+
+    async def iter_issues(labels=None, remember=True, state=None, updated_after=None, order_by=None):
+        calls.append({"labels": labels, "updated_after": updated_after, "order_by": order_by})
+        for issue in (delta if updated_after is not None else ()):
+            yield issue
+
+    mock_gitlab_service = MagicMock(spec=GitlabService)
+    mock_gitlab_service.iter_issues = iter_issues
+    mock_gitlab_service.issue_cache = IssueCache(max_size=10, ttl_seconds=60)
+    mock_gitlab_service.calls = calls
+    return mock_gitlab_service
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.directory.name, "okr.sqlite3"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_missing_file_has_no_snapshot(self):
+        self.assertIsNone(self.store.load())
+
+    def test_save_and_load_round_trip(self):
+        issues = [make_issue(1, OBJECTIVE_LABELS, title="OBJ1: Ação"), make_issue(11, KR_LABELS)]
+        self.store.save(OKRSnapshot(issues=issues, links={1: [11], 2: []}, last_synced_at=SYNCED_AT, complete=True))
+
+        snapshot = self.store.load()
+
+        self.assertEqual(snapshot.issues, issues)
+        self.assertEqual(snapshot.links, {1: [11], 2: []}) # Loaded-but-empty KR sets survive
+        self.assertEqual(snapshot.last_synced_at, SYNCED_AT)
+        self.assertTrue(snapshot.complete)
+
+    def test_save_replaces_the_previous_snapshot(self):
+        self.store.save(OKRSnapshot([make_issue(1, OBJECTIVE_LABELS)], {1: [11]}, SYNCED_AT, True))
+        self.store.save(OKRSnapshot([make_issue(2, OBJECTIVE_LABELS)], {}, None, False))
+
+        snapshot = self.store.load()
+
+        self.assertEqual([issue.iid for issue in snapshot.issues], [2])
+        self.assertEqual(snapshot.links, {})
+        self.assertIsNone(snapshot.last_synced_at)
+
+class TestOKRMirror(unittest.IsolatedAsyncioTestCase):
+
+    def test_parse_gitlab_timestamp(self):
+        self.assertEqual(parse_gitlab_timestamp("2025-01-01T12:00:00.000Z"), SYNCED_AT)
+
+    def test_only_newer_okr_issues_are_kept(self):
+        mirror = OKRMirror(make_gitlab_service(), OBJECTIVE_LABELS, KR_LABELS)
+
+        self.assertTrue(mirror.apply_issue(make_issue(11, KR_LABELS)))
+        self.assertFalse(mirror.apply_issue(make_issue(11, KR_LABELS))) # Same version
+        self.assertFalse(mirror.apply_issue(make_issue(99, ["Bug"])))
+        self.assertTrue(mirror.apply_issue(make_issue(11, ["Bug"], updated_at="2025-01-02T00:00:00.000Z")))
+        self.assertEqual(len(mirror), 0)
+
+    async def test_sync_delta_lists_from_the_watermark_and_reports_changes(self):
+        updated = make_issue(11, KR_LABELS, updated_at="2025-01-02T00:00:00.000Z")
+        gitlab = make_gitlab_service(delta=[updated, make_issue(1, OBJECTIVE_LABELS)])
+        mirror = OKRMirror(gitlab, OBJECTIVE_LABELS, KR_LABELS, overlap_seconds=5)
+        mirror.load([make_issue(1, OBJECTIVE_LABELS), make_issue(11, KR_LABELS)], complete=True, watermark=SYNCED_AT)
+
+        changed = await mirror.sync_delta()
+
+        self.assertEqual(changed, [updated]) # Issue 1 is unchanged since the snapshot
+        self.assertEqual(gitlab.calls, [{"labels": None, "updated_after": SYNCED_AT - timedelta(seconds=5), "order_by": "updated_at"}])
+        self.assertGreater(mirror.watermark, SYNCED_AT)
+        self.assertEqual(gitlab.issue_cache.get(11), updated)
+        gitlab.publish_issue.assert_any_call(updated)
+
+class TestSnapshotService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.directory.name, "okr.sqlite3"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_service(self, gitlab) -> SnapshotService:
+        service = SnapshotService(store=self.store, mirror=OKRMirror(gitlab, OBJECTIVE_LABELS, KR_LABELS))
+        service.link_index = LinkIndex()
+        return service
+
+    async def test_restore_warms_the_mirror_without_calling_gitlab(self):
+        self.store.save(OKRSnapshot(
+            issues=[make_issue(1, OBJECTIVE_LABELS), make_issue(11, KR_LABELS)],
+            links={1: [11], 2: []}, last_synced_at=SYNCED_AT, complete=True,
+        ))
+        gitlab = make_gitlab_service()
+        service = self.make_service(gitlab)
+
+        self.assertTrue(await service.restore())
+        await service.mirror.ensure_complete()
+
+        self.assertEqual([issue.iid for issue in service.mirror.issues()], [1, 11])
+        self.assertEqual(service.mirror.watermark, SYNCED_AT)
+        self.assertEqual(gitlab.calls, []) # Complete snapshot: no label scan
+        self.assertEqual(service.link_index.krs_for(2), [])
+        gitlab.publish_issue.assert_any_call(make_issue(11, KR_LABELS)) # Derived views are fed too
+        self.assertFalse(await service.save()) # Nothing changed since the restore
+
+    async def test_save_then_restore_in_a_new_worker(self):
+        first = self.make_service(make_gitlab_service())
+        first.mirror.load([make_issue(1, OBJECTIVE_LABELS), make_issue(11, KR_LABELS)], complete=True, watermark=SYNCED_AT)
+        first.link_index.set_krs(1, [11])
+        self.assertTrue(await first.save())
+
+        second = self.make_service(make_gitlab_service())
+        await second.restore()
+
+        self.assertEqual(second.mirror.issues(), first.mirror.issues())
+        self.assertTrue(second.mirror.is_complete)
+        self.assertEqual(second.link_index.objective_for(11), 1)
+
+    async def test_disabled_without_a_store(self):
+        service = SnapshotService(mirror=OKRMirror(make_gitlab_service(), OBJECTIVE_LABELS, KR_LABELS))
+        service.store = None
+
+        self.assertFalse(await service.restore())
+        self.assertFalse(await service.save())
+
+if __name__ == '__main__':
+    unittest.main()
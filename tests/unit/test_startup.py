@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+# Cumulative import times (microseconds, as reported by -X importtime). Measured around 0.1 s for
+# python-gitlab and 0.6 s for the whole app on a laptop; the budgets leave room for slow CI runners.
+GITLAB_IMPORT_BUDGET_US = 750_000
+APP_IMPORT_BUDGET_US = 3_000_000
+
+# Any socket use while importing the app fails the subprocess.
+_NO_NETWORK_IMPORT = """
+import socket
+
+def _refuse(*args, **kwargs):
+    raise RuntimeError("network call during import")
+
+socket.socket.connect = _refuse
+socket.socket.connect_ex = _refuse
+socket.create_connection = _refuse
+socket.getaddrinfo = _refuse
+
+import app.main
+"""
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.setdefault("GITLAB_ACCESS_TOKEN", "test-token")
+    env.setdefault("GITLAB_PROJECT_ID", "1")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120)
+
+def cumulative_import_times(stderr: str) -> dict:
+    # Lines look like "import time:       371 |      66804 |           gitlab"
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        try:
+            times[module.strip()] = int(cumulative)
+        except ValueError:
+            continue # Header line
+    return times
+
+class TestStartup(unittest.TestCase):
+
+    def test_importing_app_main_makes_no_network_calls(self):
+        result = run_python("-c", _NO_NETWORK_IMPORT)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_import_time_budget(self):
+        result = run_python("-X", "importtime", "-c", "import app.main")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        times = cumulative_import_times(result.stderr)
+
+        self.assertNotIn("jose", times) # Only imported when a token is created or checked
+        self.assertLess(times["gitlab"], GITLAB_IMPORT_BUDGET_US)
+        self.assertLess(times["app.main"], APP_IMPORT_BUDGET_US)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.models import GitlabIssue
+from app.services.gitlab_service import GitlabService
+from app.services.kr_service import KRService
+from app.services.objective_service import ObjectiveService
+from app.services.okr_mirror import OKRMirror
+from app.services.summary_service import SummaryService
+from app.services.summary_view import SummaryView
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_kr, make_objective
+
+class TestSummaryView(unittest.TestCase):
+
+    def setUp(self):
+        self.view = SummaryView(OBJECTIVE_LABELS, KR_LABELS, at_risk_threshold_percent=50.0)
+
+    def test_rows_group_by_team_and_product_labels(self):
+        self.view.apply_issue(make_objective(1, "TimeA", "ProdutoX"))
+        self.view.apply_issue(make_kr(11, 100, 80, "TimeA", "ProdutoX"))
+        self.view.apply_issue(make_kr(12, 100, 20, "TimeA"))
+        self.view.apply_issue(make_kr(13, 100, 10, "TimeA", state="closed"))
+
+        rows = {row.label: row for row in self.view.rows()}
+
+        self.assertEqual(sorted(rows), ["ProdutoX", "TimeA"])
+        self.assertEqual((rows["TimeA"].objective_count, rows["TimeA"].kr_count), (1, 3))
+        self.assertEqual(rows["TimeA"].progress_percent, round(100 * 110 / 300, 2))
+        self.assertEqual(rows["TimeA"].at_risk_kr_iids, [12]) # Closed KRs are never at risk
+        self.assertEqual(rows["ProdutoX"].at_risk_kr_count, 0)
+
+    def test_apply_issue_replaces_the_previous_contribution(self):
+        self.view.apply_issue(make_kr(11, 100, 10, "TimeA"))
+        self.view.apply_issue(make_kr(11, 100, 90, "TimeB", updated_at="2025-01-02T00:00:00.000Z"))
+
+        rows = self.view.rows()
+
+        self.assertEqual([row.label for row in rows], ["TimeB"])
+        self.assertEqual(rows[0].progress_percent, 90.0)
+        self.assertEqual(rows[0].at_risk_kr_count, 0)
+
+    def test_older_snapshots_are_ignored(self):
+        self.view.apply_issue(make_kr(11, 100, 90, "TimeA", updated_at="2025-01-02T00:00:00.000Z"))
+        self.view.apply_issue(make_kr(11, 100, 10, "TimeA", updated_at="2025-01-01T00:00:00.000Z"))
+
+        self.assertEqual(self.view.rows()[0].progress_percent, 90.0)
+
+    def test_issues_that_lose_okr_labels_or_are_removed_leave_the_view(self):
+        self.view.apply_issue(make_kr(11, 100, 10, "TimeA"))
+        self.view.apply_issue(make_objective(1, "TimeA"))
+
+        plain = GitlabIssue(iid=11, title="x", description="", web_url="https://fakegitlab.com/issues/11",
+                            labels=["TimeA"], updated_at="2025-01-02T00:00:00.000Z")
+        self.view.apply_issue(plain)
+        self.assertEqual(self.view.rows()[0].kr_count, 0)
+
+        self.view.remove_issue(1)
+        self.assertEqual(self.view.rows(), [])
+
+    def test_rows_can_be_filtered_by_label(self):
+        self.view.apply_issue(make_objective(1, "TimeA", "ProdutoX"))
+
+        self.assertEqual([row.label for row in self.view.rows(["ProdutoX"])], ["ProdutoX"])
+
+class TestSummaryService(unittest.IsolatedAsyncioTestCase):
+
+    async def test_first_read_scans_once_and_listener_keeps_view_current(self):
+        scans = []
+        issues_by_label = {
+            OBJECTIVE_LABELS[0]: [make_objective(1, "TimeA")],
+            KR_LABELS[0]: [make_kr(11, 100, 10, "TimeA")],
+        }
+
+        async def iter_issues(labels=None, remember=True):
+            scans.append(labels)
+            for issue in issues_by_label[labels[0]]:
+                yield issue
+
+        mock_gitlab_service = MagicMock(spec=GitlabService)
+        mock_gitlab_service.iter_issues = iter_issues
+        service = SummaryService()
+        service.gitlab_service = mock_gitlab_service
+        service.objective_service = ObjectiveService()
+        service.kr_service = KRService()
+        service.objective_service.objective_labels = OBJECTIVE_LABELS
+        service.kr_service.kr_labels = KR_LABELS
+        service.view = SummaryView(OBJECTIVE_LABELS, KR_LABELS)
+        service.mirror = OKRMirror(mock_gitlab_service, OBJECTIVE_LABELS, KR_LABELS)
+
+        await service.get_summary()
+        service.view.apply_issue(make_kr(11, 100, 100, "TimeA", updated_at="2025-02-01T00:00:00.000Z"))
+        rows = await service.get_summary()
+
+        self.assertEqual(len(scans), 2) # One pass over objectives and one over KRs, on the first read only
+        self.assertEqual(rows[0].progress_percent, 100.0)
+        self.assertEqual(rows[0].at_risk_kr_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.gitlab_service import GitlabService
+from app.services.issue_cache import IssueCache
+from app.services.link_index import LinkIndex
+from app.services.okr_mirror import OKRMirror
+from app.services.progress_index import ProgressIndex
+from app.services.snapshot_service import SnapshotService
+from app.services.sync_service import SyncService
+
+from factories import KR_LABELS, OBJECTIVE_LABELS, make_issue
+
+SYNCED_AT = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+class TestSyncService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.polls = []
+        self.deltas = []
+
+        async def iter_issues(labels=None, remember=True, state=None, updated_after=None, order_by=None):
+            self.polls.append(updated_after)
+            for issue in (self.deltas.pop(0) if self.deltas else []):
+                yield issue
+
+        self.mock_gitlab_service = MagicMock(spec=GitlabService)
+        self.mock_gitlab_service.iter_issues = iter_issues
+        self.mock_gitlab_service.issue_cache = IssueCache(max_size=10, ttl_seconds=60)
+        self.mirror = OKRMirror(self.mock_gitlab_service, OBJECTIVE_LABELS, KR_LABELS)
+        self.service = SyncService(mirror=self.mirror, interval_seconds=0.01)
+        self.service.link_index = LinkIndex()
+        self.service.progress_index = ProgressIndex()
+        self.service.snapshot_service = MagicMock(spec=SnapshotService)
+        self.service.snapshot_service.save = AsyncMock(return_value=True)
+
+    async def test_first_poll_starts_tracking_without_listing(self):
+        self.assertEqual(await self.service.sync_once(), [])
+
+        self.assertEqual(self.polls, [])
+        self.assertIsNotNone(self.service.status().watermark)
+
+    async def test_changed_issues_invalidate_the_link_graph_they_touch(self):
+        self.mirror.load([make_issue(1, OBJECTIVE_LABELS), make_issue(11, KR_LABELS)], complete=True, watermark=SYNCED_AT)
+        self.service.link_index.set_krs(1, [11])
+        self.service.link_index.set_krs(2, [21])
+        self.deltas = [[make_issue(11, KR_LABELS, updated_at="2025-01-02T00:00:00.000Z")]]
+
+        changed = await self.service.sync_once()
+
+        self.assertEqual([issue.iid for issue in changed], [11])
+        self.assertIsNone(self.service.link_index.krs_for(1)) # Reloaded on its next read
+        self.assertEqual(self.service.link_index.krs_for(2), [21])
+        status = self.service.status()
+        self.assertEqual((status.last_changed_count, status.total_changed_count), (1, 1))
+        self.assertGreater(status.watermark, SYNCED_AT)
+        self.assertGreaterEqual(status.lag_seconds, 0)
+
+    async def test_failed_poll_keeps_the_watermark_and_reports_the_error(self):
+        self.mirror.load([], complete=False, watermark=SYNCED_AT)
+
+        async def failing_iter_issues(**kwargs):
+            raise ConnectionError("GitLab unreachable")
+            yield # pragma: no cover
+
+        self.mock_gitlab_service.iter_issues = failing_iter_issues
+
+        with self.assertRaises(ConnectionError):
+            await self.service.sync_once()
+
+        self.assertEqual(self.mirror.watermark, SYNCED_AT)
+        self.assertIn("GitLab unreachable", self.service.status().last_error)
+
+    async def test_background_task_polls_until_stopped(self):
+        self.mirror.load([], complete=False, watermark=SYNCED_AT)
+        self.service.snapshot_save_interval_seconds = 0
+
+        self.assertTrue(self.service.start())
+        self.assertFalse(self.service.start()) # Already running
+        await asyncio.sleep(0.05)
+        await self.service.stop()
+
+        self.assertGreaterEqual(len(self.polls), 2)
+        self.assertFalse(self.service.status().running)
+        self.service.snapshot_service.save.assert_awaited()
+
+    def test_disabled_interval_never_starts(self):
+        self.assertFalse(SyncService(mirror=self.mirror, interval_seconds=0).start())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import json
+import os
+import unittest
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.webhooks import get_current_webhook_service
+from app.services.gitlab_service import GitlabService
+from app.services.kr_query_index import KRQueryIndex
+from app.services.link_index import LinkIndex
+from app.services.okr_mirror import OKRMirror
+from app.services.progress_index import ProgressIndex
+from app.services.sync_service import SyncService
+from app.services.webhook_service import WebhookService, issue_from_hook, normalize_timestamp
+
+FIXTURES = os.path.join(os.path.dirname(__file__), os.pardir, "fixtures", "gitlab_webhooks")
+OBJECTIVE_LABELS = ["OKR::Objetivo"]
+KR_LABELS = ["OKR::Resultado Chave"]
+SECRET = "s3cr3t"
+BASE_URL = "https://fakegitlab.com/api/v4"
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def make_webhook_service():
+    # A real GitlabService: hooks are applied locally, so no request is ever made.
+    gitlab_service = GitlabService()
+    mirror = OKRMirror(gitlab_service, OBJECTIVE_LABELS, KR_LABELS)
+    index = KRQueryIndex(KR_LABELS)
+    gitlab_service.add_issue_listener(index.index_issue)
+    sync_service = SyncService(mirror=mirror, interval_seconds=0)
+    sync_service.link_index = LinkIndex()
+    sync_service.progress_index = ProgressIndex()
+    service = WebhookService(secret=SECRET, project_id="42")
+    service.sync_service = sync_service
+    return service, index
+
+class TestHookMapping(unittest.TestCase):
+
+    def test_normalize_timestamp_matches_the_rest_api_format(self):
+        self.assertEqual(normalize_timestamp("2025-03-10 14:05:00 UTC"), "2025-03-10T14:05:00.000Z")
+        self.assertEqual(normalize_timestamp("2025-03-10T11:05:00-03:00"), "2025-03-10T14:05:00.000Z")
+        self.assertEqual(normalize_timestamp("2025-03-10T14:05:00.123Z"), "2025-03-10T14:05:00.123Z")
+        self.assertIsNone(normalize_timestamp("yesterday"))
+
+    def test_issue_from_hook(self):
+        issue = issue_from_hook(load_fixture("issue_hook_kr_update.json"))
+
+        self.assertEqual(issue.iid, 11)
+        self.assertEqual(issue.labels, ["OKR::Resultado Chave", "TimeA"])
+        self.assertEqual(issue.web_url, "https://gitlab.example.com/okr/okr-board/-/issues/11")
+        self.assertEqual((issue.state, issue.updated_at), ("opened", "2025-03-10T14:05:00.000Z"))
+        self.assertIn("**Meta realizada**: 70%", issue.description)
+
+class TestWebhookReplay(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.service, self.index = make_webhook_service()
+        self.gitlab_service = self.service.sync_service.mirror.gitlab_service
+        self.gitlab_service._project_path = "42"
+        self.requests = []
+        self.rest_issue = None
+
+        async def dispatch(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, json=self.rest_issue.model_dump())
+        self.gitlab_service._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(dispatch))
+
+    async def asyncTearDown(self):
+        await self.gitlab_service.aclose()
+
+    def mirror_rest_copy(self, updated_at: str, description: str):
+        # The copy a REST read left in the mirror: same second as the hook, with milliseconds.
+        issue = issue_from_hook(load_fixture("issue_hook_kr_update.json"))
+        self.service.sync_service.mirror.ingest(issue.model_copy(update={"updated_at": updated_at, "description": description}))
+        return issue
+
+    async def test_update_is_applied_to_cache_mirror_and_indexes(self):
+        result = await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_update.json"))
+
+        self.assertEqual((result.status, result.issue_iid), ("applied", 11))
+        self.assertEqual(self.gitlab_service.issue_cache.get(11).updated_at, "2025-03-10T14:05:00.000Z")
+        self.assertEqual(len(self.service.sync_service.mirror), 1)
+        self.assertEqual([issue.iid for issue in self.index.find_krs(meta_realizada_min=70)], [11])
+
+    async def test_redelivered_and_out_of_order_events_change_nothing(self):
+        for name in ("issue_hook_kr_update.json", "issue_hook_kr_update.json", "issue_hook_kr_update_stale.json"):
+            await self.service.handle_event("Issue Hook", load_fixture(name))
+
+        replay = await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_update_stale.json"))
+
+        self.assertEqual(replay.status, "unchanged")
+        self.assertIn("**Meta realizada**: 70%", self.gitlab_service.issue_cache.get(11).description)
+        self.assertEqual([issue.iid for issue in self.index.find_krs(meta_realizada_min=70)], [11])
+
+    async def test_same_second_edit_is_refetched_not_dropped(self):
+        hook_issue = self.mirror_rest_copy("2025-03-10T14:05:00.400Z", "**Meta realizada**: 10%")
+        self.rest_issue = hook_issue.model_copy(update={"updated_at": "2025-03-10T14:05:00.800Z"})
+
+        result = await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_update.json"))
+
+        self.assertEqual(result.status, "applied")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.service.sync_service.mirror.get(11).updated_at, "2025-03-10T14:05:00.800Z")
+        self.assertEqual([issue.iid for issue in self.index.find_krs(meta_realizada_min=70)], [11])
+
+    async def test_same_second_redelivery_is_not_refetched(self):
+        hook_issue = issue_from_hook(load_fixture("issue_hook_kr_update.json"))
+        self.mirror_rest_copy("2025-03-10T14:05:00.400Z", hook_issue.description)
+
+        result = await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_update.json"))
+
+        self.assertEqual(result.status, "unchanged")
+        self.assertEqual(self.requests, [])
+
+    async def test_removed_okr_label_drops_the_issue_from_the_indexes(self):
+        await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_update.json"))
+        self.service.sync_service.link_index.set_krs(1, [11])
+
+        result = await self.service.handle_event("Issue Hook", load_fixture("issue_hook_kr_unlabeled.json"))
+
+        self.assertEqual(result.status, "applied")
+        self.assertEqual(len(self.service.sync_service.mirror), 0)
+        self.assertEqual(self.index.find_krs(), [])
+        self.assertIsNone(self.service.sync_service.link_index.krs_for(1))
+
+    async def test_other_events_and_projects_are_ignored(self):
+        self.assertEqual((await self.service.handle_event("Note Hook", load_fixture("note_hook.json"))).status, "ignored")
+
+        payload = load_fixture("issue_hook_kr_update.json")
+        payload["project"].update({"id": 7, "path_with_namespace": "other/project"})
+        self.assertEqual((await self.service.handle_event("Issue Hook", payload)).status, "ignored")
+        self.assertEqual(len(self.service.sync_service.mirror), 0)
+
+class TestWebhookRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.service, _ = make_webhook_service()
+        app.dependency_overrides[get_current_webhook_service] = lambda: self.service
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def post(self, token, payload, event="Issue Hook"):
+        headers = {"X-Gitlab-Event": event}
+        if token is not None:
+            headers["X-Gitlab-Token"] = token
+        return self.client.post("/webhooks/gitlab", json=payload, headers=headers)
+
+    def test_valid_token_applies_the_event(self):
+        response = self.post(SECRET, load_fixture("issue_hook_kr_update.json"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "applied")
+
+    def test_missing_or_wrong_token_is_rejected(self):
+        self.assertEqual(self.post(None, load_fixture("issue_hook_kr_update.json")).status_code, 401)
+        self.assertEqual(self.post("wrong", load_fixture("issue_hook_kr_update.json")).status_code, 401)
+        self.assertEqual(len(self.service.sync_service.mirror), 0)
+
+    def test_unconfigured_secret_disables_the_endpoint(self):
+        self.service.secret = ""
+
+        self.assertEqual(self.post("", load_fixture("issue_hook_kr_update.json")).status_code, 503)
+
+    def test_malformed_issue_payload_is_a_bad_request(self):
+        payload = load_fixture("issue_hook_kr_update.json")
+        del payload["object_attributes"]["iid"]
+
+        self.assertEqual(self.post(SECRET, payload).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+
+from app.services.write_coalescer import WriteCoalescer
+
+class TestWriteCoalescer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.applied = []
+        self.in_apply = 0
+        self.max_in_apply = 0
+
+        async def apply(key, items):
+            self.in_apply += 1
+            self.max_in_apply = max(self.max_in_apply, self.in_apply)
+            await asyncio.sleep(0.01)
+            self.in_apply -= 1
+            self.applied.append((key, list(items)))
+            return f"{key}:{','.join(items)}"
+
+        self.coalescer = WriteCoalescer(apply, window_seconds=0.02)
+
+    async def test_submissions_within_window_share_one_apply(self):
+        results = await asyncio.gather(*(self.coalescer.submit("kr-1", item) for item in ["a", "b", "c"]))
+
+        self.assertEqual(self.applied, [("kr-1", ["a", "b", "c"])])
+        self.assertEqual(results, ["kr-1:a,b,c"] * 3)
+
+    async def test_keys_are_applied_independently(self):
+        results = await asyncio.gather(self.coalescer.submit(1, "a"), self.coalescer.submit(2, "b"))
+
+        self.assertEqual(sorted(self.applied), [(1, ["a"]), (2, ["b"])])
+        self.assertEqual(results, ["1:a", "2:b"])
+
+    async def test_batches_for_same_key_never_overlap(self):
+        first = asyncio.ensure_future(self.coalescer.submit("k", "a"))
+        await asyncio.sleep(0.025) # first batch is now applying
+        second = await self.coalescer.submit("k", "b")
+
+        self.assertEqual(await first, "k:a")
+        self.assertEqual(second, "k:b")
+        self.assertEqual(self.max_in_apply, 1)
+
+    async def test_apply_error_is_raised_to_every_submitter(self):
+        async def failing_apply(key, items):
+            raise RuntimeError("boom")
+        coalescer = WriteCoalescer(failing_apply, window_seconds=0)
+
+        results = await asyncio.gather(coalescer.submit("k", 1), coalescer.submit("k", 2), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+if __name__ == '__main__':
+    unittest.main()